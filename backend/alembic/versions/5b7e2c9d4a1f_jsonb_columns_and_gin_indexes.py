@@ -0,0 +1,73 @@
+"""jsonb_columns_and_gin_indexes
+
+Revision ID: 5b7e2c9d4a1f
+Revises: 83d1c5f80f03
+Create Date: 2026-10-19 10:02:11.512730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d4a1f'
+down_revision: Union[str, None] = '83d1c5f80f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_COLUMNS = [
+    'contact_info', 'work_experience', 'education', 'skills',
+    'projects', 'certifications', 'awards', 'llm_analysis',
+]
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    """Upgrade schema: Store JSON sections as JSONB on Postgres and index the queried ones."""
+    if not _is_postgres():
+        # SQLite and other backends keep generic JSON columns.
+        return
+
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'resumes', column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    # Containment (@>) lookups on whole sections
+    op.create_index('ix_resumes_contact_info_gin', 'resumes', ['contact_info'], postgresql_using='gin')
+    op.create_index('ix_resumes_skills_gin', 'resumes', ['skills'], postgresql_using='gin', postgresql_ops={'skills': 'jsonb_path_ops'})
+    op.create_index('ix_resumes_llm_analysis_gin', 'resumes', ['llm_analysis'], postgresql_using='gin', postgresql_ops={'llm_analysis': 'jsonb_path_ops'})
+    # Hot scalar keys; must match models.PG_RESUME_RATING / models.PG_CONTACT_EMAIL
+    op.create_index('ix_resumes_llm_analysis_rating', 'resumes', [sa.text("(CAST(llm_analysis ->> 'resume_rating' AS FLOAT))")])
+    op.create_index('ix_resumes_contact_info_email', 'resumes', [sa.text("(contact_info ->> 'email')")])
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop the JSONB indexes and revert to generic JSON columns."""
+    if not _is_postgres():
+        return
+
+    op.drop_index('ix_resumes_contact_info_email', table_name='resumes')
+    op.drop_index('ix_resumes_llm_analysis_rating', table_name='resumes')
+    op.drop_index('ix_resumes_llm_analysis_gin', table_name='resumes')
+    op.drop_index('ix_resumes_skills_gin', table_name='resumes')
+    op.drop_index('ix_resumes_contact_info_gin', table_name='resumes')
+
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'resumes', column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=True,
+            postgresql_using=f'{column}::json',
+        )
@@ -0,0 +1,38 @@
+"""analytics_rollups
+
+Revision ID: 9c3f1a7e2b64
+Revises: 5b7e2c9d4a1f
+Create Date: 2026-10-19 12:40:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3f1a7e2b64'
+down_revision: Union[str, None] = '5b7e2c9d4a1f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Add the analytics rollup counters table."""
+    op.create_table(
+        'analytics_rollups',
+        sa.Column('dimension', sa.String(length=32), nullable=False),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.Column('label', sa.String(length=200), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('dimension', 'granularity', 'bucket_start', 'key'),
+    )
+    # Existing resumes are counted by `python -m app.analytics rebuild`.
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop the analytics rollup counters table."""
+    op.drop_table('analytics_rollups')
@@ -0,0 +1,31 @@
+"""resume_llm_salvage
+
+Revision ID: b81f4c2d7a93
+Revises: e4a7d2c91f58
+Create Date: 2026-10-19 18:41:27.915042
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4c2d7a93'
+down_revision: Union[str, None] = 'e4a7d2c91f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Record which stages of a resume were salvaged from damaged LLM output."""
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+    op.add_column('resumes', sa.Column('llm_salvage', json_type, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop the LLM salvage column."""
+    with op.batch_alter_table('resumes') as batch_op:
+        batch_op.drop_column('llm_salvage')
@@ -0,0 +1,35 @@
+"""resume_llm_usage
+
+Revision ID: e4a7d2c91f58
+Revises: 9c3f1a7e2b64
+Create Date: 2026-10-19 15:02:11.406318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7d2c91f58'
+down_revision: Union[str, None] = '9c3f1a7e2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Record the client and LLM token usage of each resume."""
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+    op.add_column('resumes', sa.Column('client_id', sa.String(length=100), nullable=True))
+    op.add_column('resumes', sa.Column('llm_usage', json_type, nullable=True))
+    op.create_index(op.f('ix_resumes_client_id'), 'resumes', ['client_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema: Drop the client and LLM token usage columns."""
+    op.drop_index(op.f('ix_resumes_client_id'), table_name='resumes')
+    with op.batch_alter_table('resumes') as batch_op:
+        batch_op.drop_column('llm_usage')
+        batch_op.drop_column('client_id')
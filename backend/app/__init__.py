@@ -1,10 +1,11 @@
 
 from dotenv import load_dotenv
 import os
+import sys
 
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
 if os.path.exists(dotenv_path):
     load_dotenv(dotenv_path=dotenv_path)
-    print(f"DEBUG from app/__init__.py: .env loaded from: {dotenv_path}") 
+    print(f"DEBUG from app/__init__.py: .env loaded from: {dotenv_path}", file=sys.stderr)
 else:
-    print(f"DEBUG from app/__init__.py: .env file not found at: {dotenv_path}")
\ No newline at end of file
+    print(f"DEBUG from app/__init__.py: .env file not found at: {dotenv_path}", file=sys.stderr)
\ No newline at end of file
@@ -0,0 +1,362 @@
+"""
+Incrementally maintained analytics rollups over resumes.
+
+Every resume adds one to a set of counters (skills, soft skills, potential roles, ATS
+keywords, rating bucket, totals) in the day and calendar month it was uploaded, so
+dashboard queries read pre-aggregated buckets instead of parsing every row's JSON.
+Counters are updated in the same transaction as the resume insert
+(crud.create_resume_entry) and can be rebuilt from the resumes table at any time:
+    python -m app.analytics rebuild
+"""
+import argparse
+import logging
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+Rollup = models.AnalyticsRollup
+
+# Term dimensions that can be ranked and trended
+TERM_DIMENSIONS = ("skill", "soft_skill", "potential_role", "ats_keyword")
+GRANULARITIES = ("day", "month")
+MAX_KEY_LENGTH = 200
+RATING_BUCKETS = range(1, 11)
+
+# (dimension, key, label)
+RollupEntry = Tuple[str, str, str]
+# (dimension, granularity, bucket_start, key) -> label, count
+RollupKey = Tuple[str, str, date, str]
+
+
+def _clean(term: Any) -> Optional[Tuple[str, str]]:
+    if not isinstance(term, str):
+        return None
+    label = " ".join(term.split())
+    # Casefold before truncating: casefolding can lengthen a string ("ß" -> "ss").
+    key = label.casefold()[:MAX_KEY_LENGTH]
+    return (key, label[:MAX_KEY_LENGTH]) if key else None
+
+
+def _named(items: Any) -> Iterable[Any]:
+    for item in items or []:
+        yield item.get("name") if isinstance(item, dict) else item
+
+
+def rollup_entries(skills: Optional[Dict[str, Any]], llm_analysis: Optional[Dict[str, Any]]) -> List[RollupEntry]:
+    """The counters one resume contributes to; each term counts at most once per resume."""
+    entries: Dict[Tuple[str, str], str] = {("resumes", "all"): "all"}
+
+    def add(dimension: str, terms: Iterable[Any]) -> None:
+        for term in terms:
+            cleaned = _clean(term)
+            if cleaned:
+                entries.setdefault((dimension, cleaned[0]), cleaned[1])
+
+    if isinstance(skills, dict):
+        add("skill", _named(skills.get("technical")))
+        add("skill", _named(skills.get("tools")))
+        add("soft_skill", skills.get("soft") or [])
+
+    if isinstance(llm_analysis, dict):
+        entries[("analyzed", "all")] = "all"
+        add("potential_role", llm_analysis.get("potential_roles") or [])
+        add("ats_keyword", llm_analysis.get("suggested_keywords_for_ats") or [])
+        rating = llm_analysis.get("resume_rating")
+        if isinstance(rating, (int, float)):
+            bucket = str(min(max(int(rating), RATING_BUCKETS[0]), RATING_BUCKETS[-1]))
+            entries[("rating", bucket)] = bucket
+
+    return [(dimension, key, label) for (dimension, key), label in entries.items()]
+
+
+def bucket_starts(uploaded_at: Optional[datetime]) -> Dict[str, date]:
+    """Day and month buckets (UTC) for an upload time."""
+    if uploaded_at is None:
+        uploaded_at = datetime.now(timezone.utc)
+    elif uploaded_at.tzinfo is not None:
+        uploaded_at = uploaded_at.astimezone(timezone.utc)
+    day = uploaded_at.date()
+    return {"day": day, "month": day.replace(day=1)}
+
+
+def _rows_for(uploaded_at: Optional[datetime], entries: List[RollupEntry], count: int = 1) -> List[Dict[str, Any]]:
+    return [
+        {"dimension": dimension, "granularity": granularity, "bucket_start": start, "key": key, "label": label, "count": count}
+        for granularity, start in bucket_starts(uploaded_at).items()
+        for dimension, key, label in entries
+    ]
+
+
+def _upsert_increments(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Adds each row's count to its counter, creating counters that do not exist yet."""
+    if not rows:
+        return
+    # A fixed order keeps concurrent uploads from locking the same counters in different orders.
+    rows = sorted(rows, key=lambda r: (r["dimension"], r["granularity"], r["bucket_start"], r["key"]))
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(Rollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Rollup.dimension, Rollup.granularity, Rollup.bucket_start, Rollup.key],
+            set_={"count": Rollup.count + stmt.excluded["count"]},
+        )
+        db.execute(stmt, rows)
+        return
+
+    for row in rows:
+        updated = db.execute(
+            update(Rollup)
+            .where(
+                Rollup.dimension == row["dimension"], Rollup.granularity == row["granularity"],
+                Rollup.bucket_start == row["bucket_start"], Rollup.key == row["key"],
+            )
+            .values(count=Rollup.count + row["count"])
+        )
+        if updated.rowcount == 0:
+            db.add(Rollup(**row))
+    db.flush()
+
+
+def record_resume(db: Session, db_resume: models.Resume) -> None:
+    """Counts a newly added (flushed, not yet committed) resume in the rollups."""
+    entries = rollup_entries(db_resume.skills, db_resume.llm_analysis)
+    _upsert_increments(db, _rows_for(db_resume.uploaded_at, entries))
+
+
+def _accumulate(counts: Dict[RollupKey, List[Any]], rows: Iterable[Any], last_id: int, gaps: Optional[List[Tuple[int, int]]] = None) -> int:
+    """
+    Counts `rows` (in ID order, after `last_id`) and returns the last ID seen. ID ranges
+    skipped along the way are appended to `gaps`: they may belong to uploads that were
+    still uncommitted when scanned.
+    """
+    for row in rows:
+        if gaps is not None and row.id > last_id + 1:
+            gaps.append((last_id + 1, row.id - 1))
+        for entry in _rows_for(row.uploaded_at, rollup_entries(row.skills, row.llm_analysis)):
+            key = (entry["dimension"], entry["granularity"], entry["bucket_start"], entry["key"])
+            if key in counts:
+                counts[key][1] += 1
+            else:
+                counts[key] = [entry["label"], 1]
+        last_id = row.id
+    return last_id
+
+
+_SCAN_COLUMNS = (models.Resume.id, models.Resume.uploaded_at, models.Resume.skills, models.Resume.llm_analysis)
+
+
+def _scan(db: Session, after_id: int, batch_size: int):
+    query = select(*_SCAN_COLUMNS).where(models.Resume.id > after_id).order_by(models.Resume.id).limit(batch_size)
+    return db.execute(query).all()
+
+
+def _scan_ranges(db: Session, ranges: List[Tuple[int, int]]):
+    query = select(*_SCAN_COLUMNS).where(or_(*(models.Resume.id.between(low, high) for low, high in ranges)))
+    return db.execute(query.order_by(models.Resume.id)).all()
+
+
+def rebuild_rollups(db: Session, batch_size: int = 1000) -> int:
+    """
+    Recomputes all rollups from the resumes table and swaps them in atomically.
+    Returns the number of resumes counted. Uploads made while the rebuild runs are
+    counted exactly once: rows committed before the swap are picked up by a final
+    catch-up scan inside the swap transaction, later ones update the new counters.
+    The catch-up covers new IDs and the ID gaps of the first scan, since an upload
+    can commit after a later ID was already scanned.
+    """
+    counts: Dict[RollupKey, List[Any]] = {}
+    gaps: List[Tuple[int, int]] = []
+    counted = last_id = 0
+    while True:
+        rows = _scan(db, last_id, batch_size)
+        db.rollback()  # end the read transaction between pages
+        if not rows:
+            break
+        last_id = _accumulate(counts, rows, last_id, gaps)
+        counted += len(rows)
+
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            # Holds concurrent counter updates until the new counters are committed.
+            db.execute(text("LOCK TABLE analytics_rollups IN EXCLUSIVE MODE"))
+        db.execute(delete(Rollup))
+        # Every upload that touched the old counters has committed once the lock is held.
+        for start in range(0, len(gaps), 500):
+            rows = _scan_ranges(db, gaps[start:start + 500])
+            _accumulate(counts, rows, 0)
+            counted += len(rows)
+        while True:
+            rows = _scan(db, last_id, batch_size)
+            if not rows:
+                break
+            last_id = _accumulate(counts, rows, last_id)
+            counted += len(rows)
+
+        values = [
+            {"dimension": k[0], "granularity": k[1], "bucket_start": k[2], "key": k[3], "label": label, "count": count}
+            for k, (label, count) in counts.items()
+        ]
+        for start in range(0, len(values), 5000):
+            db.execute(Rollup.__table__.insert(), values[start:start + 5000])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info("Rebuilt analytics rollups from %d resumes (%d counters).", counted, len(counts))
+    return counted
+
+
+# --- Queries ---
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _window_condition(date_from: Optional[date], date_to: Optional[date]):
+    """
+    Selects the buckets covering [date_from, date_to): month counters for whole
+    months inside the window and day counters for the partial months at its edges.
+    """
+    first_full = date_from if date_from is None or date_from.day == 1 else _next_month(date_from)
+    end_full = _month_start(date_to) if date_to is not None else None
+
+    if first_full is not None and end_full is not None and first_full >= end_full:
+        # No whole month inside the window: day counters only.
+        conditions = [Rollup.granularity == "day"]
+        if date_from is not None:
+            conditions.append(Rollup.bucket_start >= date_from)
+        if date_to is not None:
+            conditions.append(Rollup.bucket_start < date_to)
+        return and_(*conditions)
+
+    months = [Rollup.granularity == "month"]
+    if first_full is not None:
+        months.append(Rollup.bucket_start >= first_full)
+    if end_full is not None:
+        months.append(Rollup.bucket_start < end_full)
+    parts = [and_(*months)]
+    if date_from is not None and date_from < first_full:
+        parts.append(and_(Rollup.granularity == "day", Rollup.bucket_start >= date_from, Rollup.bucket_start < first_full))
+    if date_to is not None and end_full < date_to:
+        parts.append(and_(Rollup.granularity == "day", Rollup.bucket_start >= end_full, Rollup.bucket_start < date_to))
+    return or_(*parts)
+
+
+def top_terms(
+    db: Session, dimension: str, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Most frequent terms of a dimension in the window, by number of resumes."""
+    total = func.sum(Rollup.count).label("count")
+    query = (
+        select(Rollup.key, func.min(Rollup.label).label("label"), total)
+        .where(Rollup.dimension == dimension, _window_condition(date_from, date_to))
+        .group_by(Rollup.key)
+        .order_by(total.desc(), Rollup.key)
+        .limit(limit)
+    )
+    return [{"term": row.label, "count": int(row.count)} for row in db.execute(query)]
+
+
+def _totals(db: Session, dimensions: Iterable[str], date_from: Optional[date], date_to: Optional[date]) -> Dict[Tuple[str, str], int]:
+    query = (
+        select(Rollup.dimension, Rollup.key, func.sum(Rollup.count))
+        .where(Rollup.dimension.in_(list(dimensions)), _window_condition(date_from, date_to))
+        .group_by(Rollup.dimension, Rollup.key)
+    )
+    return {(dimension, key): int(count) for dimension, key, count in db.execute(query)}
+
+
+def rating_histogram(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Resumes per integer `resume_rating` bucket (1-10) in the window."""
+    totals = _totals(db, ["rating"], date_from, date_to)
+    return [{"rating": bucket, "count": totals.get(("rating", str(bucket)), 0)} for bucket in RATING_BUCKETS]
+
+
+def summary(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, Any]:
+    totals = _totals(db, ["resumes", "analyzed", "rating"], date_from, date_to)
+    rated = {int(key): count for (dimension, key), count in totals.items() if dimension == "rating"}
+    rated_total = sum(rated.values())
+    return {
+        "resumes": totals.get(("resumes", "all"), 0),
+        "analyzed": totals.get(("analyzed", "all"), 0),
+        "rated": rated_total,
+        # Ratings are bucketed by their integer part, so this is a lower bound within 1 point.
+        "mean_rating_bucket": round(sum(b * c for b, c in rated.items()) / rated_total, 2) if rated_total else None,
+    }
+
+
+def term_trend(
+    db: Session,
+    dimension: str,
+    granularity: str = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 5,
+    terms: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Counts per bucket for the given terms (default: the `limit` most frequent in the
+    window). Month buckets cover whole calendar months overlapping the window.
+    """
+    if terms:
+        keys = [cleaned[0] for cleaned in map(_clean, terms) if cleaned]
+    else:
+        keys = [_clean(t["term"])[0] for t in top_terms(db, dimension, date_from, date_to, limit)]
+    if not keys:
+        return {"granularity": granularity, "buckets": [], "series": {}}
+
+    query = (
+        select(Rollup.bucket_start, Rollup.key, Rollup.label, Rollup.count)
+        .where(Rollup.dimension == dimension, Rollup.granularity == granularity, Rollup.key.in_(keys))
+        .order_by(Rollup.bucket_start)
+    )
+    if date_from is not None:
+        query = query.where(Rollup.bucket_start >= (_month_start(date_from) if granularity == "month" else date_from))
+    if date_to is not None:
+        query = query.where(Rollup.bucket_start < date_to)
+
+    buckets: List[date] = []
+    labels: Dict[str, str] = {}
+    counts: Counter = Counter()
+    for row in db.execute(query):
+        if not buckets or buckets[-1] != row.bucket_start:
+            buckets.append(row.bucket_start)
+        labels.setdefault(row.key, row.label)
+        counts[(row.bucket_start, row.key)] += row.count
+
+    series = {labels.get(key, key): [counts[(bucket, key)] for bucket in buckets] for key in keys}
+    return {"granularity": granularity, "buckets": buckets, "series": series}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Maintain the analytics rollup tables.")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recompute all rollups from the resumes table.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+from app import analytics
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+
+from app import schemas
+from app.database import get_db
+
+router = APIRouter()
+
+DATE_FROM = Query(None, alias="from", description="Start of the window (UTC day, inclusive).")
+DATE_TO = Query(None, alias="to", description="End of the window (UTC day, exclusive).")
+
+
+def _check_window(date_from: Optional[date], date_to: Optional[date]) -> None:
+    if date_from is not None and date_to is not None and date_from >= date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must be before 'to'.")
+
+
+def _check_dimension(dimension: str) -> None:
+    if dimension not in analytics.TERM_DIMENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown dimension '{dimension}'. Expected one of: {', '.join(analytics.TERM_DIMENSIONS)}.",
+        )
+
+
+@router.get("/summary", response_model=schemas.AnalyticsSummarySchema)
+async def get_summary(
+    date_from: Optional[date] = DATE_FROM,
+    date_to: Optional[date] = DATE_TO,
+    db: Session = Depends(get_db)
+):
+    _check_window(date_from, date_to)
+    return analytics.summary(db, date_from, date_to)
+
+
+@router.get("/top/{dimension}", response_model=List[schemas.TermCountSchema])
+async def get_top_terms(
+    dimension: str,
+    date_from: Optional[date] = DATE_FROM,
+    date_to: Optional[date] = DATE_TO,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """Most common skills, soft skills, potential roles or ATS keywords, by number of resumes."""
+    _check_dimension(dimension)
+    _check_window(date_from, date_to)
+    return analytics.top_terms(db, dimension, date_from, date_to, limit)
+
+
+@router.get("/ratings", response_model=List[schemas.RatingBucketSchema])
+async def get_rating_histogram(
+    date_from: Optional[date] = DATE_FROM,
+    date_to: Optional[date] = DATE_TO,
+    db: Session = Depends(get_db)
+):
+    _check_window(date_from, date_to)
+    return analytics.rating_histogram(db, date_from, date_to)
+
+
+@router.get("/trends/{dimension}", response_model=schemas.TermTrendSchema)
+async def get_term_trend(
+    dimension: str,
+    granularity: str = Query("month", description="Bucket size: day or month."),
+    date_from: Optional[date] = DATE_FROM,
+    date_to: Optional[date] = DATE_TO,
+    limit: int = Query(5, ge=1, le=50, description="Number of top terms to trend when 'term' is not given."),
+    term: Optional[List[str]] = Query(None, description="Specific terms to trend; repeat for several."),
+    db: Session = Depends(get_db)
+):
+    _check_dimension(dimension)
+    _check_window(date_from, date_to)
+    if granularity not in analytics.GRANULARITIES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="granularity must be 'day' or 'month'.")
+    return analytics.term_trend(db, dimension, granularity, date_from, date_to, limit, term)
@@ -1,83 +1,163 @@
-from app import crud, llm_services, resume_parser
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from app import crud, export, llm_services, llm_usage, resume_parser
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, File, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
+import asyncio
 import logging
+import re
+import uuid
 
 from app import schemas
 from app.database import get_db
+from app.json_repair import SalvageReport, salvage_record
+from app.logging_config import redact_text
+from app.shared_state import get_state_backend
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,100}$")
+
+# Record upload progress in the client's shared job store; tracking failures never fail the upload
+async def _track_job(job_id: str, client_id: str, **fields) -> None:
+    try:
+        await get_state_backend().update_job(job_id, client_id=client_id, **fields)
+    except Exception as e:
+        logger.warning("Could not update job %s: %s", job_id, e)
+
+def _budget_exceeded(e: llm_usage.TokenBudgetExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after_seconds)},
+    )
+
 @router.post("/upload", response_model=schemas.ResumeReadSchema, status_code=status.HTTP_201_CREATED)
 async def upload_and_process_resume(
+    response: Response,
     file: UploadFile = File(...), 
+    job_id: Optional[str] = Header(
+        None, alias="X-Job-Id",
+        description="ID to poll progress at /jobs/{job_id}; generated if omitted and returned in the X-Job-Id response header."
+    ),
+    client_id: str = Depends(llm_usage.get_client_id),
     db: Session = Depends(get_db)
 ):
     if not file.filename:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file uploaded or filename missing.")
+    if job_id is not None and not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job ID must be 1-100 characters of letters, digits and . _ : -")
+    job_id = job_id or uuid.uuid4().hex
+    response.headers["X-Job-Id"] = job_id
     
     if not llm_services.llm:
         logger.error("LLM service accessed but not available (GEMINI_API_KEY missing or init failed).")
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="LLM service is not available. Please check configuration.")
 
-    logger.info(f"Processing uploaded file: {file.filename}, content type: {file.content_type}")
+    # Reject before text extraction (and OCR) if the client has no tokens left today.
+    try:
+        await llm_usage.check_budget(client_id=client_id)
+    except llm_usage.TokenBudgetExceeded as e:
+        raise _budget_exceeded(e)
+
+    logger.info("Processing uploaded file: %s, content type: %s", file.filename, file.content_type)
+    await _track_job(job_id, client_id, kind="upload", filename=file.filename, status="running", stage="text_extraction")
     contents = await file.read()
     
     try:
-        raw_text = resume_parser.extract_text_from_resume(file.filename, contents)
+        # Off the event loop: scanned PDFs go through OCR, which can take seconds per page.
+        raw_text = await asyncio.to_thread(resume_parser.extract_text_from_resume, file.filename, contents)
         if not raw_text or len(raw_text.strip()) < 30: # Check for meaningful text
-             logger.warning(f"Could not extract sufficient text from resume: {file.filename}. Text length: {len(raw_text.strip())}")
+             logger.warning("Could not extract sufficient text from resume: %s. Text length: %d", file.filename, len(raw_text.strip()))
              # Still try to save raw text if possible
-             crud.create_resume_entry(db, filename=file.filename, raw_text=raw_text or "Extraction failed or empty", extracted_data=None, llm_analysis_data=None)
+             crud.create_resume_entry(db, filename=file.filename, raw_text=raw_text or "Extraction failed or empty", extracted_data=None, llm_analysis_data=None, client_id=client_id)
              raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not extract sufficient text. File might be empty, image-only, or password-protected.")
     except ValueError as e: # From unsupported file type or encoding
-        logger.warning(f"Unsupported file type or encoding for {file.filename}: {e}")
+        logger.warning("Unsupported file type or encoding for %s: %s", file.filename, e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        logger.error(f"Unexpected error during text extraction for {file.filename}: {e}", exc_info=True)
+        logger.error("Unexpected error during text extraction for %s: %s", file.filename, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error processing resume file during text extraction.")
 
-    logger.info(f"Extracted raw text (first 200 chars) for {file.filename}: {raw_text[:200]}...")
-    
-    extracted_data: Optional[schemas.ResumeExtractedData] = await llm_services.extract_structured_data_from_text(raw_text)
-    if not extracted_data:
-        logger.error(f"LLM failed to extract structured data for {file.filename}.")
-        # Save raw text even if extraction fails
-        crud.create_resume_entry(db, filename=file.filename, raw_text=raw_text, extracted_data=None, llm_analysis_data=None)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="LLM failed to extract structured data. Raw text has been saved.")
-    
-    logger.info(f"Successfully extracted structured data for {file.filename}.")
+    # Never log resume content itself: it is personal data.
+    logger.info("Extracted raw text for %s: %s", file.filename, redact_text(raw_text))
     
-    llm_analysis: Optional[schemas.LLMAnalysisSchema] = await llm_services.analyze_resume_with_llm(extracted_data)
-    if not llm_analysis:
-        logger.warning(f"LLM analysis failed for {file.filename}, but structured data was extracted.")
-        # Proceed with saving, llm_analysis will be null
+    salvage_reports = {"extract": SalvageReport(), "analyze": SalvageReport()}
+    with llm_usage.usage_scope(client_id) as usage:
+        await _track_job(job_id, client_id, stage="llm_extraction")
+        try:
+            extracted_data: Optional[schemas.ResumeExtractedData] = await llm_services.extract_structured_data_from_text(
+                raw_text, report=salvage_reports["extract"]
+            )
+        except llm_usage.TokenBudgetExceeded as e:
+            await _track_job(job_id, client_id, status="failed", error=str(e))
+            raise _budget_exceeded(e)
+        if not extracted_data:
+            logger.error("LLM failed to extract structured data for %s.", file.filename)
+            await _track_job(job_id, client_id, status="failed", error="LLM failed to extract structured data.")
+            # Save raw text even if extraction fails
+            crud.create_resume_entry(
+                db, filename=file.filename, raw_text=raw_text, extracted_data=None, llm_analysis_data=None,
+                client_id=client_id, llm_usage=usage.as_dict()
+            )
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="LLM failed to extract structured data. Raw text has been saved.")
+
+        logger.info("Successfully extracted structured data for %s.", file.filename)
+
+        await _track_job(job_id, client_id, stage="llm_analysis")
+        try:
+            llm_analysis: Optional[schemas.LLMAnalysisSchema] = await llm_services.analyze_resume_with_llm(
+                extracted_data, report=salvage_reports["analyze"]
+            )
+        except llm_usage.TokenBudgetExceeded as e:
+            # The extraction is already paid for: keep it and save the resume without analysis.
+            logger.warning("Skipping LLM analysis for %s: %s", file.filename, e)
+            llm_analysis = None
+        if not llm_analysis:
+            logger.warning("LLM analysis failed for %s, but structured data was extracted.", file.filename)
+            # Proceed with saving, llm_analysis will be null
 
     db_resume = crud.create_resume_entry(
         db=db, 
         filename=file.filename,
         raw_text=raw_text,
         extracted_data=extracted_data,
-        llm_analysis_data=llm_analysis
+        llm_analysis_data=llm_analysis,
+        client_id=client_id,
+        llm_usage=usage.as_dict(),
+        llm_salvage=salvage_record(salvage_reports)
     )
     
     if not db_resume:
-        logger.error(f"Failed to save processed resume data to database for {file.filename}.")
+        logger.error("Failed to save processed resume data to database for %s.", file.filename)
+        await _track_job(job_id, client_id, status="failed", error="Failed to save processed resume data to database.")
         # db.rollback() is handled in crud if an exception occurred there
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to save processed resume data to database.")
             
-    logger.info(f"Resume {file.filename} (ID: {db_resume.id}) processed and saved successfully.")
+    logger.info("Resume %s (ID: %s) processed and saved successfully.", file.filename, db_resume.id, extra={"resume_id": db_resume.id})
+    await _track_job(job_id, client_id, status="completed", stage="saved", resume_id=db_resume.id)
     return schemas.ResumeReadSchema.model_validate(db_resume)
 
 
 @router.get("/", response_model=List[schemas.ResumeListDetailSchema])
 async def list_resumes(
     skip: int = 0, limit: int = 20, 
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+    email: Optional[str] = None,
+    skill: Optional[str] = None,
+    role: Optional[str] = Query(None, description="Only resumes whose LLM analysis lists this potential role."),
     db: Session = Depends(get_db)
 ):
-    resumes_db = crud.get_all_resumes(db, skip=skip, limit=limit)
+    if any(f is not None for f in (min_rating, max_rating, email, skill, role)):
+        resumes_db = crud.search_resumes(
+            db, min_rating=min_rating, max_rating=max_rating, email=email,
+            skill=skill, potential_role=role, skip=skip, limit=limit
+        )
+    else:
+        resumes_db = crud.get_all_resumes(db, skip=skip, limit=limit)
     if resumes_db is None: 
         return []
         
@@ -95,6 +175,50 @@ async def list_resumes(
     return results
 
 
+@router.get("/export")
+async def export_resumes(
+    format: str = Query("ndjson", description="One of: ndjson, csv, parquet."),
+    uploaded_from: Optional[datetime] = Query(None, description="Only resumes uploaded at or after this time."),
+    uploaded_to: Optional[datetime] = Query(None, description="Only resumes uploaded before this time."),
+    include_raw_text: bool = False,
+):
+    try:
+        export.ensure_format_available(format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # The generator owns its DB session: it keeps reading after this handler returns.
+    chunks = export.iter_export_chunks(
+        format, uploaded_from=uploaded_from, uploaded_to=uploaded_to, include_raw_text=include_raw_text
+    )
+    filename = f"resumes.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=export.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    client: Optional[str] = Query(
+        None, description="Client that owns the job, e.g. 'backfill'; defaults to the client of this request's API key. Other clients need an admin API key."
+    ),
+    client_id: str = Depends(llm_usage.get_client_id)
+):
+    try:
+        owner = llm_usage.normalize_client_id(client) if client is not None else client_id
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not llm_usage.can_read_client(client_id, owner):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Clients can only read their own jobs.")
+    job = await get_state_backend().get_job(job_id, client_id=owner)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
 @router.get("/{resume_id}", response_model=schemas.ResumeReadSchema)
 async def get_resume_details(
     resume_id: int, 
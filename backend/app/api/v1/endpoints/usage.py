@@ -0,0 +1,26 @@
+from app import llm_usage
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from datetime import date
+
+from app import schemas
+
+router = APIRouter()
+
+
+@router.get("/", response_model=schemas.ClientUsageSchema)
+async def get_client_usage(
+    client: Optional[str] = Query(
+        None, description="Client to report on; defaults to the client of this request's API key. Other clients need an admin API key."
+    ),
+    day: Optional[date] = Query(None, description="UTC day; defaults to today."),
+    client_id: str = Depends(llm_usage.get_client_id)
+):
+    """LLM tokens a client used on one day, per stage, and what is left of its daily budget."""
+    try:
+        requested = llm_usage.normalize_client_id(client) if client is not None else client_id
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not llm_usage.can_read_client(client_id, requested):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Clients can only read their own usage.")
+    return await llm_usage.get_daily_usage(requested, day)
@@ -0,0 +1,356 @@
+"""
+Bulk reprocessing of stored resumes.
+
+Re-runs LLM extraction and/or analysis over rows already in the database, e.g. after
+the prompts in llm_services or the schemas in schemas.py change. Rows are streamed from
+a server-side cursor in primary-key order, processed with bounded concurrency, written
+back in bulk, and the last committed ID is checkpointed so an interrupted run resumes
+where it stopped.
+
+Rows that could not be reprocessed are logged and their IDs kept in the checkpoint;
+`--retry-failed` re-runs just those rows.
+
+Usage (from the backend directory):
+    python -m app.backfill --stage all --concurrency 4 --rate-limit 2
+    python -m app.backfill --stage analyze --sample-rate 0.05 --dry-run
+    python -m app.backfill --stage all --retry-failed
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app import analytics, crud, llm_services, llm_usage, models, schemas
+from app.database import SessionLocal
+from app.json_repair import SalvageReport, salvage_record
+from app.shared_state import get_state_backend
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("extract", "analyze", "all")
+DEFAULT_CHECKPOINT_PATH = ".backfill_checkpoint.json"
+
+
+@dataclass
+class BackfillStats:
+    scanned: int = 0
+    selected: int = 0
+    updated: int = 0
+    failed: int = 0
+    llm_calls: int = 0
+    last_id: int = 0
+    # Rows that could not be reprocessed, for --retry-failed
+    failed_ids: List[int] = field(default_factory=list)
+
+
+class RequestRateLimiter:
+    """Spaces out calls so that at most `rate` start per second (0 disables limiting)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Publish progress to the shared job store so admins can poll /api/v1/resumes/jobs/backfill-<stage>?client=backfill
+async def publish_progress(stage: str, stats: BackfillStats, status: str) -> None:
+    progress = asdict(stats)
+    progress.pop("failed_ids")
+    try:
+        await get_state_backend().update_job(
+            f"backfill-{stage}", client_id=llm_usage.BACKFILL_CLIENT_ID, kind="backfill", status=status, **progress
+        )
+    except Exception as e:
+        logger.warning("Could not publish backfill progress: %s", e)
+
+
+# Load the checkpoint for a stage as (last processed ID, IDs that failed), or start from the beginning
+def load_checkpoint(path: str, stage: str) -> Tuple[int, List[int]]:
+    if not os.path.exists(path):
+        return 0, []
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+        return 0, []
+    if data.get("stage") != stage:
+        logger.warning("Checkpoint %s was written for stage '%s', not '%s'; starting over.", path, data.get("stage"), stage)
+        return 0, []
+    return int(data.get("last_id", 0)), [int(i) for i in data.get("failed_ids", [])]
+
+
+# Atomically persist progress so a crash never leaves a half-written checkpoint
+def save_checkpoint(path: str, stage: str, stats: BackfillStats, last_id: Optional[int] = None, failed_ids: Optional[List[int]] = None) -> None:
+    data = {"stage": stage, **asdict(stats)}
+    if last_id is not None:
+        data["last_id"] = last_id
+    if failed_ids is not None:
+        data["failed_ids"] = failed_ids
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp_path, path)
+
+
+async def _reprocess_row(
+    db_resume: models.Resume,
+    stage: str,
+    limiter: RequestRateLimiter,
+    semaphore: asyncio.Semaphore,
+    stats: BackfillStats
+) -> Optional[Dict[str, Any]]:
+    """
+    Re-runs the requested stage(s) for one row and returns the column updates,
+    or None when the row could not be reprocessed. Tokens are accounted to the
+    "backfill" client, whose budget can be set in LLM_CLIENT_TOKEN_BUDGETS.
+    """
+    async with semaphore:
+        salvage_reports: Dict[str, SalvageReport] = {}
+        with llm_usage.usage_scope(llm_usage.BACKFILL_CLIENT_ID) as usage:
+            values = await _reprocess_stages(db_resume, stage, limiter, stats, salvage_reports)
+        if values and usage.stages:
+            values["llm_usage"] = usage.as_dict(db_resume.llm_usage)
+        if values and len(values) > 1:
+            values["llm_salvage"] = salvage_record(salvage_reports, db_resume.llm_salvage)
+        return values
+
+
+async def _reprocess_stages(
+    db_resume: models.Resume,
+    stage: str,
+    limiter: RequestRateLimiter,
+    stats: BackfillStats,
+    salvage_reports: Dict[str, SalvageReport]
+) -> Optional[Dict[str, Any]]:
+    """Runs the stage(s) for one row; see _reprocess_row. Stages written get their report in `salvage_reports`."""
+    extracted_data: Optional[schemas.ResumeExtractedData] = None
+    values: Dict[str, Any] = {"id": db_resume.id}
+
+    if stage in ("extract", "all"):
+        if not db_resume.raw_text or len(db_resume.raw_text.strip()) < 30:
+            logger.info("Skipping resume ID %s: no usable raw text stored.", db_resume.id)
+            return None
+        await limiter.wait()
+        stats.llm_calls += 1
+        report = SalvageReport()
+        extracted_data = await llm_services.extract_structured_data_from_text(db_resume.raw_text, report=report)
+        if not extracted_data:
+            return None
+        values.update(crud.resume_columns_from_extracted(extracted_data))
+        salvage_reports["extract"] = report
+    else:
+        extracted_data = crud.extracted_data_from_resume(db_resume)
+        if not extracted_data:
+            return None
+
+    if stage in ("analyze", "all"):
+        await limiter.wait()
+        stats.llm_calls += 1
+        report = SalvageReport()
+        llm_analysis = await llm_services.analyze_resume_with_llm(extracted_data, report=report)
+        if not llm_analysis:
+            # Keep a fresh extraction even if the analysis failed; never clobber the old analysis.
+            return values if stage == "all" else None
+        values["llm_analysis"] = llm_analysis.model_dump(exclude_none=True)
+        salvage_reports["analyze"] = report
+
+    return values
+
+
+async def run_backfill(
+    stage: str = "all",
+    batch_size: int = 100,
+    concurrency: int = 4,
+    rate_limit: float = 0.0,
+    sample_rate: float = 1.0,
+    limit: Optional[int] = None,
+    start_after_id: Optional[int] = None,
+    max_id: Optional[int] = None,
+    dry_run: bool = False,
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+    seed: Optional[int] = None,
+    retry_failed: bool = False
+) -> BackfillStats:
+    """
+    Streams stored resumes and re-runs extraction and/or analysis over them.
+    With `retry_failed`, only the rows recorded as failed in the checkpoint are re-run;
+    the checkpoint's position is kept and rows that fail again stay recorded.
+    Returns the final run statistics.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage '{stage}'. Expected one of: {', '.join(STAGES)}.")
+    if not dry_run and not llm_services.llm:
+        raise RuntimeError("LLM service is not available (GEMINI_API_KEY missing or init failed).")
+
+    checkpoint_last_id, checkpoint_failed_ids = load_checkpoint(checkpoint_path, stage) if checkpoint_path else (0, [])
+    retry_ids: Optional[List[int]] = None
+    if retry_failed:
+        if not checkpoint_path:
+            raise ValueError("--retry-failed needs the checkpoint that recorded the failed rows.")
+        retry_ids = sorted(set(checkpoint_failed_ids))
+        logger.info("Retrying %d previously failed resumes for stage %s.", len(retry_ids), stage)
+        after_id = 0
+    else:
+        after_id = start_after_id if start_after_id is not None else checkpoint_last_id
+        if after_id:
+            logger.info("Resuming %s backfill after resume ID %d.", stage, after_id)
+
+    rng = random.Random(seed)
+    limiter = RequestRateLimiter(rate_limit)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    stats = BackfillStats(last_id=after_id)
+    reprocessed_ids: Set[int] = set()
+    started = time.monotonic()
+
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+    try:
+        for batch in crud.iter_resume_batches(read_db, after_id=after_id, batch_size=batch_size, max_id=max_id, ids=retry_ids):
+            stats.scanned += len(batch)
+            selected: List[models.Resume] = [r for r in batch if sample_rate >= 1.0 or rng.random() < sample_rate]
+            batch_end_id = batch[-1].id
+            if limit is not None and len(selected) > limit - stats.selected:
+                selected = selected[: max(0, limit - stats.selected)]
+                # Rows cut by the limit are left for the next run.
+                batch_end_id = selected[-1].id if selected else stats.last_id
+            stats.selected += len(selected)
+
+            if dry_run:
+                for db_resume in selected:
+                    logger.info("[dry-run] Would reprocess resume ID %s (%s) for stage '%s'.", db_resume.id, db_resume.filename, stage)
+            elif selected:
+                results = await asyncio.gather(
+                    *(_reprocess_row(r, stage, limiter, semaphore, stats) for r in selected),
+                    return_exceptions=True
+                )
+                budget_errors = [r for r in results if isinstance(r, llm_usage.TokenBudgetExceeded)]
+                for result in results:
+                    if isinstance(result, BaseException) and not isinstance(result, llm_usage.TokenBudgetExceeded):
+                        raise result
+                updates = [values for values in results if isinstance(values, dict) and len(values) > 1]
+                failed_ids = [
+                    r.id for r, values in zip(selected, results)
+                    if not isinstance(values, BaseException) and not (isinstance(values, dict) and len(values) > 1)
+                ]
+                if failed_ids:
+                    logger.warning("Could not reprocess resume IDs %s for stage %s; re-run them with --retry-failed.", failed_ids, stage)
+                written = crud.bulk_update_resumes(write_db, updates)
+                if written is None:
+                    # Stop before checkpointing so the next run retries this batch.
+                    raise RuntimeError(f"Bulk update failed for batch ending at resume ID {batch[-1].id}; checkpoint left at {stats.last_id}.")
+                if budget_errors:
+                    # Rows finished so far are written; a re-run redoes this batch, mostly from the LLM cache.
+                    stats.updated += written
+                    raise RuntimeError(f"{budget_errors[0]} Stopping; checkpoint left at {stats.last_id}.")
+                stats.failed += len(failed_ids)
+                stats.failed_ids.extend(failed_ids)
+                stats.updated += written
+                reprocessed_ids.update(values["id"] for values in updates)
+
+            stats.last_id = batch_end_id
+            if checkpoint_path and not dry_run:
+                # Earlier failures stay recorded until a run actually rewrites the row; a retry keeps the main run's position.
+                pending = [i for i in checkpoint_failed_ids if i not in reprocessed_ids]
+                save_checkpoint(
+                    checkpoint_path, stage, stats,
+                    last_id=checkpoint_last_id if retry_failed else None,
+                    failed_ids=sorted(set(pending + stats.failed_ids))
+                )
+            if not dry_run:
+                await publish_progress(stage, stats, "running")
+
+            elapsed = time.monotonic() - started
+            logger.info(
+                "Backfill progress: scanned=%d selected=%d updated=%d failed=%d last_id=%d (%.1f rows/s, %.2f reprocessed/s)",
+                stats.scanned, stats.selected, stats.updated, stats.failed, stats.last_id,
+                stats.scanned / elapsed if elapsed else 0, stats.selected / elapsed if elapsed else 0
+            )
+            if limit is not None and stats.selected >= limit:
+                break
+    except Exception:
+        if not dry_run:
+            await publish_progress(stage, stats, "failed")
+        raise
+    finally:
+        read_db.close()
+        write_db.close()
+
+    if not dry_run and stats.updated:
+        # Re-analysed rows change their counters; recount rather than diffing old and new values.
+        analytics_db = SessionLocal()
+        try:
+            analytics.rebuild_rollups(analytics_db)
+        finally:
+            analytics_db.close()
+
+    if not dry_run:
+        await publish_progress(stage, stats, "completed")
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        "Backfill %sfinished in %.1fs: scanned=%d selected=%d updated=%d failed=%d llm_calls=%d.",
+        "dry run " if dry_run else "", elapsed, stats.scanned, stats.selected, stats.updated, stats.failed, stats.llm_calls
+    )
+    return stats
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Re-run LLM extraction and/or analysis over stored resumes.")
+    parser.add_argument("--stage", choices=STAGES, default="all", help="Which LLM stage(s) to re-run (default: all).")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows fetched per cursor batch and written per bulk update.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum resumes processed concurrently.")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Maximum LLM calls started per second (0 = unlimited).")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="Fraction of rows to reprocess, e.g. 0.1 for a 10%% sample.")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible sampling.")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many rows have been selected.")
+    parser.add_argument("--start-after-id", type=int, default=None, help="Ignore the checkpoint and start after this resume ID.")
+    parser.add_argument("--max-id", type=int, default=None, help="Do not process resumes with an ID above this value.")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Checkpoint file used to resume interrupted runs.")
+    parser.add_argument("--retry-failed", action="store_true", help="Only re-run the rows recorded as failed in the checkpoint.")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Neither read nor write a checkpoint file.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which rows would be reprocessed; no LLM calls or writes.")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = build_arg_parser().parse_args(argv)
+    try:
+        stats = asyncio.run(run_backfill(
+            stage=args.stage,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            sample_rate=args.sample_rate,
+            limit=args.limit,
+            start_after_id=args.start_after_id,
+            max_id=args.max_id,
+            dry_run=args.dry_run,
+            checkpoint_path=None if args.no_checkpoint else args.checkpoint,
+            seed=args.seed,
+            retry_failed=args.retry_failed,
+        ))
+    except (ValueError, RuntimeError) as e:
+        logger.error(str(e))
+        return 2
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
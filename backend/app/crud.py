@@ -1,7 +1,11 @@
 from . import schemas
+from sqlalchemy import exists, func, or_, select, type_coerce, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
-from . import models
-from typing import Optional, List
+from . import analytics, models
+from .json_repair import describe_error
+from typing import Optional, List, Dict, Any, Iterator
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,7 +15,7 @@ def get_resume_by_id(db: Session, resume_id: int) -> Optional[models.Resume]:
     try:
         return db.query(models.Resume).filter(models.Resume.id == resume_id).first()
     except Exception as e:
-        logger.error(f"Error fetching resume by ID {resume_id}: {e}", exc_info=True)
+        logger.error("Error fetching resume by ID %s: %s", resume_id, e, exc_info=True)
         return None
 
 # Get all resumes, ordered by upload date
@@ -19,36 +23,182 @@ def get_all_resumes(db: Session, skip: int = 0, limit: int = 100) -> List[models
     try:
         return db.query(models.Resume).order_by(models.Resume.uploaded_at.desc()).offset(skip).limit(limit).all()
     except Exception as e:
-        logger.error(f"Error fetching all resumes: {e}", exc_info=True)
+        logger.error("Error fetching all resumes: %s", e, exc_info=True)
         return []
 
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+# SQLite fallback: does any element of the JSON array at `path` match `value` (optionally on a sub-key)?
+def _json_array_has(column, path: str, value: str, key: Optional[str] = None):
+    elements = func.json_each(column, path).table_valued("value").alias()
+    element = func.json_extract(elements.c.value, f"$.{key}") if key else elements.c.value
+    return exists(select(1).select_from(elements).where(element == value))
+
+# Filter resumes by indexed JSON keys. On Postgres these predicates are served by the
+# JSONB GIN and expression indexes; on SQLite they fall back to JSON1 functions.
+def search_resumes(
+    db: Session,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+    email: Optional[str] = None,
+    skill: Optional[str] = None,
+    potential_role: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[models.Resume]:
+    try:
+        query = db.query(models.Resume)
+        if _is_postgres(db):
+            rating = models.PG_RESUME_RATING
+            skills = type_coerce(models.Resume.skills, JSONB)
+            analysis = type_coerce(models.Resume.llm_analysis, JSONB)
+            if email is not None:
+                query = query.filter(models.PG_CONTACT_EMAIL == email)
+            if skill is not None:
+                query = query.filter(or_(
+                    skills.contains({"technical": [{"name": skill}]}),
+                    skills.contains({"tools": [{"name": skill}]}),
+                ))
+            if potential_role is not None:
+                query = query.filter(analysis.contains({"potential_roles": [potential_role]}))
+        else:
+            rating = models.Resume.llm_analysis["resume_rating"].as_float()
+            if email is not None:
+                query = query.filter(models.Resume.contact_info["email"].as_string() == email)
+            if skill is not None:
+                query = query.filter(or_(
+                    _json_array_has(models.Resume.skills, "$.technical", skill, key="name"),
+                    _json_array_has(models.Resume.skills, "$.tools", skill, key="name"),
+                ))
+            if potential_role is not None:
+                query = query.filter(_json_array_has(models.Resume.llm_analysis, "$.potential_roles", potential_role))
+
+        if min_rating is not None:
+            query = query.filter(rating >= min_rating)
+        if max_rating is not None:
+            query = query.filter(rating <= max_rating)
+        return query.order_by(models.Resume.uploaded_at.desc()).offset(skip).limit(limit).all()
+    except Exception as e:
+        logger.error("Error searching resumes: %s", e, exc_info=True)
+        return []
+
+# Map extracted resume data onto the Resume JSON columns
+def resume_columns_from_extracted(extracted_data: Optional[schemas.ResumeExtractedData]) -> Dict[str, Any]:
+    return {
+        "contact_info": extracted_data.contact_info.model_dump(exclude_none=True) if extracted_data and extracted_data.contact_info else None,
+        "summary": extracted_data.summary if extracted_data else None,
+        "work_experience": [exp.model_dump(exclude_none=True) for exp in extracted_data.work_experience] if extracted_data and extracted_data.work_experience else [],
+        "education": [edu.model_dump(exclude_none=True) for edu in extracted_data.education] if extracted_data and extracted_data.education else [],
+        "skills": extracted_data.skills.model_dump(exclude_none=True) if extracted_data and extracted_data.skills else None,
+        "projects": [proj.model_dump(exclude_none=True) for proj in extracted_data.projects] if extracted_data and extracted_data.projects else [],
+        "certifications": [cert.model_dump(exclude_none=True) for cert in extracted_data.certifications] if extracted_data and extracted_data.certifications else [],
+        "awards": [award.model_dump(exclude_none=True) for award in extracted_data.awards] if extracted_data and extracted_data.awards else [],
+    }
+
+# Rebuild extracted resume data from a stored Resume row
+def extracted_data_from_resume(db_resume: models.Resume) -> Optional[schemas.ResumeExtractedData]:
+    try:
+        return schemas.ResumeExtractedData.model_validate({
+            "contact_info": db_resume.contact_info,
+            "summary": db_resume.summary,
+            "work_experience": db_resume.work_experience or [],
+            "education": db_resume.education or [],
+            "skills": db_resume.skills,
+            "projects": db_resume.projects or [],
+            "certifications": db_resume.certifications or [],
+            "awards": db_resume.awards or [],
+        })
+    except Exception as e:
+        logger.warning("Stored data for resume ID %s does not validate against ResumeExtractedData: %s", db_resume.id, describe_error(e))
+        return None
+
 # Create a new resume entry
 def create_resume_entry(
     db: Session,
     filename: str,
     raw_text: str,
     extracted_data: Optional[schemas.ResumeExtractedData],
-    llm_analysis_data: Optional[schemas.LLMAnalysisSchema]
+    llm_analysis_data: Optional[schemas.LLMAnalysisSchema],
+    client_id: Optional[str] = None,
+    llm_usage: Optional[Dict[str, Any]] = None,
+    llm_salvage: Optional[Dict[str, Any]] = None
 ) -> Optional[models.Resume]:
     try:
         db_resume = models.Resume(
             filename=filename,
             raw_text=raw_text,
-            contact_info=extracted_data.contact_info.model_dump(exclude_none=True) if extracted_data and extracted_data.contact_info else None,
-            summary=extracted_data.summary if extracted_data else None,
-            work_experience=[exp.model_dump(exclude_none=True) for exp in extracted_data.work_experience] if extracted_data and extracted_data.work_experience else [],
-            education=[edu.model_dump(exclude_none=True) for edu in extracted_data.education] if extracted_data and extracted_data.education else [],
-            skills=extracted_data.skills.model_dump(exclude_none=True) if extracted_data and extracted_data.skills else None,
-            projects=[proj.model_dump(exclude_none=True) for proj in extracted_data.projects] if extracted_data and extracted_data.projects else [],
-            certifications=[cert.model_dump(exclude_none=True) for cert in extracted_data.certifications] if extracted_data and extracted_data.certifications else [],
-            awards=[award.model_dump(exclude_none=True) for award in extracted_data.awards] if extracted_data and extracted_data.awards else [],
-            llm_analysis=llm_analysis_data.model_dump(exclude_none=True) if llm_analysis_data else None
+            **resume_columns_from_extracted(extracted_data),
+            llm_analysis=llm_analysis_data.model_dump(exclude_none=True) if llm_analysis_data else None,
+            client_id=client_id,
+            llm_usage=llm_usage,
+            llm_salvage=llm_salvage
         )
         db.add(db_resume)
+        db.flush()
+        _record_analytics(db, db_resume)
         db.commit()
         db.refresh(db_resume)
         return db_resume
     except Exception as e:
         db.rollback()
-        logger.error(f"Error creating resume entry for {filename}: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        logger.error("Error creating resume entry for %s: %s", filename, e, exc_info=True)
+        return None
+
+# Count a new resume in the analytics rollups, in a savepoint so a rollup failure never loses the resume
+def _record_analytics(db: Session, db_resume: models.Resume) -> None:
+    try:
+        with db.begin_nested():
+            analytics.record_resume(db, db_resume)
+    except Exception as e:
+        logger.warning("Could not update analytics rollups for resume ID %s; run `python -m app.analytics rebuild`: %s", db_resume.id, e)
+
+# Stream resumes in primary-key order, one keyset page at a time. Each page is read
+# through a server-side cursor and its transaction is closed before the page is
+# yielded, so callers can write between pages without holding a long-lived cursor.
+def iter_resume_batches(
+    db: Session,
+    after_id: int = 0,
+    batch_size: int = 100,
+    max_id: Optional[int] = None,
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    ids: Optional[List[int]] = None
+) -> Iterator[List[models.Resume]]:
+    last_id = after_id
+    while True:
+        query = (
+            select(models.Resume)
+            .where(models.Resume.id > last_id)
+            .order_by(models.Resume.id)
+            .limit(batch_size)
+            .execution_options(yield_per=batch_size)
+        )
+        if max_id is not None:
+            query = query.where(models.Resume.id <= max_id)
+        if uploaded_from is not None:
+            query = query.where(models.Resume.uploaded_at >= uploaded_from)
+        if uploaded_to is not None:
+            query = query.where(models.Resume.uploaded_at < uploaded_to)
+        if ids is not None:
+            query = query.where(models.Resume.id.in_(ids))
+        batch = list(db.execute(query).scalars())
+        db.expunge_all()
+        db.rollback()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+# Apply many column updates in one executemany round-trip; each dict must carry the row "id"
+def bulk_update_resumes(db: Session, updates: List[Dict[str, Any]]) -> Optional[int]:
+    if not updates:
+        return 0
+    try:
+        db.execute(update(models.Resume), updates)
+        db.commit()
+        return len(updates)
+    except Exception as e:
+        db.rollback()
+        logger.error("Error bulk updating %d resumes: %s", len(updates), e, exc_info=True)
+        return None
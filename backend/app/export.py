@@ -0,0 +1,310 @@
+"""
+Streaming bulk export of stored resumes to NDJSON, flattened CSV or Parquet.
+
+Rows are read in keyset pages through a server-side cursor and serialized page by
+page, so memory use stays constant regardless of table size. Used by the
+`GET /api/v1/resumes/export` endpoint and runnable as a CLI (from the backend directory):
+    python -m app.export --format csv --output resumes.csv --uploaded-from 2025-06-01
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from app import crud, models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+LIST_SEPARATOR = "; "
+
+# Flattened columns shared by the CSV and Parquet exports. List-valued columns are
+# joined with LIST_SEPARATOR in CSV and stored as list<string> in Parquet.
+FLAT_SCALAR_COLUMNS = [
+    "id", "filename", "uploaded_at", "name", "email", "phone", "linkedin", "github",
+    "portfolio_url", "address", "summary", "work_experience_count", "latest_company",
+    "latest_role", "education_count", "project_count", "certification_count",
+    "award_count", "resume_rating", "overall_feedback", "client_id",
+    "llm_input_tokens", "llm_output_tokens",
+]
+FLAT_LIST_COLUMNS = [
+    "technical_skills", "soft_skills", "tools", "institutions",
+    "potential_roles", "suggested_keywords_for_ats",
+]
+FLAT_COLUMNS = FLAT_SCALAR_COLUMNS + FLAT_LIST_COLUMNS
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+def _names(items: Any) -> List[str]:
+    names = []
+    for item in _as_list(items):
+        if isinstance(item, dict) and item.get("name"):
+            names.append(str(item["name"]))
+        elif isinstance(item, str):
+            names.append(item)
+    return names
+
+
+# Full nested representation of a row, as written to NDJSON
+def resume_to_record(db_resume: models.Resume, include_raw_text: bool = False) -> Dict[str, Any]:
+    record = {
+        "id": db_resume.id,
+        "filename": db_resume.filename,
+        "uploaded_at": db_resume.uploaded_at.isoformat() if db_resume.uploaded_at else None,
+        "contact_info": db_resume.contact_info,
+        "summary": db_resume.summary,
+        "work_experience": db_resume.work_experience or [],
+        "education": db_resume.education or [],
+        "skills": db_resume.skills,
+        "projects": db_resume.projects or [],
+        "certifications": db_resume.certifications or [],
+        "awards": db_resume.awards or [],
+        "llm_analysis": db_resume.llm_analysis,
+        "client_id": db_resume.client_id,
+        "llm_usage": db_resume.llm_usage,
+        "llm_salvage": db_resume.llm_salvage,
+    }
+    if include_raw_text:
+        record["raw_text"] = db_resume.raw_text
+    return record
+
+
+# One flat row per resume, as written to CSV and Parquet
+def resume_to_flat_record(db_resume: models.Resume, include_raw_text: bool = False) -> Dict[str, Any]:
+    contact_info = _as_dict(db_resume.contact_info)
+    skills = _as_dict(db_resume.skills)
+    analysis = _as_dict(db_resume.llm_analysis)
+    usage = _as_dict(db_resume.llm_usage)
+    work_experience = _as_list(db_resume.work_experience)
+    latest_job = _as_dict(work_experience[0]) if work_experience else {}
+
+    record = {
+        "id": db_resume.id,
+        "filename": db_resume.filename,
+        "uploaded_at": db_resume.uploaded_at,
+        "name": contact_info.get("name"),
+        "email": contact_info.get("email"),
+        "phone": contact_info.get("phone"),
+        "linkedin": contact_info.get("linkedin"),
+        "github": contact_info.get("github"),
+        "portfolio_url": contact_info.get("portfolio_url"),
+        "address": contact_info.get("address"),
+        "summary": db_resume.summary,
+        "work_experience_count": len(work_experience),
+        "latest_company": latest_job.get("company"),
+        "latest_role": latest_job.get("role"),
+        "education_count": len(_as_list(db_resume.education)),
+        "project_count": len(_as_list(db_resume.projects)),
+        "certification_count": len(_as_list(db_resume.certifications)),
+        "award_count": len(_as_list(db_resume.awards)),
+        "resume_rating": analysis.get("resume_rating"),
+        "overall_feedback": analysis.get("overall_feedback"),
+        "client_id": db_resume.client_id,
+        "llm_input_tokens": usage.get("input_tokens"),
+        "llm_output_tokens": usage.get("output_tokens"),
+        "technical_skills": _names(skills.get("technical")),
+        "soft_skills": [str(s) for s in _as_list(skills.get("soft"))],
+        "tools": _names(skills.get("tools")),
+        "institutions": [str(e["institution"]) for e in _as_list(db_resume.education) if isinstance(e, dict) and e.get("institution")],
+        "potential_roles": [str(r) for r in _as_list(analysis.get("potential_roles"))],
+        "suggested_keywords_for_ats": [str(k) for k in _as_list(analysis.get("suggested_keywords_for_ats"))],
+    }
+    if include_raw_text:
+        record["raw_text"] = db_resume.raw_text
+    return record
+
+
+def _ndjson_chunks(batches: Iterator[List[models.Resume]], include_raw_text: bool) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [json.dumps(resume_to_record(r, include_raw_text), ensure_ascii=False, default=str) for r in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _csv_chunks(batches: Iterator[List[models.Resume]], include_raw_text: bool) -> Iterator[bytes]:
+    columns = FLAT_COLUMNS + (["raw_text"] if include_raw_text else [])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        for db_resume in batch:
+            record = resume_to_flat_record(db_resume, include_raw_text)
+            for column in FLAT_LIST_COLUMNS:
+                record[column] = LIST_SEPARATOR.join(record[column])
+            if record["uploaded_at"] is not None:
+                record["uploaded_at"] = record["uploaded_at"].isoformat()
+            writer.writerow(record)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(include_raw_text: bool):
+    import pyarrow as pa
+
+    fields = [
+        pa.field("id", pa.int64()),
+        pa.field("filename", pa.string()),
+        pa.field("uploaded_at", pa.timestamp("us", tz="UTC")),
+    ]
+    for column in FLAT_SCALAR_COLUMNS[3:]:
+        if column.endswith("_count"):
+            fields.append(pa.field(column, pa.int32()))
+        elif column.endswith("_tokens"):
+            fields.append(pa.field(column, pa.int64()))
+        elif column == "resume_rating":
+            fields.append(pa.field(column, pa.float64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    fields.extend(pa.field(column, pa.list_(pa.string())) for column in FLAT_LIST_COLUMNS)
+    if include_raw_text:
+        fields.append(pa.field("raw_text", pa.string()))
+    return pa.schema(fields)
+
+
+def _parquet_chunks(batches: Iterator[List[models.Resume]], include_raw_text: bool) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(include_raw_text)
+    sink = _ChunkSink()
+    # Each batch becomes one row group, flushed to the client as soon as it is written.
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+            for db_resume in batch:
+                record = resume_to_flat_record(db_resume, include_raw_text)
+                for name in schema.names:
+                    columns[name].append(record.get(name))
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def ensure_format_available(export_format: str) -> None:
+    """Raises ValueError for unknown formats or when an optional dependency is missing."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    if export_format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires the 'pyarrow' package to be installed.")
+
+
+def iter_export_chunks(
+    export_format: str,
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    include_raw_text: bool = False,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Yields the serialized export as byte chunks, one per database page.
+    Opens and closes its own session so it can outlive the request that started it.
+    """
+    ensure_format_available(export_format)
+    serializers = {"ndjson": _ndjson_chunks, "csv": _csv_chunks, "parquet": _parquet_chunks}
+
+    db = SessionLocal()
+    try:
+        batches = crud.iter_resume_batches(
+            db, batch_size=batch_size, uploaded_from=uploaded_from, uploaded_to=uploaded_to
+        )
+        yield from serializers[export_format](batches, include_raw_text)
+    finally:
+        db.close()
+
+
+def _parse_datetime_arg(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid ISO date/datetime: {value}")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Stream all stored resumes to NDJSON, CSV or Parquet.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson", help="Output format (default: ndjson).")
+    parser.add_argument("--output", "-o", default="-", help="Output file path, or '-' for stdout (default).")
+    parser.add_argument("--uploaded-from", type=_parse_datetime_arg, default=None, help="Only rows uploaded at or after this ISO date/datetime.")
+    parser.add_argument("--uploaded-to", type=_parse_datetime_arg, default=None, help="Only rows uploaded before this ISO date/datetime.")
+    parser.add_argument("--include-raw-text", action="store_true", help="Include the extracted raw text column.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_EXPORT_BATCH_SIZE, help="Rows fetched and serialized per page.")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = build_arg_parser().parse_args(argv)
+    try:
+        ensure_format_available(args.format)
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+
+    started = time.monotonic()
+    written = 0
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in iter_export_chunks(
+            args.format,
+            uploaded_from=args.uploaded_from,
+            uploaded_to=args.uploaded_to,
+            include_raw_text=args.include_raw_text,
+            batch_size=args.batch_size,
+        ):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    logger.info("Exported %d bytes as %s in %.1fs.", written, args.format, time.monotonic() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+import json
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of invalid values pruned before giving up on a document
+MAX_SALVAGE_STEPS = 100
+
+
+@dataclass
+class SalvageReport:
+    """What had to be fixed to turn an LLM response into a valid schema instance."""
+    repairs: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def repaired_syntax(self) -> bool:
+        return bool(self.repairs)
+
+    @property
+    def salvaged(self) -> bool:
+        return bool(self.repairs or self.dropped)
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {"repairs": list(self.repairs), "dropped": list(self.dropped)}
+
+
+def salvage_record(reports: Dict[str, SalvageReport], previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    The JSON stored on Resume.llm_salvage: the salvage report of each stage whose output
+    had to be repaired or pruned, or None if every stage parsed cleanly. Stages from
+    `previous` (an earlier llm_salvage value) are kept unless re-run.
+    """
+    record = dict(previous or {})
+    for stage, report in reports.items():
+        if report.salvaged:
+            record[stage] = report.as_dict()
+        else:
+            record.pop(stage, None)
+    return record or None
+
+
+def _close_truncated(text: str, report: SalvageReport) -> str:
+    """
+    Closes an unterminated string and any open objects/arrays, first trimming a
+    dangling key, colon or comma left behind by the truncation.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+
+    if not in_string and not stack:
+        return text
+
+    if in_string:
+        if escaped:
+            text = text[:-1]
+        text += '"'
+        report.repairs.append("closed unterminated string")
+
+    # Drop a trailing half-written member: a partial literal, `"key"`, `"key":` or `,`.
+    # A trailing string is only a dangling key inside an object; in an array it is a value.
+    in_object = bool(stack) and stack[-1] == "}"
+    while True:
+        stripped = text.rstrip()
+        trimmed = re.sub(r'(\d)\.$', r"\1", stripped)
+        trimmed = re.sub(r':\s*-?(?:t|tr|tru|f|fa|fal|fals|n|nu|nul)$', ":", trimmed)
+        trimmed = re.sub(r'([\[,])\s*-?(?:t|tr|tru|f|fa|fal|fals|n|nu|nul|-)$', r"\1", trimmed)
+        trimmed = re.sub(r',\s*$', "", trimmed)
+        if in_object:
+            trimmed = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*$', r"\1", trimmed)
+        trimmed = re.sub(r':\s*$', ": null", trimmed)
+        if trimmed == stripped:
+            break
+        text = trimmed
+    text = re.sub(r',\s*$', "", text.rstrip())
+
+    if stack:
+        text += "".join(reversed(stack))
+        report.repairs.append(f"closed {len(stack)} truncated object(s)/array(s)")
+    return text
+
+
+def repair_json_text(text: str, report: SalvageReport) -> str:
+    """Fixes common syntax damage in LLM-produced JSON without changing valid content."""
+    repaired = text.strip()
+
+    # Python-style literals occasionally emitted instead of JSON ones (outside strings only).
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', repaired)
+    for i in range(0, len(parts), 2):
+        fixed = re.sub(r"\bNone\b", "null", parts[i])
+        fixed = re.sub(r"\bTrue\b", "true", fixed)
+        fixed = re.sub(r"\bFalse\b", "false", fixed)
+        if fixed != parts[i]:
+            parts[i] = fixed
+            if "replaced Python literals" not in report.repairs:
+                report.repairs.append("replaced Python literals")
+    repaired = "".join(parts)
+
+    repaired = _close_truncated(repaired, report)
+
+    without_trailing_commas = re.sub(r",(\s*[}\]])", r"\1", repaired)
+    if without_trailing_commas != repaired:
+        report.repairs.append("removed trailing commas")
+        repaired = without_trailing_commas
+    return repaired
+
+
+def loads_tolerant(text: str, report: SalvageReport) -> Optional[Any]:
+    """json.loads, falling back to a locally repaired copy of the text."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    repaired = repair_json_text(text, report)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        logger.debug("JSON still invalid after local repair: %s", e)
+        return None
+
+
+def _format_path(loc: Tuple[Any, ...]) -> str:
+    path = ""
+    for part in loc:
+        path += f"[{part}]" if isinstance(part, int) else (f".{part}" if path else str(part))
+    return path or "<root>"
+
+
+def describe_error(error: Exception) -> str:
+    """
+    The exception type and, for a ValidationError, the failing paths and error types;
+    never the input values, which are resume content.
+    """
+    if isinstance(error, ValidationError):
+        details = ", ".join(f"{_format_path(tuple(err['loc']))} ({err['type']})" for err in error.errors()[:10])
+        return f"{error.error_count()} validation error(s) at {details}"
+    return type(error).__name__
+
+
+def _remove_at(data: Any, loc: Tuple[Any, ...]) -> bool:
+    """Deletes the value at `loc` (so the schema default applies). Returns False if absent."""
+    parent = data
+    for part in loc[:-1]:
+        try:
+            parent = parent[part]
+        except (KeyError, IndexError, TypeError):
+            return False
+    key = loc[-1]
+    if isinstance(parent, dict) and key in parent:
+        del parent[key]
+        return True
+    if isinstance(parent, list) and isinstance(key, int) and 0 <= key < len(parent):
+        del parent[key]
+        return True
+    return False
+
+
+def _has_content(value: Any) -> bool:
+    """True if `value` holds at least one non-empty scalar, however deeply nested."""
+    if isinstance(value, dict):
+        return any(_has_content(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_content(v) for v in value)
+    return value is not None and value != ""
+
+
+def validate_with_salvage(data: Any, target_schema: Type[BaseModel], report: SalvageReport) -> Optional[BaseModel]:
+    """
+    Validates `data` against `target_schema`, pruning only the invalid parts: an invalid
+    value is removed so its default (null / empty list) applies, and if that is not
+    enough (e.g. a required field is missing) the enclosing list item or section goes.
+    Every removal is recorded in `report.dropped`. Returns None if nothing with content
+    survives (e.g. a response truncated after its first key).
+    """
+    if not isinstance(data, dict):
+        return None
+
+    for _ in range(MAX_SALVAGE_STEPS):
+        try:
+            validated = target_schema.model_validate(data)
+        except ValidationError as e:
+            errors = [tuple(err["loc"]) for err in e.errors()]
+        else:
+            if not _has_content(validated.model_dump(exclude_none=True)):
+                logger.debug("Salvaged %s has no content left; rejecting it.", target_schema.__name__)
+                return None
+            return validated
+        # Pydantic may tag union members in the location; keep only real path components.
+        loc = tuple(part for part in errors[0] if isinstance(part, int) or not str(part).startswith(("function-", "union[")))
+        while loc and not _remove_at(data, loc):
+            loc = loc[:-1]
+        if not loc:
+            return None
+        report.dropped.append(_format_path(loc))
+    return None
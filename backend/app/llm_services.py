@@ -1,4 +1,6 @@
 import os
+import asyncio
+import hashlib
 import json
 import logging
 import re
@@ -8,7 +10,12 @@ from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.exceptions import OutputParserException
 
-from . import schemas
+from . import llm_usage, schemas
+from .json_repair import SalvageReport, describe_error, loads_tolerant, validate_with_salvage
+from .llm_usage import TokenBudgetExceeded
+from .logging_config import redact_text
+from .shared_state import get_state_backend
+from .resume_chunking import split_resume_text, merge_extracted_data
 
 
 logger = logging.getLogger(__name__)
@@ -18,6 +25,20 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 LLM_MODEL_NAME = "gemini-2.0-flash"
 LLM_TEMPERATURE = 0.1
 
+# Resumes longer than this (in characters) are extracted chunk by chunk and merged
+CHUNKED_EXTRACTION_THRESHOLD_CHARS = int(os.getenv("LLM_CHUNKED_EXTRACTION_THRESHOLD_CHARS", "12000"))
+CHUNK_TARGET_CHARS = int(os.getenv("LLM_CHUNK_TARGET_CHARS", "6000"))
+CHUNK_MAX_CONCURRENCY = int(os.getenv("LLM_CHUNK_MAX_CONCURRENCY", "4"))
+
+# Gemini quota shared by all workers through the shared state backend (0 disables limiting)
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", "0"))
+LLM_RATE_LIMIT_BURST = float(os.getenv("LLM_RATE_LIMIT_BURST", "5"))
+# Identical extraction/analysis inputs are served from the shared cache for this long (0 disables caching)
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+
+# Outcome counts of _parse_llm_json_output: parsed as-is, repaired/salvaged locally, or unusable
+SALVAGE_STATS = {"clean": 0, "salvaged": 0, "failed": 0}
+
 llm = None
 if not GEMINI_API_KEY:
     logger.warning(
@@ -31,15 +52,24 @@ else:
             google_api_key=GEMINI_API_KEY,
             temperature=LLM_TEMPERATURE,
         )
-        logger.info(f"Gemini LLM initialized successfully with model: {LLM_MODEL_NAME} and temperature: {LLM_TEMPERATURE}.")
+        logger.info("Gemini LLM initialized successfully with model: %s and temperature: %s.", LLM_MODEL_NAME, LLM_TEMPERATURE)
     except Exception as e:
-        logger.error(f"Fatal Error initializing Gemini LLM: {e}", exc_info=True)
+        logger.error("Fatal Error initializing Gemini LLM: %s", e, exc_info=True)
 
 # Parse LLM JSON output
-def _parse_llm_json_output(llm_output_str: str, target_schema: type[schemas.BaseModel]) -> Optional[schemas.BaseModel]:
+def _parse_llm_json_output(
+    llm_output_str: str,
+    target_schema: type[schemas.BaseModel],
+    report: Optional[SalvageReport] = None
+) -> Optional[schemas.BaseModel]:
     """
     Cleans and parses JSON output from LLM, then validates against a Pydantic schema.
+    If strict parsing fails, the JSON is repaired locally (trailing commas, truncated
+    structures, ...) and only the invalid parts are dropped; the fixes are recorded
+    in `report` and in SALVAGE_STATS.
     """
+    if report is None:
+        report = SalvageReport()
     if not llm_output_str:
         logger.warning("LLM output string is empty.")
         return None
@@ -47,11 +77,11 @@ def _parse_llm_json_output(llm_output_str: str, target_schema: type[schemas.Base
     cleaned_json_str = llm_output_str.strip()
     
     match = re.search(r"```json\s*([\s\S]+?)\s*```", cleaned_json_str, re.DOTALL)
+    first_brace = cleaned_json_str.find('{')
     if match:
         json_data_str = match.group(1).strip()
         logger.debug("Extracted JSON from markdown block.")
     else:
-        first_brace = cleaned_json_str.find('{')
         last_brace = cleaned_json_str.rfind('}')
         if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
             json_data_str = cleaned_json_str[first_brace : last_brace+1]
@@ -63,21 +93,36 @@ def _parse_llm_json_output(llm_output_str: str, target_schema: type[schemas.Base
     try:
         parsed_dict = json.loads(json_data_str)
         validated_data = target_schema.model_validate(parsed_dict) 
-        logger.debug(f"Successfully parsed and validated JSON against {target_schema.__name__}.")
+        logger.debug("Successfully parsed and validated JSON against %s.", target_schema.__name__)
+        SALVAGE_STATS["clean"] += 1
         return validated_data
     except json.JSONDecodeError as e:
-        logger.error(
-            f"LLM JSON Decode Error for schema {target_schema.__name__}: {e}. "
-            f"Problematic string (first 500 chars): '{json_data_str[:500]}...'",
-            exc_info=False
-        )
+        logger.warning("LLM JSON Decode Error for schema %s: %s. Attempting local repair.", target_schema.__name__, e)
+        # A truncated response has no closing fence or brace: repair from the first brace to the end.
+        if first_brace != -1 and not match:
+            json_data_str = cleaned_json_str[first_brace:]
+        parsed_dict = loads_tolerant(json_data_str, report)
     except Exception as e:
-        logger.error(
-            f"Error validating LLM output against Pydantic schema {target_schema.__name__}: {e}. "
-            f"Parsed Dict (if available, first 500 chars): '{str(parsed_dict)[:500] if 'parsed_dict' in locals() else 'N/A'}...'",
-            exc_info=False
+        logger.warning(
+            "LLM output failed validation against %s: %s. Attempting partial salvage.", target_schema.__name__, describe_error(e)
         )
-    return None
+
+    validated_data = None
+    if parsed_dict is not None:
+        validated_data = validate_with_salvage(parsed_dict, target_schema, report)
+
+    if validated_data is None:
+        SALVAGE_STATS["failed"] += 1
+        # Never log the output itself: it is resume content.
+        logger.error("Could not repair or salvage LLM output for schema %s: %s.", target_schema.__name__, redact_text(json_data_str))
+        return None
+
+    SALVAGE_STATS["salvaged"] += 1
+    logger.warning(
+        "Salvaged LLM output for %s: repairs=%s, dropped=%s.",
+        target_schema.__name__, report.repairs or "none", report.dropped or "none"
+    )
+    return validated_data
 
 
 # --- Prompts and Chains ---
@@ -91,7 +136,7 @@ try:
     LITERAL_ANALYSIS_SCHEMA_JSON_STR = raw_analysis_schema_json_str.replace("{", "{{").replace("}", "}}")
 
 except Exception as e:
-    logger.error(f"Could not generate or escape JSON schema strings from Pydantic models: {e}", exc_info=True)
+    logger.error("Could not generate or escape JSON schema strings from Pydantic models: %s", e, exc_info=True)
     LITERAL_EXTRACTION_SCHEMA_JSON_STR = "{{ 'error': 'Schema for extraction not available' }}"
     LITERAL_ANALYSIS_SCHEMA_JSON_STR = "{{ 'error': 'Schema for analysis not available' }}"
 
@@ -124,6 +169,17 @@ HUMAN_EXTRACTION_TEMPLATE = """Resume Text to Process:
 
 Your Extracted JSON Output:"""
 
+# Human message template for one chunk of a long resume (chunked extraction mode)
+HUMAN_CHUNK_EXTRACTION_TEMPLATE = """The resume below is long and has been split into parts. This is part {chunk_index} of {chunk_count}.
+Extract ONLY the information present in this part, using the same JSON schema. Omit sections that do not appear in this part.
+
+Resume Text to Process (part {chunk_index} of {chunk_count}):
+```text
+{resume_text}
+```
+
+Your Extracted JSON Output:"""
+
 # System message content for Analysis
 SYSTEM_ANALYSIS_CONTENT = f"""You are an expert AI career coach and resume reviewer with a keen eye for detail and actionable advice.
 
@@ -162,6 +218,7 @@ HUMAN_ANALYSIS_TEMPLATE = """Structured Resume Data (in JSON format) for Analysi
 Your Analysis JSON Output:"""
 
 extraction_chain = None
+chunk_extraction_chain = None
 analysis_chain = None
 
 if llm:
@@ -171,61 +228,243 @@ if llm:
             ("human", HUMAN_EXTRACTION_TEMPLATE)
         ])
 
+        chunk_extraction_prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_EXTRACTION_CONTENT),
+            ("human", HUMAN_CHUNK_EXTRACTION_TEMPLATE)
+        ])
+
         analysis_prompt = ChatPromptTemplate.from_messages([
             ("system", SYSTEM_ANALYSIS_CONTENT),
             ("human", HUMAN_ANALYSIS_TEMPLATE)
         ])
         
-        extraction_chain = extraction_prompt | llm | StrOutputParser()
-        analysis_chain = analysis_prompt | llm | StrOutputParser()
+        # Chains return the model's message so its usage_metadata (token counts) can be accounted
+        extraction_chain = extraction_prompt | llm
+        chunk_extraction_chain = chunk_extraction_prompt | llm
+        analysis_chain = analysis_prompt | llm
         logger.info("LLM chains for extraction and analysis created successfully using from_messages.")
     except Exception as e:
-        logger.error(f"Error creating LLM chains: {e}", exc_info=True)
+        logger.error("Error creating LLM chains: %s", e, exc_info=True)
+
+# Cache keys include the model and prompts, so editing a prompt or schema invalidates old results
+PROMPT_FINGERPRINT = hashlib.sha256("\x00".join([
+    LLM_MODEL_NAME, str(LLM_TEMPERATURE), SYSTEM_EXTRACTION_CONTENT, HUMAN_EXTRACTION_TEMPLATE,
+    HUMAN_CHUNK_EXTRACTION_TEMPLATE, SYSTEM_ANALYSIS_CONTENT, HUMAN_ANALYSIS_TEMPLATE,
+]).encode("utf-8")).hexdigest()[:16]
 
 
-async def extract_structured_data_from_text(resume_text: str) -> Optional[schemas.ResumeExtractedData]:
+# System prompt length per stage, for the pre-call token budget estimate
+STAGE_SYSTEM_PROMPT_CHARS = {
+    "extract": len(SYSTEM_EXTRACTION_CONTENT),
+    "extract-chunk": len(SYSTEM_EXTRACTION_CONTENT),
+    "analyze": len(SYSTEM_ANALYSIS_CONTENT),
+}
+
+_output_parser = StrOutputParser()
+
+
+def _estimate_prompt_tokens(inputs: dict, stage: str) -> int:
+    prompt_chars = STAGE_SYSTEM_PROMPT_CHARS.get(stage, 0) + sum(len(str(value)) for value in inputs.values())
+    return llm_usage.estimate_tokens(prompt_chars)
+
+
+async def _ainvoke_llm(chain, inputs: dict, stage: str, reserved_tokens: Optional[int] = None) -> str:
     """
-    Asynchronously extracts structured data from resume text using the LLM.
-    Returns a Pydantic model of the extracted data or None on failure.
+    Invokes a chain once the client's daily token budget and the cross-worker Gemini
+    rate limit allow another call, and accounts the tokens the response reports.
+    The prompt's estimate is reserved against the budget first, unless the caller already
+    reserved `reserved_tokens` for this call. Raises TokenBudgetExceeded without calling
+    the LLM if the budget is spent. Like the budget, the rate limit fails open if the
+    shared state backend is unavailable.
     """
-    if not extraction_chain:
-        logger.error("LLM extraction service (chain) is not available. Cannot process request.")
-        return None
-    if not resume_text or not resume_text.strip():
-        logger.warning("Resume text is empty or whitespace only; cannot extract data.")
-        return None
+    if reserved_tokens is None:
+        reserved_tokens = await llm_usage.reserve_tokens(_estimate_prompt_tokens(inputs, stage))
+    try:
+        if LLM_RATE_LIMIT_PER_MINUTE > 0:
+            try:
+                waited = await get_state_backend().throttle(
+                    "gemini", capacity=LLM_RATE_LIMIT_BURST, refill_per_second=LLM_RATE_LIMIT_PER_MINUTE / 60
+                )
+            except Exception as e:
+                logger.warning("Shared LLM rate limit unavailable; calling the LLM without throttling: %s", e)
+                waited = 0.0
+            if waited:
+                logger.info("Waited %.2fs for the shared LLM rate limit.", waited)
+        response = await chain.ainvoke(inputs)
+    except BaseException:
+        await llm_usage.release_tokens(reserved_tokens)
+        raise
+    await llm_usage.record_call(stage, getattr(response, "usage_metadata", None), reserved_tokens)
+    return _output_parser.invoke(response)
+
+
+async def _cached_llm_result(stage: str, payload: str, schema: type[schemas.BaseModel], compute, report: SalvageReport):
+    """
+    Returns the shared cached result for (stage, payload), or runs `compute` once across
+    all workers (single-flight) and caches its result. Results salvaged from damaged
+    output (per `report`, which `compute` fills) are returned but not cached, so the next
+    request asks the LLM again instead of reusing a partial result. Falls back to
+    computing directly if the shared state backend is unavailable.
+    """
+    if LLM_CACHE_TTL_SECONDS <= 0:
+        return await compute()
 
-    logger.info(f"Attempting LLM extraction for resume text (length: {len(resume_text)}).")
+    computed = []
+
+    async def compute_serialized() -> Optional[str]:
+        result = await compute()
+        computed.append(result)
+        if result is None or report.salvaged:
+            return None
+        return result.model_dump_json()
+
+    key = f"llm:{stage}:{PROMPT_FINGERPRINT}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
     try:
-        # Asynchronously invoke the LLM chain
-        llm_response_str = await extraction_chain.ainvoke({"resume_text": resume_text})
-        
+        value, from_cache = await get_state_backend().single_flight(key, compute_serialized, LLM_CACHE_TTL_SECONDS)
+    except TokenBudgetExceeded:
+        raise
+    except Exception as e:
+        logger.error("Shared state backend error for %s cache; calling the LLM directly: %s", stage, e, exc_info=True)
+        return computed[0] if computed else await compute()
+    if from_cache:
+        logger.info("LLM %s result served from the shared cache.", stage)
+    elif computed:
+        return computed[0]
+    return schema.model_validate_json(value) if value is not None else None
+
+
+async def _invoke_extraction(
+    chain, inputs: dict, label: str, stage: str = "extract", report: Optional[SalvageReport] = None,
+    reserved_tokens: Optional[int] = None
+) -> Optional[schemas.ResumeExtractedData]:
+    """
+    Runs one extraction chain call and parses its output, recording any salvage in `report`.
+    Returns the validated data or None on failure.
+    """
+    try:
+        llm_response_str = await _ainvoke_llm(chain, inputs, stage, reserved_tokens)
+
         if not llm_response_str:
-            logger.warning("LLM returned an empty string for extraction.")
+            logger.warning("LLM returned an empty string for %s.", label)
             return None
-            
-        logger.debug(f"Raw LLM extraction response (first 500 chars): '{llm_response_str[:500]}'")
-        
+
+        logger.debug("Raw LLM %s response: %s", label, redact_text(llm_response_str))
+
         # Parse and validate the LLM's string output
-        extracted_data = _parse_llm_json_output(llm_response_str, schemas.ResumeExtractedData)
-        
-        if extracted_data:
-            logger.info("Successfully extracted and validated structured data from resume text.")
-        else:
-            logger.error("Failed to parse or validate LLM extraction output against schema.")
-        return extracted_data
-        
+        return _parse_llm_json_output(llm_response_str, schemas.ResumeExtractedData, report)
+
+    except TokenBudgetExceeded:
+        raise
     except OutputParserException as ope:
-        logger.error(f"Langchain OutputParserException during extraction: {ope}", exc_info=True)
+        # The exception text may quote the model output, i.e. resume content.
+        logger.error("Langchain OutputParserException during %s.", label)
     except Exception as e:
-        logger.error(f"Unexpected error during LLM data extraction: {e}", exc_info=True)
+        logger.error("Unexpected error during LLM %s: %s", label, e, exc_info=True)
     return None
 
 
-async def analyze_resume_with_llm(extracted_data: schemas.ResumeExtractedData) -> Optional[schemas.LLMAnalysisSchema]:
+async def _extract_chunked(resume_text: str, report: SalvageReport) -> Optional[schemas.ResumeExtractedData]:
     """
-    Asynchronously analyzes previously extracted resume data using the LLM.
-    Returns a Pydantic model of the analysis or None on failure.
+    Map-reduce extraction for long resumes: splits the text at page and section
+    boundaries, extracts the chunks concurrently and merges the partial results.
+    Chunks that fail are skipped and recorded in `report.dropped`; returns None only
+    if every chunk failed.
+    """
+    chunks = split_resume_text(resume_text, CHUNK_TARGET_CHARS)
+    logger.info("Using chunked extraction: %d chunks for resume text (length: %d).", len(chunks), len(resume_text))
+    if len(chunks) <= 1:
+        return await _invoke_extraction(extraction_chain, {"resume_text": resume_text}, "extraction", report=report)
+
+    semaphore = asyncio.Semaphore(max(1, CHUNK_MAX_CONCURRENCY))
+    chunk_reports = [SalvageReport() for _ in chunks]
+    chunk_inputs = [
+        {"resume_text": chunk, "chunk_index": index + 1, "chunk_count": len(chunks)}
+        for index, chunk in enumerate(chunks)
+    ]
+    # Reserve the whole document up front: a budget that cannot cover every chunk rejects
+    # the resume before any chunk is paid for.
+    estimates = [_estimate_prompt_tokens(inputs, "extract-chunk") for inputs in chunk_inputs]
+    reserved = await llm_usage.reserve_tokens(sum(estimates))
+    shares = estimates if reserved else [0] * len(chunks)
+
+    async def extract_chunk(index: int) -> Optional[schemas.ResumeExtractedData]:
+        async with semaphore:
+            return await _invoke_extraction(
+                chunk_extraction_chain,
+                chunk_inputs[index],
+                f"chunk {index + 1}/{len(chunks)} extraction",
+                "extract-chunk",
+                chunk_reports[index],
+                shares[index],
+            )
+
+    # Let every chunk finish before re-raising an error, so no task is left unobserved.
+    results = await asyncio.gather(*(extract_chunk(i) for i in range(len(chunks))), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    for index, (result, chunk_report) in enumerate(zip(results, chunk_reports)):
+        label = f"chunk {index + 1}/{len(chunks)}"
+        if result is None:
+            report.dropped.append(label)
+            continue
+        report.repairs.extend(f"{label}: {repair}" for repair in chunk_report.repairs)
+        report.dropped.extend(f"{label}: {path}" for path in chunk_report.dropped)
+    parts = [part for part in results if part is not None]
+    if len(parts) < len(results):
+        logger.warning("Chunked extraction: %d of %d chunks failed and were skipped.", len(results) - len(parts), len(results))
+    if not parts:
+        return None
+    return merge_extracted_data(parts)
+
+
+async def extract_structured_data_from_text(
+    resume_text: str, chunked: Optional[bool] = None, report: Optional[SalvageReport] = None
+) -> Optional[schemas.ResumeExtractedData]:
+    """
+    Asynchronously extracts structured data from resume text using the LLM.
+    Text longer than CHUNKED_EXTRACTION_THRESHOLD_CHARS is extracted in chunks unless
+    `chunked` forces one mode or the other. Repairs and dropped parts of a partial
+    result are recorded in `report`.
+    Returns a Pydantic model of the extracted data or None on failure; raises
+    TokenBudgetExceeded if the client's daily token budget is spent.
+    """
+    if report is None:
+        report = SalvageReport()
+    if not extraction_chain:
+        logger.error("LLM extraction service (chain) is not available. Cannot process request.")
+        return None
+    if not resume_text or not resume_text.strip():
+        logger.warning("Resume text is empty or whitespace only; cannot extract data.")
+        return None
+
+    if chunked is None:
+        chunked = len(resume_text) > CHUNKED_EXTRACTION_THRESHOLD_CHARS
+
+    async def extract() -> Optional[schemas.ResumeExtractedData]:
+        logger.info("Attempting LLM extraction for resume text (length: %d).", len(resume_text))
+        if chunked and chunk_extraction_chain:
+            return await _extract_chunked(resume_text, report)
+        return await _invoke_extraction(extraction_chain, {"resume_text": resume_text}, "extraction", report=report)
+
+    stage = "extract-chunked" if chunked else "extract"
+    extracted_data = await _cached_llm_result(stage, resume_text, schemas.ResumeExtractedData, extract, report)
+
+    if extracted_data:
+        logger.info("Successfully extracted and validated structured data from resume text.")
+    else:
+        logger.error("Failed to parse or validate LLM extraction output against schema.")
+    return extracted_data
+
+
+async def analyze_resume_with_llm(
+    extracted_data: schemas.ResumeExtractedData, report: Optional[SalvageReport] = None
+) -> Optional[schemas.LLMAnalysisSchema]:
+    """
+    Asynchronously analyzes previously extracted resume data using the LLM, recording
+    any salvage of its output in `report`.
+    Returns a Pydantic model of the analysis or None on failure; raises
+    TokenBudgetExceeded if the client's daily token budget is spent.
     """
     if not analysis_chain:
         logger.error("LLM analysis service (chain) is not available. Cannot process request.")
@@ -234,25 +473,36 @@ async def analyze_resume_with_llm(extracted_data: schemas.ResumeExtractedData) -
         logger.warning("Extracted resume data is None or empty; cannot perform analysis.")
         return None
 
+    if report is None:
+        report = SalvageReport()
+    structured_resume_data_json_str = extracted_data.model_dump_json(indent=2)
+    return await _cached_llm_result(
+        "analyze", structured_resume_data_json_str, schemas.LLMAnalysisSchema,
+        lambda: _analyze_structured_json(structured_resume_data_json_str, report), report
+    )
+
+
+async def _analyze_structured_json(
+    structured_resume_data_json_str: str, report: Optional[SalvageReport] = None
+) -> Optional[schemas.LLMAnalysisSchema]:
+    """
+    Runs the analysis chain on serialized structured data (the uncached path).
+    Returns a Pydantic model of the analysis or None on failure.
+    """
     logger.info("Attempting LLM analysis of structured resume data.")
     try:
-      
-        structured_resume_data_json_str = extracted_data.model_dump_json(indent=2) 
-        
-       
-        
-        llm_response_str = await analysis_chain.ainvoke({
+        llm_response_str = await _ainvoke_llm(analysis_chain, {
             "structured_resume_data_json_str": structured_resume_data_json_str
-        })
+        }, "analyze")
 
         if not llm_response_str:
             logger.warning("LLM returned an empty string for analysis.")
             return None
 
-        logger.debug(f"Raw LLM analysis response (first 500 chars): '{llm_response_str[:500]}'")
+        logger.debug("Raw LLM analysis response: %s", redact_text(llm_response_str))
 
         # Parse and validate the LLM's string output
-        analysis_data = _parse_llm_json_output(llm_response_str, schemas.LLMAnalysisSchema)
+        analysis_data = _parse_llm_json_output(llm_response_str, schemas.LLMAnalysisSchema, report)
 
         if analysis_data:
             logger.info("Successfully generated and validated LLM analysis of resume data.")
@@ -260,8 +510,11 @@ async def analyze_resume_with_llm(extracted_data: schemas.ResumeExtractedData) -
             logger.error("Failed to parse or validate LLM analysis output against schema.")
         return analysis_data
 
+    except TokenBudgetExceeded:
+        raise
     except OutputParserException as ope:
-        logger.error(f"Langchain OutputParserException during analysis: {ope}", exc_info=True)
+        # The exception text may quote the model output, i.e. resume content.
+        logger.error("Langchain OutputParserException during analysis.")
     except Exception as e:
-        logger.error(f"Unexpected error during LLM resume analysis: {e}", exc_info=True)
+        logger.error("Unexpected error during LLM resume analysis: %s", e, exc_info=True)
     return None
@@ -0,0 +1,361 @@
+"""
+LLM token accounting and per-client daily token budgets.
+
+Every LLM call records the input and output tokens the model reports (usage_metadata)
+under its stage ("extract", "extract-chunk", "analyze"):
+  - in the current `usage_scope`, so the upload endpoint can store them on the Resume row;
+  - in per-client daily counters in the shared state backend, so budgets and the usage
+    endpoint see the calls of every worker;
+  - in USAGE_STATS, served at /metrics/llm-usage.
+
+Clients are identified by their API key (X-API-Key header), which LLM_API_KEYS maps to
+a client ID. Once budgets or admin clients are configured, requests without a known key
+are rejected; otherwise they count as "anonymous". Before each call an
+estimate of the prompt is reserved atomically on the client's counter for today (UTC);
+if that takes it over the budget the reservation is returned, TokenBudgetExceeded is
+raised and the LLM is not called. Once the call completes, the reservation is settled
+against the tokens the model reports. Cached results cost no tokens and are served even
+when the budget is spent.
+"""
+import hmac
+import os
+import re
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from fastapi import Header, HTTPException, status
+
+from .shared_state import get_state_backend
+
+logger = logging.getLogger(__name__)
+
+
+CLIENT_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:@-]{1,100}$")
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = {}
+    for item in spec.split(","):
+        client_id, sep, budget = item.strip().rpartition("=")
+        if sep and client_id:
+            budgets[client_id] = int(budget)
+    return budgets
+
+
+def _parse_api_keys(spec: str) -> Dict[str, str]:
+    clients_by_key = {}
+    for item in spec.split(","):
+        client_id, sep, key = item.strip().partition("=")
+        if not sep or not key:
+            continue
+        if not CLIENT_ID_PATTERN.match(client_id):
+            raise ValueError(f"Invalid client ID '{client_id}' in LLM_API_KEYS.")
+        clients_by_key[key] = client_id
+    return clients_by_key
+
+
+# Tokens per client per UTC day (0 = unlimited); LLM_CLIENT_TOKEN_BUDGETS overrides it per client,
+# e.g. "priority=0,batch-import=500000"
+LLM_DAILY_TOKEN_BUDGET = int(os.getenv("LLM_DAILY_TOKEN_BUDGET", "0"))
+LLM_CLIENT_TOKEN_BUDGETS = _parse_budgets(os.getenv("LLM_CLIENT_TOKEN_BUDGETS", ""))
+# Days the per-client daily counters are kept in the shared state backend
+LLM_USAGE_RETENTION_DAYS = int(os.getenv("LLM_USAGE_RETENTION_DAYS", "35"))
+# Clients allowed to read the usage and jobs of other clients, e.g. "ops-dashboard,billing"
+LLM_USAGE_ADMIN_CLIENTS = {c.strip() for c in os.getenv("LLM_USAGE_ADMIN_CLIENTS", "").split(",") if c.strip()}
+# API keys and the clients they belong to, e.g. "acme=k_3f9a...,ops-dashboard=k_81c2..."
+LLM_API_KEYS = _parse_api_keys(os.getenv("LLM_API_KEYS", ""))
+
+DEFAULT_CLIENT_ID = "anonymous"
+BACKFILL_CLIENT_ID = "backfill"
+STAGES = ("extract", "extract-chunk", "analyze")
+# Rough characters per token, used only to estimate a prompt before it is sent
+CHARS_PER_TOKEN = 4
+
+# Process-wide counters since start-up
+USAGE_STATS: Dict[str, Any] = {
+    "calls": 0,
+    "calls_without_usage": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "budget_rejections": 0,
+    "stages": {stage: {"calls": 0, "input_tokens": 0, "output_tokens": 0} for stage in STAGES},
+}
+
+
+class TokenBudgetExceeded(Exception):
+    """The client's daily token budget does not allow another LLM call today."""
+
+    def __init__(self, client_id: str, used: int, budget: int, requested: int = 0):
+        self.client_id = client_id
+        self.used = used
+        self.budget = budget
+        self.requested = requested
+        super().__init__(
+            f"Daily LLM token budget of client '{client_id}' exhausted: {used} of {budget} tokens used today"
+            + (f", about {requested} more needed." if requested else ".")
+        )
+
+    @property
+    def retry_after_seconds(self) -> int:
+        """Seconds until the budget resets at the next UTC midnight."""
+        now = datetime.now(timezone.utc)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+        return max(1, int((tomorrow - now).total_seconds()))
+
+
+@dataclass
+class LLMUsage:
+    """Token usage of one resume (or any unit of work), per stage."""
+    stages: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def add(self, stage: str, input_tokens: int, output_tokens: int) -> None:
+        counts = self.stages.setdefault(stage, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+        counts["calls"] += 1
+        counts["input_tokens"] += input_tokens
+        counts["output_tokens"] += output_tokens
+
+    def as_dict(self, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        The JSON stored on Resume.llm_usage, or None if no LLM call was made. Stages from
+        `previous` (an earlier llm_usage value) are kept unless re-run.
+        """
+        stages = dict((previous or {}).get("stages") or {})
+        stages.update(self.stages)
+        if not stages:
+            return None
+        input_tokens = sum(s.get("input_tokens", 0) for s in stages.values())
+        output_tokens = sum(s.get("output_tokens", 0) for s in stages.values())
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "stages": stages,
+        }
+
+
+@dataclass
+class _Scope:
+    client_id: str
+    usage: LLMUsage
+
+
+_current_scope: ContextVar[Optional[_Scope]] = ContextVar("llm_usage_scope", default=None)
+
+
+@contextmanager
+def usage_scope(client_id: str) -> Iterator[LLMUsage]:
+    """Attributes the LLM calls made inside the block (including concurrent tasks it starts) to `client_id`."""
+    scope = _Scope(client_id, LLMUsage())
+    token = _current_scope.set(scope)
+    try:
+        yield scope.usage
+    finally:
+        _current_scope.reset(token)
+
+
+def current_client_id() -> str:
+    scope = _current_scope.get()
+    return scope.client_id if scope else DEFAULT_CLIENT_ID
+
+
+def normalize_client_id(value: Optional[str]) -> str:
+    """Validates a client ID from a request; raises ValueError if it is not usable as a counter key."""
+    if value is None or not value.strip():
+        return DEFAULT_CLIENT_ID
+    value = value.strip()
+    if not CLIENT_ID_PATTERN.match(value):
+        raise ValueError("Client ID must be 1-100 characters of letters, digits and . _ : @ -")
+    return value
+
+
+def access_control_enabled() -> bool:
+    """Budgets and admin reads are only meaningful once clients cannot pick their own ID."""
+    return bool(LLM_DAILY_TOKEN_BUDGET > 0 or LLM_CLIENT_TOKEN_BUDGETS or LLM_USAGE_ADMIN_CLIENTS or LLM_API_KEYS)
+
+
+def client_for_api_key(api_key: Optional[str]) -> Optional[str]:
+    """The client an API key belongs to, or None if the key is unknown."""
+    if not api_key:
+        return None
+    client_id = None
+    for key, owner in LLM_API_KEYS.items():
+        # Compare every key in constant time so the response time does not reveal a prefix.
+        if hmac.compare_digest(key.encode(), api_key.encode()):
+            client_id = owner
+    return client_id
+
+
+# FastAPI dependency: the client an API request is accounted to, resolved from its API key
+def get_client_id(
+    x_api_key: Optional[str] = Header(None, alias="X-API-Key", description="API key the LLM tokens are accounted to.")
+) -> str:
+    if not access_control_enabled():
+        return DEFAULT_CLIENT_ID
+    client_id = client_for_api_key(x_api_key)
+    if client_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="A valid X-API-Key header is required.",
+            headers={"WWW-Authenticate": "X-API-Key"},
+        )
+    return client_id
+
+
+def can_read_client(caller_client_id: str, client_id: str) -> bool:
+    """Clients may read their own usage and jobs; only LLM_USAGE_ADMIN_CLIENTS may read anyone's."""
+    return client_id == caller_client_id or caller_client_id in LLM_USAGE_ADMIN_CLIENTS
+
+
+def budget_for(client_id: str) -> int:
+    return LLM_CLIENT_TOKEN_BUDGETS.get(client_id, LLM_DAILY_TOKEN_BUDGET)
+
+
+def estimate_tokens(text_length: int) -> int:
+    return text_length // CHARS_PER_TOKEN
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _counter_key(day: date, client_id: str, name: str) -> str:
+    return f"usage:{day.isoformat()}:{client_id}:{name}"
+
+
+async def _read_counter(key: str) -> int:
+    value = await get_state_backend().get(key)
+    return int(value) if value else 0
+
+
+def _ttl_seconds() -> int:
+    return LLM_USAGE_RETENTION_DAYS * 86400
+
+
+async def check_budget(estimated_tokens: int = 0, client_id: Optional[str] = None) -> None:
+    """
+    Raises TokenBudgetExceeded if the client's tokens so far today plus `estimated_tokens`
+    exceed its budget. A read-only pre-check (e.g. before text extraction): LLM calls
+    use reserve_tokens. Fails open if the shared state backend is unavailable.
+    """
+    client_id = client_id or current_client_id()
+    budget = budget_for(client_id)
+    if budget <= 0:
+        return
+    try:
+        used = await _read_counter(_counter_key(_today(), client_id, "total_tokens"))
+    except Exception as e:
+        logger.warning("Could not read token usage of client %s; allowing the call: %s", client_id, e)
+        return
+    if used >= budget or used + estimated_tokens > budget:
+        USAGE_STATS["budget_rejections"] += 1
+        logger.warning("Token budget exhausted for client %s: %d used + ~%d requested > %d.", client_id, used, estimated_tokens, budget)
+        raise TokenBudgetExceeded(client_id, used, budget, estimated_tokens)
+
+
+async def reserve_tokens(estimated_tokens: int, client_id: Optional[str] = None) -> int:
+    """
+    Atomically adds `estimated_tokens` to the client's tokens today and returns the amount
+    reserved, to be settled by record_call or returned by release_tokens. Concurrent
+    calls therefore see each other's reservations and cannot overshoot the budget
+    together. Raises TokenBudgetExceeded (reserving nothing) if the budget does not
+    allow it. Reserves nothing for unlimited clients and fails open if the shared state
+    backend is unavailable.
+    """
+    client_id = client_id or current_client_id()
+    budget = budget_for(client_id)
+    if budget <= 0:
+        return 0
+    key = _counter_key(_today(), client_id, "total_tokens")
+    backend = get_state_backend()
+    try:
+        total = await backend.incr(key, estimated_tokens, _ttl_seconds())
+    except Exception as e:
+        logger.warning("Could not reserve tokens for client %s; allowing the call: %s", client_id, e)
+        return 0
+    used = total - estimated_tokens
+    if used >= budget or total > budget:
+        await release_tokens(estimated_tokens, client_id)
+        USAGE_STATS["budget_rejections"] += 1
+        logger.warning("Token budget exhausted for client %s: %d used + ~%d requested > %d.", client_id, used, estimated_tokens, budget)
+        raise TokenBudgetExceeded(client_id, used, budget, estimated_tokens)
+    return estimated_tokens
+
+
+async def release_tokens(reserved_tokens: int, client_id: Optional[str] = None) -> None:
+    """Returns a reservation whose LLM call was never made or failed."""
+    if not reserved_tokens:
+        return
+    client_id = client_id or current_client_id()
+    try:
+        await get_state_backend().incr(_counter_key(_today(), client_id, "total_tokens"), -reserved_tokens, _ttl_seconds())
+    except Exception as e:
+        logger.warning("Could not release %d reserved tokens of client %s: %s", reserved_tokens, client_id, e)
+
+
+async def record_call(stage: str, usage_metadata: Optional[Dict[str, Any]], reserved_tokens: int = 0) -> None:
+    """
+    Accounts one completed LLM call to the current scope, the client's daily counters and
+    USAGE_STATS, settling the `reserved_tokens` taken for it by reserve_tokens.
+    """
+    input_tokens = int((usage_metadata or {}).get("input_tokens") or 0)
+    output_tokens = int((usage_metadata or {}).get("output_tokens") or 0)
+    if not usage_metadata:
+        USAGE_STATS["calls_without_usage"] += 1
+        logger.debug("LLM %s response carried no usage metadata.", stage)
+
+    USAGE_STATS["calls"] += 1
+    USAGE_STATS["input_tokens"] += input_tokens
+    USAGE_STATS["output_tokens"] += output_tokens
+    stage_stats = USAGE_STATS["stages"].setdefault(stage, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+    stage_stats["calls"] += 1
+    stage_stats["input_tokens"] += input_tokens
+    stage_stats["output_tokens"] += output_tokens
+
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.usage.add(stage, input_tokens, output_tokens)
+
+    client_id = current_client_id()
+    day = _today()
+    ttl = _ttl_seconds()
+    backend = get_state_backend()
+    try:
+        await backend.incr(_counter_key(day, client_id, f"{stage}:calls"), 1, ttl)
+        for name, amount in (
+            ("total_tokens", input_tokens + output_tokens - reserved_tokens),
+            (f"{stage}:input_tokens", input_tokens),
+            (f"{stage}:output_tokens", output_tokens),
+        ):
+            if amount:
+                await backend.incr(_counter_key(day, client_id, name), amount, ttl)
+    except Exception as e:
+        logger.warning("Could not record token usage of client %s: %s", client_id, e)
+
+
+async def get_daily_usage(client_id: str, day: Optional[date] = None) -> Dict[str, Any]:
+    """A client's token usage on one UTC day (today by default), with its budget."""
+    day = day or _today()
+    stages = {}
+    for stage in STAGES:
+        counts = {
+            name: await _read_counter(_counter_key(day, client_id, f"{stage}:{name}"))
+            for name in ("calls", "input_tokens", "output_tokens")
+        }
+        if counts["calls"]:
+            stages[stage] = counts
+    used = await _read_counter(_counter_key(day, client_id, "total_tokens"))
+    budget = budget_for(client_id)
+    return {
+        "client_id": client_id,
+        "day": day,
+        "input_tokens": sum(s["input_tokens"] for s in stages.values()),
+        "output_tokens": sum(s["output_tokens"] for s in stages.values()),
+        "total_tokens": used,
+        "budget_tokens": budget or None,
+        "remaining_tokens": max(0, budget - used) if budget > 0 else None,
+        "stages": stages,
+    }
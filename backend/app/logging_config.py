@@ -0,0 +1,258 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for one JSON object per line, "text" for the classic human-readable format
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Hand records to a background thread instead of writing them on the event loop
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+# Records beyond this many waiting to be written are dropped rather than blocking requests
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of requests whose INFO/DEBUG lines are kept, per route template ("/health=0.01,/=0.01")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "/=0.01,/health=0.01,/metrics/db-pool=0.01,/metrics/llm-parsing=0.01,/metrics/llm-usage=0.01,/metrics/logging=0.01")
+LOG_DEFAULT_SAMPLE_RATE = float(os.getenv("LOG_DEFAULT_SAMPLE_RATE", "1.0"))
+# Maximum INFO/DEBUG lines per second per route (0 disables); warnings and errors are never dropped
+LOG_ROUTE_RATE_LIMIT = float(os.getenv("LOG_ROUTE_RATE_LIMIT", "50"))
+# Mask e-mail addresses and phone numbers in log messages
+LOG_REDACT_PII = os.getenv("LOG_REDACT_PII", "true").lower() in ("1", "true", "yes")
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# The ASGI scope of the request being handled, so records can be attributed to its route
+_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("log_request_scope", default=None)
+
+_STANDARD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"(?<!\w)\+?\d[\d ().-]{7,}\d(?!\w)")
+
+LOG_STATS = {"dropped_queue_full": 0, "dropped_sampled": 0, "dropped_rate_limited": 0}
+
+_configured = False
+_listener: Optional[QueueListener] = None
+_queue: Optional[queue.Queue] = None
+
+
+def redact_text(text: Optional[str]) -> str:
+    """Placeholder for resume content in log lines: its size, never the content itself."""
+    return f"<redacted {len(text or '')} chars>"
+
+
+def _mask_phone(match: re.Match) -> str:
+    # Dates and short numbers match the pattern too; phone numbers have at least 10 digits.
+    return "<phone>" if sum(c.isdigit() for c in match.group()) >= 10 else match.group()
+
+
+def redact_pii(message: str) -> str:
+    return _PHONE_RE.sub(_mask_phone, _EMAIL_RE.sub("<email>", message))
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        route, sep, rate = item.strip().rpartition("=")
+        if sep and route:
+            rates[route] = float(rate)
+    return rates
+
+
+def current_route() -> Optional[str]:
+    """Route template of the current request ("/api/v1/resumes/{resume_id}"), if any."""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        # Unmatched paths share one key so random URLs cannot grow the per-route state.
+        return "<unmatched>"
+    # The matched route may carry only its path relative to an included router's prefix;
+    # take the prefix from the request path so "/{resume_id}" becomes "/api/v1/resumes/{resume_id}".
+    segments = scope["path"].split("/")
+    suffix = template.split("/")[1:]
+    return "/".join(segments[:len(segments) - len(suffix)] + suffix)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra={...}` fields are included as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if LOG_REDACT_PII:
+            message = redact_pii(message)
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": message,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RedactingTextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        return redact_pii(text) if LOG_REDACT_PII else text
+
+
+class RouteSamplingFilter(logging.Filter):
+    """
+    Per-route sampling and rate limiting of INFO/DEBUG records emitted while handling a
+    request. The sampling decision is made once per request, so a request's lines are
+    kept or dropped together; WARNING and above always pass.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], default_rate: float, rate_limit: float):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.default_rate = default_rate
+        self.rate_limit = rate_limit
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _take(self, route: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(route, (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - updated) * self.rate_limit)
+            allowed = tokens >= 1
+            self._buckets[route] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = _request_scope.get()
+        if scope is None:
+            return True
+        route = current_route()
+        record.route = route
+        if record.levelno >= logging.WARNING:
+            return True
+
+        sampled = scope.get("log.sampled")
+        if sampled is None:
+            sampled = random.random() < self.sample_rates.get(route, self.default_rate)
+            scope["log.sampled"] = sampled
+        if not sampled:
+            LOG_STATS["dropped_sampled"] += 1
+            return False
+        if self.rate_limit > 0 and not self._take(route):
+            LOG_STATS["dropped_rate_limited"] += 1
+            return False
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records without blocking; JSON formatting and I/O happen on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge `msg % args` now: the arguments may be mutable objects that change before the
+        # listener formats the record. The queue is in-process, so exc_info needs no pickling.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_STATS["dropped_queue_full"] += 1
+
+
+class RequestLoggingMiddleware:
+    """
+    ASGI middleware that exposes the request scope to the log filter and writes one
+    structured line per request (method, route, status, duration).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.requests")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(scope)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "%s %s %s", scope["method"], scope["path"], status_code,
+                    extra={"status": status_code, "duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+                )
+            _request_scope.reset(token)
+
+
+def configure_logging() -> None:
+    """Replaces basicConfig: root logs go through the sampling filter to a queue drained by a background thread."""
+    global _configured, _listener, _queue
+    if _configured:
+        return
+    _configured = True
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else RedactingTextFormatter(TEXT_FORMAT))
+    sampling = RouteSamplingFilter(_parse_sample_rates(LOG_SAMPLE_RATES), LOG_DEFAULT_SAMPLE_RATE, LOG_ROUTE_RATE_LIMIT)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(LOG_LEVEL)
+
+    if LOG_ASYNC:
+        _queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(_queue)
+        queue_handler.addFilter(sampling)
+        root.addHandler(queue_handler)
+        _listener = QueueListener(_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        stream_handler.addFilter(sampling)
+        root.addHandler(stream_handler)
+
+
+def stop_logging() -> None:
+    """Flushes queued records; called at interpreter exit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logging_metrics() -> Dict[str, Any]:
+    return {
+        "async": LOG_ASYNC,
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "queue_capacity": LOG_QUEUE_SIZE,
+        **LOG_STATS,
+    }
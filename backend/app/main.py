@@ -5,9 +5,15 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.endpoints import resume as resume_v1_router
+from app.api.v1.endpoints import analytics as analytics_v1_router
+from app.api.v1.endpoints import usage as usage_v1_router
+from app.database import get_pool_metrics
+from app.llm_services import SALVAGE_STATS
+from app.llm_usage import USAGE_STATS
+from app.logging_config import RequestLoggingMiddleware, configure_logging, get_logging_metrics
 
-# Configure basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Structured logs, written by a background thread and sampled per route (see app/logging_config.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -33,6 +39,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the request line covers the full handling time of every request
+app.add_middleware(RequestLoggingMiddleware)
+
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -42,7 +51,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         field = " -> ".join(str(loc) for loc in error['loc'])
         error_details.append({"location": field, "message": error['msg'], "type": error['type']})
     
-    logger.warning(f"Request validation error: {error_details} for request: {request.method} {request.url}")
+    logger.warning("Request validation error: %s for request: %s %s", error_details, request.method, request.url.path)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": "Validation Error", "errors": error_details},
@@ -50,14 +59,31 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 
 app.include_router(resume_v1_router.router, prefix="/api/v1/resumes", tags=["Resumes API V1"])
+app.include_router(analytics_v1_router.router, prefix="/api/v1/analytics", tags=["Analytics API V1"])
+app.include_router(usage_v1_router.router, prefix="/api/v1/usage", tags=["Usage API V1"])
 
 @app.get("/", tags=["Root"], summary="Root endpoint for API health check or welcome message")
 async def read_root():
-    logger.info("Root endpoint accessed.")
+    logger.debug("Root endpoint accessed.")
     return {"message": "Welcome to the DeepKlarity Resume Analyzer API. Visit /docs for API documentation."}
 
 @app.get("/health", tags=["Health Check"], summary="Performs a basic health check of the API")
 async def health_check():
-    logger.info("Health check endpoint accessed.")
+    logger.debug("Health check endpoint accessed.")
     return {"status": "ok", "message": "API is running"}
 
+@app.get("/metrics/db-pool", tags=["Health Check"], summary="Database connection pool gauges and checkout wait-time histogram")
+async def db_pool_metrics():
+    return get_pool_metrics()
+
+@app.get("/metrics/llm-parsing", tags=["Health Check"], summary="Counts of LLM outputs parsed as-is, salvaged locally, or unusable")
+async def llm_parsing_metrics():
+    return SALVAGE_STATS
+
+@app.get("/metrics/llm-usage", tags=["Health Check"], summary="LLM calls, input/output tokens per stage and token budget rejections since start-up")
+async def llm_usage_metrics():
+    return USAGE_STATS
+
+@app.get("/metrics/logging", tags=["Health Check"], summary="Log queue depth and counts of log lines dropped by sampling, rate limits or a full queue")
+async def logging_metrics():
+    return get_logging_metrics()
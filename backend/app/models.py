@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, Text, Float, Index, cast, literal_column
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.sql import func
 from .database import Base
 
+# Binary JSONB on Postgres so sections can be indexed and queried; generic JSON elsewhere (e.g. SQLite)
+JSONVariant = JSON().with_variant(postgresql.JSONB(), "postgresql")
+
 class Resume(Base):
     __tablename__ = "resumes"
 
@@ -11,16 +15,58 @@ class Resume(Base):
     
     raw_text = Column(Text, nullable=True)
     
-    contact_info = Column(JSON, nullable=True)
+    contact_info = Column(JSONVariant, nullable=True)
     summary = Column(Text, nullable=True)
-    work_experience = Column(JSON, nullable=True)
-    education = Column(JSON, nullable=True)
-    skills = Column(JSON, nullable=True)
-    projects = Column(JSON, nullable=True)
-    certifications = Column(JSON, nullable=True)
-    awards = Column(JSON, nullable=True)
+    work_experience = Column(JSONVariant, nullable=True)
+    education = Column(JSONVariant, nullable=True)
+    skills = Column(JSONVariant, nullable=True)
+    projects = Column(JSONVariant, nullable=True)
+    certifications = Column(JSONVariant, nullable=True)
+    awards = Column(JSONVariant, nullable=True)
     
-    llm_analysis = Column(JSON, nullable=True)
+    llm_analysis = Column(JSONVariant, nullable=True)
+
+    # Client (API key) the upload was accounted to, and the LLM tokens it used per stage
+    client_id = Column(String(100), nullable=True, index=True)
+    llm_usage = Column(JSONVariant, nullable=True)
+    # Repairs and dropped parts per stage whose LLM output was only partly usable; null if all parsed cleanly
+    llm_salvage = Column(JSONVariant, nullable=True)
+
+    def __repr__(self):
+        return f"<Resume(id={self.id}, filename='{self.filename}')>"
+
+
+# Precomputed analytics counters, maintained by app.analytics as resumes are inserted.
+# Each counter exists once per day and once per calendar month (`granularity`), so a
+# window query reads at most a few dozen buckets per term however many resumes exist.
+class AnalyticsRollup(Base):
+    __tablename__ = "analytics_rollups"
+
+    dimension = Column(String(32), primary_key=True)    # e.g. "skill", "potential_role", "rating"
+    granularity = Column(String(8), primary_key=True)   # "day" or "month"
+    bucket_start = Column(Date, primary_key=True)
+    key = Column(String(200), primary_key=True)         # normalized term
+    label = Column(String(200), nullable=False)         # term as first seen, for display
+    count = Column(Integer, nullable=False, default=0)
 
     def __repr__(self):
-        return f"<Resume(id={self.id}, filename='{self.filename}')>"
\ No newline at end of file
+        return f"<AnalyticsRollup({self.dimension}/{self.granularity}/{self.bucket_start}: {self.key}={self.count})>"
+
+
+# Postgres expressions for hot JSON keys. crud filters must use these exact expressions
+# so the planner can match them to the expression indexes below.
+PG_RESUME_RATING = cast(Resume.llm_analysis.op("->>")(literal_column("'resume_rating'")), Float)
+PG_CONTACT_EMAIL = Resume.contact_info.op("->>")(literal_column("'email'"))
+
+# Postgres-only indexes (created by migration 5b7e2c9d4a1f); other dialects skip them.
+Index("ix_resumes_contact_info_gin", Resume.contact_info, postgresql_using="gin").ddl_if(dialect="postgresql")
+Index(
+    "ix_resumes_skills_gin", Resume.skills,
+    postgresql_using="gin", postgresql_ops={"skills": "jsonb_path_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_resumes_llm_analysis_gin", Resume.llm_analysis,
+    postgresql_using="gin", postgresql_ops={"llm_analysis": "jsonb_path_ops"},
+).ddl_if(dialect="postgresql")
+Index("ix_resumes_llm_analysis_rating", PG_RESUME_RATING).ddl_if(dialect="postgresql")
+Index("ix_resumes_contact_info_email", PG_CONTACT_EMAIL).ddl_if(dialect="postgresql")
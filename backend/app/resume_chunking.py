@@ -0,0 +1,189 @@
+import re
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import schemas
+from .resume_parser import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+# Lines that look like a resume/CV section heading, e.g. "EXPERIENCE", "Publications:", "2. Education"
+SECTION_HEADINGS = (
+    "summary", "profile", "objective", "experience", "work experience", "professional experience",
+    "employment", "employment history", "education", "skills", "technical skills", "projects",
+    "publications", "selected publications", "research", "research experience", "teaching",
+    "teaching experience", "certifications", "certificates", "awards", "honors", "honours",
+    "awards and honors", "grants", "funding", "presentations", "talks", "conferences",
+    "patents", "languages", "volunteering", "volunteer experience", "leadership", "activities",
+    "open source", "open source contributions", "references", "service", "professional service",
+)
+_HEADING_RE = re.compile(
+    r"^\s*(?:\d+[.)]\s*)?(" + "|".join(re.escape(h) for h in SECTION_HEADINGS) + r")\s*:?\s*$",
+    re.IGNORECASE,
+)
+
+
+def _is_section_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    if _HEADING_RE.match(stripped):
+        return True
+    # Short ALL-CAPS lines without sentence punctuation are almost always headings.
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters) and not stripped.endswith((".", ","))
+
+
+def _split_segments(text: str) -> List[str]:
+    """Splits text at page breaks and before section headings, keeping every character."""
+    segments: List[str] = []
+    for page in text.split(PAGE_BREAK):
+        current: List[str] = []
+        for line in page.splitlines(keepends=True):
+            if current and _is_section_heading(line):
+                segments.append("".join(current))
+                current = []
+            current.append(line)
+        if current:
+            segments.append("".join(current))
+    return [s for s in segments if s.strip()]
+
+
+def _split_oversized(segment: str, max_chars: int) -> List[str]:
+    """Breaks a segment larger than max_chars at paragraph, then line, boundaries."""
+    pieces: List[str] = []
+    current = ""
+    for part in re.split(r"(?<=\n)\s*\n", segment):
+        units = [part] if len(part) <= max_chars else part.splitlines(keepends=True)
+        for unit in units:
+            while len(unit) > max_chars:  # a single enormous line
+                pieces.append(unit[:max_chars])
+                unit = unit[max_chars:]
+            if current and len(current) + len(unit) > max_chars:
+                pieces.append(current)
+                current = ""
+            current += unit
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def split_resume_text(text: str, target_chars: int) -> List[str]:
+    """
+    Splits long resume text into chunks of at most `target_chars`, cutting at page
+    breaks and section headings where possible. Adjacent small sections are packed
+    together so each chunk carries enough context for the LLM.
+    """
+    chunks: List[str] = []
+    current = ""
+    for segment in _split_segments(text):
+        for piece in ([segment] if len(segment) <= target_chars else _split_oversized(segment, target_chars)):
+            if current and len(current) + len(piece) > target_chars:
+                chunks.append(current.strip())
+                current = ""
+            current += piece if piece.endswith("\n") else piece + "\n"
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+# --- Deterministic merge of per-chunk extraction results ---
+
+def _norm(value: Any) -> str:
+    return re.sub(r"\W+", " ", str(value or "")).strip().lower()
+
+
+def _union(first: List[Any], second: List[Any], key: Callable[[Any], Any] = _norm) -> List[Any]:
+    seen = {key(item) for item in first}
+    merged = list(first)
+    for item in second:
+        k = key(item)
+        if k not in seen:
+            seen.add(k)
+            merged.append(item)
+    return merged
+
+
+def _merge_items(existing: Dict[str, Any], incoming: Dict[str, Any]) -> Dict[str, Any]:
+    """Fills gaps in `existing` from `incoming` and unions list fields, preserving order."""
+    merged = dict(existing)
+    for field, value in incoming.items():
+        if isinstance(value, list):
+            merged[field] = _union(merged.get(field) or [], value)
+        elif merged.get(field) in (None, "") and value not in (None, ""):
+            merged[field] = value
+    return merged
+
+
+def _same_entry(key: Tuple[str, ...], other: Tuple[str, ...], relaxed: Tuple[bool, ...]) -> bool:
+    return all(a == b or (loose and (not a or not b)) for a, b, loose in zip(key, other, relaxed))
+
+
+def _dedupe(items: Iterable[Dict[str, Any]], key_fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    relaxed = tuple(f in RELAXED_KEY_FIELDS for f in key_fields)
+    merged: List[Dict[str, Any]] = []
+    keys: List[Optional[Tuple[str, ...]]] = []
+    for item in items:
+        key = tuple(_norm(item.get(f)) for f in key_fields)
+        if not any(key):
+            # Nothing to identify the item by; keep it as-is.
+            merged.append(item)
+            keys.append(None)
+            continue
+        for i, existing in enumerate(keys):
+            if existing is not None and _same_entry(existing, key, relaxed):
+                merged[i] = _merge_items(merged[i], item)
+                keys[i] = tuple(_norm(merged[i].get(f)) for f in key_fields)
+                break
+        else:
+            merged.append(item)
+            keys.append(key)
+    return merged
+
+
+# Identity of list items when the same entry is extracted from two overlapping chunks
+LIST_SECTION_KEYS = {
+    "work_experience": ("company", "role", "start_date"),
+    "education": ("institution", "degree"),
+    "projects": ("name",),
+    "certifications": ("name", "issuing_organization"),
+    "awards": ("name", "date"),
+}
+# Key fields that one half of an entry split across chunks may lack; they match when either side is empty
+RELAXED_KEY_FIELDS = {"start_date", "date"}
+
+
+def merge_extracted_data(parts: List[schemas.ResumeExtractedData]) -> schemas.ResumeExtractedData:
+    """
+    Merges per-chunk extraction results in chunk order. Scalars take the first
+    non-empty value; list sections are concatenated and de-duplicated by their
+    identifying fields, with duplicates merged rather than dropped. Halves of an entry
+    split across chunks merge even when only one of them has its start date.
+    """
+    contact_info: Dict[str, Any] = {}
+    summary: Optional[str] = None
+    sections: Dict[str, List[Dict[str, Any]]] = {name: [] for name in LIST_SECTION_KEYS}
+    skills: Dict[str, List[Any]] = {"technical": [], "soft": [], "tools": [], "languages": []}
+    has_skills = False
+
+    for part in parts:
+        if part.contact_info:
+            contact_info = _merge_items(contact_info, part.contact_info.model_dump(exclude_none=True))
+        if not summary and part.summary:
+            summary = part.summary
+        for name in LIST_SECTION_KEYS:
+            sections[name].extend(item.model_dump(exclude_none=True) for item in getattr(part, name))
+        if part.skills:
+            has_skills = True
+            part_skills = part.skills.model_dump(exclude_none=True)
+            skills["technical"] = _union(skills["technical"], part_skills["technical"], key=lambda s: _norm(s.get("name")))
+            skills["tools"] = _union(skills["tools"], part_skills["tools"], key=lambda s: _norm(s.get("name")))
+            skills["soft"] = _union(skills["soft"], part_skills["soft"])
+            skills["languages"] = _union(skills["languages"], part_skills["languages"], key=lambda d: tuple(sorted(d.items())))
+
+    return schemas.ResumeExtractedData.model_validate({
+        "contact_info": contact_info or None,
+        "summary": summary,
+        **{name: _dedupe(items, LIST_SECTION_KEYS[name]) for name, items in sections.items()},
+        "skills": skills if has_skills else None,
+    })
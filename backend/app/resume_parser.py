@@ -1,26 +1,183 @@
 import pypdfium2 as pdfium
 import docx 
 import io
+import os
 import logging 
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
 
 logger = logging.getLogger(__name__)
 
-# Extract text from a PDF file
+# Form feed between PDF pages so later stages (e.g. chunked extraction) can find page boundaries
+PAGE_BREAK = "\f"
+
+# OCR fallback for PDF pages without a text layer (needs pytesseract, Pillow and the tesseract binary)
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))
+OCR_RENDER_DPI = int(os.getenv("OCR_RENDER_DPI", "200"))
+OCR_PAGE_TIMEOUT_SECONDS = float(os.getenv("OCR_PAGE_TIMEOUT_SECONDS", "20"))
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+
+_ocr_executor: Optional[ProcessPoolExecutor] = None
+_ocr_lock = threading.Lock()
+# Pages submitted to the OCR pool by any upload and not finished yet
+_ocr_backlog = 0
+_ocr_available: Optional[bool] = None
+
+
+def ocr_available() -> bool:
+    """True if OCR is enabled and a working tesseract install was found (checked once)."""
+    global _ocr_available
+    if _ocr_available is None:
+        _ocr_available = False
+        if not OCR_ENABLED:
+            pass
+        elif pytesseract is None:
+            logger.warning("OCR fallback disabled: the 'pytesseract' package is not installed.")
+        else:
+            try:
+                logger.info("OCR fallback enabled with Tesseract %s.", pytesseract.get_tesseract_version())
+                _ocr_available = True
+            except Exception as e:
+                logger.warning("OCR fallback disabled: Tesseract is not available (%s).", e)
+    return _ocr_available
+
+
+def _get_ocr_executor() -> ProcessPoolExecutor:
+    global _ocr_executor
+    with _ocr_lock:
+        if _ocr_executor is None:
+            # spawn, not fork: the server process has event-loop and pool threads that must not be forked.
+            _ocr_executor = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS, mp_context=get_context("spawn"))
+        return _ocr_executor
+
+
+def _discard_ocr_executor(executor: ProcessPoolExecutor) -> None:
+    """Shuts down a crashed pool so the next document gets a fresh one."""
+    global _ocr_executor
+    with _ocr_lock:
+        if _ocr_executor is executor:
+            _ocr_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _page_done(future) -> None:
+    global _ocr_backlog
+    with _ocr_lock:
+        _ocr_backlog -= 1
+
+
+# Copy single pages into their own PDFs, so each OCR task only ships the page it renders
+def _single_page_pdfs(file_content: bytes, page_indexes: List[int]) -> Dict[int, bytes]:
+    pages: Dict[int, bytes] = {}
+    pdf = pdfium.PdfDocument(file_content)
+    try:
+        for page_index in page_indexes:
+            page_pdf = pdfium.PdfDocument.new()
+            page_pdf.import_pages(pdf, [page_index])
+            buffer = io.BytesIO()
+            page_pdf.save(buffer)
+            page_pdf.close()
+            pages[page_index] = buffer.getvalue()
+    finally:
+        pdf.close()
+    return pages
+
+
+# Rasterize and OCR a single-page PDF; runs in an OCR worker process
+def _ocr_pdf_page(page_pdf: bytes, dpi: int, language: str, timeout: float) -> str:
+    pdf = pdfium.PdfDocument(page_pdf)
+    try:
+        page = pdf[0]
+        bitmap = page.render(scale=dpi / 72, grayscale=True)
+        image = bitmap.to_pil()
+        bitmap.close()
+        page.close()
+    finally:
+        pdf.close()
+    try:
+        # pytesseract kills the tesseract process and raises RuntimeError once `timeout` expires.
+        return pytesseract.image_to_string(image, lang=language, timeout=timeout)
+    except Exception as e:
+        # Some pytesseract exceptions cannot be pickled back to the parent and would break the pool.
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def ocr_pdf_pages(file_content: bytes, page_indexes: List[int]) -> Dict[int, str]:
+    """
+    OCRs the given pages in parallel across the OCR process pool (shared by all uploads).
+    Each page is limited to OCR_PAGE_TIMEOUT_SECONDS inside its worker, once it starts.
+    The document waits at most as long as the pages already queued by other uploads
+    plus its own would take; pages that fail or are still queued then are left out.
+    """
+    global _ocr_backlog
+    results: Dict[int, str] = {}
+    page_pdfs = _single_page_pdfs(file_content, page_indexes)
+    executor = _get_ocr_executor()
+    with _ocr_lock:
+        backlog = _ocr_backlog
+        _ocr_backlog += len(page_pdfs)
+    futures = {}
+    for page_index, page_pdf in page_pdfs.items():
+        future = executor.submit(_ocr_pdf_page, page_pdf, OCR_RENDER_DPI, OCR_LANGUAGE, OCR_PAGE_TIMEOUT_SECONDS)
+        future.add_done_callback(_page_done)
+        futures[page_index] = future
+    # Pages run in waves of OCR_MAX_WORKERS behind everything queued before them.
+    waves = -(-(backlog + len(page_pdfs)) // OCR_MAX_WORKERS)
+    deadline = time.monotonic() + OCR_PAGE_TIMEOUT_SECONDS * waves + 5
+
+    for page_index, future in futures.items():
+        try:
+            results[page_index] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Queued pages are dropped; a running page cannot be cancelled, but tesseract's own
+            # timeout in the worker ends it and its result is ignored.
+            if future.cancel():
+                logger.warning("OCR skipped PDF page %d: still queued at the document deadline.", page_index + 1)
+            else:
+                logger.warning("OCR timed out for PDF page %d.", page_index + 1)
+        except BrokenProcessPool:
+            logger.error("OCR worker pool crashed; it will be recreated for the next document.")
+            _discard_ocr_executor(executor)
+            break
+        except Exception as e:
+            logger.warning("OCR failed for PDF page %d: %s", page_index + 1, e)
+    return results
+
+
+# Extract text from a PDF file, OCRing only the pages without a usable text layer
 def extract_text_from_pdf(file_content: bytes) -> str:
-    text_content = ""
+    page_texts: List[str] = []
     try:
         pdf = pdfium.PdfDocument(file_content)
         for i in range(len(pdf)):
             page = pdf[i]
             textpage = page.get_textpage()
-            text_content += textpage.get_text_range() + "\n\n"
+            page_texts.append(textpage.get_text_range())
             textpage.close()
             page.close()
         pdf.close()
     except Exception as e:
-        logger.error(f"Error extracting PDF text: {e}", exc_info=True)
+        logger.error("Error extracting PDF text: %s", e, exc_info=True)
         return ""
-    return text_content.strip()
+
+    missing = [i for i, text in enumerate(page_texts) if len(text.strip()) < OCR_MIN_PAGE_CHARS]
+    if missing and ocr_available():
+        logger.info("Running OCR on %d of %d PDF pages without a text layer.", len(missing), len(page_texts))
+        for page_index, text in ocr_pdf_pages(file_content, missing).items():
+            page_texts[page_index] = text
+
+    return "".join(text + f"\n{PAGE_BREAK}\n" for text in page_texts).strip()
 
 # Extract text from a DOCX file
 def extract_text_from_docx(file_content: bytes) -> str:
@@ -30,7 +187,7 @@ def extract_text_from_docx(file_content: bytes) -> str:
         for para in doc.paragraphs:
             text_content += para.text + "\n"
     except Exception as e:
-        logger.error(f"Error extracting DOCX text: {e}", exc_info=True)
+        logger.error("Error extracting DOCX text: %s", e, exc_info=True)
         return ""
     return text_content.strip()
 
@@ -49,14 +206,14 @@ def extract_text_from_resume(filename: str, file_content: bytes) -> str:
          try:
             return file_content.decode('utf-8', errors='strict').strip()
          except UnicodeDecodeError:
-            logger.warning(f"Could not decode {filename} as UTF-8, trying common encodings.")
+            logger.warning("Could not decode %s as UTF-8, trying common encodings.", filename)
             # Trying other common encodings if UTF-8 fails
             for encoding in ['latin-1', 'cp1252']:
                 try:
                     return file_content.decode(encoding, errors='strict').strip()
                 except UnicodeDecodeError:
                     continue
-            logger.error(f"Failed to decode {filename} with common encodings.")
+            logger.error("Failed to decode %s with common encodings.", filename)
             raise ValueError(f"Unsupported text encoding for .txt file: {filename}")
     else:
         raise ValueError(f"Unsupported file type: .{file_ext}. Please upload PDF, DOCX, or TXT.")
\ No newline at end of file
@@ -7,7 +7,7 @@ from pydantic import (
     HttpUrl as PydanticHttpUrl
 )
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,12 +16,12 @@ logger = logging.getLogger(__name__)
 def _normalize_url_field(v: Optional[str], field_name: str) -> Optional[str]:
     """
     Attempts to normalize a string into a valid URL or returns None if not possible
-    or if it's a recognized placeholder.
+    or if it's a recognized placeholder. Only the field name is logged: the values are
+    personal links from the resume.
     """
     if v is None:
         return None
 
-    original_value = v
     v = v.strip()
     v_lower = v.lower()
 
@@ -31,7 +31,7 @@ def _normalize_url_field(v: Optional[str], field_name: str) -> Optional[str]:
         "view github", "live demo", "source code", "repository", "live site"
     ]
     if v_lower in non_url_placeholders:
-        logger.debug(f"Field '{field_name}': Value '{original_value}' recognized as non-URL placeholder, converting to None.")
+        logger.debug("Field '%s': value recognized as a non-URL placeholder, converting to None.", field_name)
         return None
 
     # If it already has a scheme, try to validate it as is
@@ -40,26 +40,26 @@ def _normalize_url_field(v: Optional[str], field_name: str) -> Optional[str]:
             PydanticHttpUrl(v)
             return v
         except ValueError:
-            logger.warning(f"Field '{field_name}': Value '{original_value}' starts with scheme but is not a valid HttpUrl, converting to None.")
+            logger.warning("Field '%s': value starts with a scheme but is not a valid HttpUrl, converting to None.", field_name)
             return None # Invalid full URL
 
     # If no scheme, but contains a dot (common for domains/paths)
     if '.' in v:
         if ' ' in v or len(v) < 4 or v.count('.') > 5 :
-             logger.debug(f"Field '{field_name}': Value '{original_value}' contains '.' but seems like non-URL content, keeping as string or converting to None if strict.")
+             logger.debug("Field '%s': value contains '.' but seems like non-URL content, keeping as string or converting to None if strict.", field_name)
              pass # Let it fall through to HttpUrl check below after prepending
 
         potential_url = f"https://{v}"
         try:
             PydanticHttpUrl(potential_url) 
-            logger.debug(f"Field '{field_name}': Value '{original_value}' prepended with https:// to form '{potential_url}'.")
+            logger.debug("Field '%s': value prepended with https:// to form a URL.", field_name)
             return potential_url
         except ValueError:
-            logger.warning(f"Field '{field_name}': Value '{original_value}' (tried as '{potential_url}') is not a valid HttpUrl, converting to None.")
+            logger.warning("Field '%s': value (tried with https://) is not a valid HttpUrl, converting to None.", field_name)
             return None 
 
     # If it doesn't look like a URL at all (no scheme, no dot, or failed previous checks)
-    logger.debug(f"Field '{field_name}': Value '{original_value}' does not appear to be a URL, converting to None.")
+    logger.debug("Field '%s': value does not appear to be a URL, converting to None.", field_name)
     return None
 
 
@@ -178,6 +178,32 @@ class ResumeExtractedData(BaseModel):
     certifications: List[CertificationItemSchema] = Field(default_factory=list)
     awards: List[AwardItemSchema] = Field(default_factory=list)
 
+# --- LLM Usage Schemas ---
+class StageUsageSchema(BaseModel):
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+class LLMUsageSchema(BaseModel):
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    stages: Dict[str, StageUsageSchema] = Field(default_factory=dict)
+
+class ClientUsageSchema(BaseModel):
+    client_id: str
+    day: date
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    budget_tokens: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    stages: Dict[str, StageUsageSchema] = Field(default_factory=dict)
+
+class SalvageReportSchema(BaseModel):
+    repairs: List[str] = Field(default_factory=list)
+    dropped: List[str] = Field(default_factory=list)
+
 # --- API Response Schemas ---
 class ResumeReadSchema(BaseModel):
     id: int
@@ -194,6 +220,10 @@ class ResumeReadSchema(BaseModel):
     certifications: List[CertificationItemSchema] = Field(default_factory=list)
     awards: List[AwardItemSchema] = Field(default_factory=list)
     llm_analysis: Optional[LLMAnalysisSchema] = None
+    client_id: Optional[str] = None
+    llm_usage: Optional[LLMUsageSchema] = None
+    # Set per stage ("extract", "analyze") when the stored result was salvaged from damaged LLM output
+    llm_salvage: Optional[Dict[str, SalvageReportSchema]] = None
 
     class Config:
         from_attributes = True
@@ -206,4 +236,25 @@ class ResumeListDetailSchema(BaseModel):
     email: Optional[EmailStr] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# --- Analytics Schemas ---
+class TermCountSchema(BaseModel):
+    term: str
+    count: int
+
+class RatingBucketSchema(BaseModel):
+    rating: int
+    count: int
+
+class AnalyticsSummarySchema(BaseModel):
+    resumes: int
+    analyzed: int
+    rated: int
+    mean_rating_bucket: Optional[float] = None
+
+class TermTrendSchema(BaseModel):
+    granularity: str
+    buckets: List[date]
+    series: Dict[str, List[int]]
@@ -0,0 +1,422 @@
+"""
+State shared between uvicorn workers (and pods): LLM rate limiting, the LLM result
+cache, single-flight de-duplication of identical requests, per-client job/progress
+tracking and LLM token usage counters.
+
+The backend is chosen by STATE_BACKEND_URL:
+    memory://                   per-process only (default; fine for one worker and tests)
+    sqlite:///path/state.db     all workers on one node
+    redis://host:6379/0         all workers on all nodes (requires the `redis` package)
+"""
+import os
+import abc
+import json
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_BACKEND_URL = os.getenv("STATE_BACKEND_URL", "memory://")
+# How often a request waiting on another worker's identical in-flight request re-checks the cache
+SINGLE_FLIGHT_POLL_SECONDS = 0.25
+
+
+class SharedStateBackend(abc.ABC):
+    """Primitives every backend implements; the higher-level helpers build on them."""
+
+    @abc.abstractmethod
+    async def take_tokens(self, bucket: str, capacity: float, refill_per_second: float, tokens: float = 1.0) -> float:
+        """Takes `tokens` from a token bucket. Returns 0 if granted, else the seconds to wait before retrying."""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def incr(self, key: str, amount: int, ttl_seconds: Optional[float] = None) -> int:
+        """Adds `amount` to an integer counter (created at 0, expiring after `ttl_seconds`) and returns the new value."""
+
+    @abc.abstractmethod
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """Returns an ownership token if the lock was acquired, None if someone else holds it."""
+
+    @abc.abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        ...
+
+    async def throttle(self, bucket: str, capacity: float, refill_per_second: float, tokens: float = 1.0) -> float:
+        """Waits until the bucket grants `tokens`. Returns the total time spent waiting."""
+        waited = 0.0
+        while True:
+            wait = await self.take_tokens(bucket, capacity, refill_per_second, tokens)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def single_flight(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Optional[str]]],
+        ttl_seconds: float,
+        lock_ttl_seconds: float = 120.0
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Returns the cached value for `key`, or computes and caches it such that
+        concurrent callers on any worker share a single computation.
+        Returns (value, from_cache). A None result is not cached.
+        """
+        cache_key, lock_key = f"cache:{key}", f"lock:{key}"
+        deadline = time.monotonic() + lock_ttl_seconds
+        while True:
+            cached = await self.get(cache_key)
+            if cached is not None:
+                return cached, True
+            token = await self.acquire_lock(lock_key, lock_ttl_seconds)
+            if token is not None:
+                break
+            if time.monotonic() > deadline:
+                logger.warning("Timed out waiting for in-flight computation of %s; computing locally.", key)
+                return await compute(), False
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+
+        try:
+            # Another worker may have finished between our cache check and taking the lock.
+            cached = await self.get(cache_key)
+            if cached is not None:
+                return cached, True
+            value = await compute()
+            if value is not None:
+                await self.set(cache_key, value, ttl_seconds)
+            return value, False
+        finally:
+            await self.release_lock(lock_key, token)
+
+    async def update_job(
+        self, job_id: str, ttl_seconds: float = 86400, client_id: Optional[str] = None, **fields: Any
+    ) -> Dict[str, Any]:
+        """
+        Merges `fields` into a job's status record, visible to every worker. Jobs are kept
+        per client, so one client cannot overwrite or read another's job with the same ID.
+        Backends merge atomically; this generic read-modify-write is atomic only because
+        the in-memory backend never yields between its get and set.
+        """
+        key = _job_key(job_id, client_id)
+        job = _merge_job(await self.get(key), job_id, client_id, fields, time.time())
+        await self.set(key, json.dumps(job, default=str), ttl_seconds)
+        return job
+
+    async def get_job(self, job_id: str, client_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        raw = await self.get(_job_key(job_id, client_id))
+        return json.loads(raw) if raw else None
+
+
+def _job_key(job_id: str, client_id: Optional[str]) -> str:
+    return f"job:{client_id or ''}/{job_id}"
+
+
+def _merge_job(raw: Optional[str], job_id: str, client_id: Optional[str], fields: Dict[str, Any], now: float) -> Dict[str, Any]:
+    job = json.loads(raw) if raw else {"job_id": job_id, "client_id": client_id, "created_at": now}
+    job.update(fields)
+    job["updated_at"] = now
+    return job
+
+
+def _refill(tokens: float, updated_at: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class InMemoryStateBackend(SharedStateBackend):
+    """Per-process state. Correct for a single worker and for tests; not shared across workers."""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def take_tokens(self, bucket, capacity, refill_per_second, tokens=1.0):
+        now = time.monotonic()
+        available, updated_at = self._buckets.get(bucket, (capacity, now))
+        available = _refill(available, updated_at, now, capacity, refill_per_second)
+        if available >= tokens:
+            self._buckets[bucket] = (available - tokens, now)
+            return 0.0
+        self._buckets[bucket] = (available, now)
+        return (tokens - available) / refill_per_second
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, ttl_seconds=None):
+        self._values[key] = (value, time.monotonic() + ttl_seconds if ttl_seconds else None)
+
+    async def incr(self, key, amount, ttl_seconds=None):
+        current = self._live(key)
+        if current is None:
+            await self.set(key, str(amount), ttl_seconds)
+            return amount
+        value = int(current) + amount
+        self._values[key] = (str(value), self._values[key][1])
+        return value
+
+    async def acquire_lock(self, key, ttl_seconds):
+        if self._live(key) is not None:
+            return None
+        token = uuid.uuid4().hex
+        await self.set(key, token, ttl_seconds)
+        return token
+
+    async def release_lock(self, key, token):
+        if self._live(key) == token:
+            del self._values[key]
+
+
+class SQLiteStateBackend(SharedStateBackend):
+    """
+    State in a local SQLite file, shared by all workers on one node. Each operation
+    runs in its own IMMEDIATE transaction, which serializes writers across processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _get_live(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            return None
+        return row[0]
+
+    async def take_tokens(self, bucket, capacity, refill_per_second, tokens=1.0):
+        def take(conn):
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (bucket,)).fetchone()
+            available = _refill(row[0], row[1], now, capacity, refill_per_second) if row else capacity
+            wait = 0.0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / refill_per_second
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (bucket, available, now),
+            )
+            return wait
+        return await asyncio.to_thread(self._run, take)
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._run, lambda conn: self._get_live(conn, key))
+
+    async def set(self, key, value, ttl_seconds=None):
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        await asyncio.to_thread(self._run, lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+        ))
+
+    async def incr(self, key, amount, ttl_seconds=None):
+        def increment(conn):
+            current = self._get_live(conn, key)
+            if current is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, str(amount), time.time() + ttl_seconds if ttl_seconds else None),
+                )
+                return amount
+            value = int(current) + amount
+            conn.execute("UPDATE kv SET value = ? WHERE key = ?", (str(value), key))
+            return value
+        return await asyncio.to_thread(self._run, increment)
+
+    async def acquire_lock(self, key, ttl_seconds):
+        token = uuid.uuid4().hex
+
+        def acquire(conn):
+            if self._get_live(conn, key) is not None:
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, token, time.time() + ttl_seconds),
+            )
+            return token
+        return await asyncio.to_thread(self._run, acquire)
+
+    async def release_lock(self, key, token):
+        await asyncio.to_thread(self._run, lambda conn: conn.execute(
+            "DELETE FROM kv WHERE key = ? AND value = ?", (key, token)
+        ))
+
+    async def update_job(self, job_id, ttl_seconds=86400, client_id=None, **fields):
+        key = _job_key(job_id, client_id)
+
+        def merge(conn):
+            job = _merge_job(self._get_live(conn, key), job_id, client_id, fields, time.time())
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(job, default=str), time.time() + ttl_seconds),
+            )
+            return job
+        return await asyncio.to_thread(self._run, merge)
+
+
+# Token bucket evaluated atomically inside Redis, on the Redis server's clock
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+  tokens = tokens - requested
+else
+  wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+# Counter increment that sets the expiry only when the counter is created
+_REDIS_INCR = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if tonumber(ARGV[2]) > 0 and redis.call('PTTL', KEYS[1]) == -1 then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+# Job update merged inside Redis, so concurrent updates of one job cannot lose fields
+_REDIS_UPDATE_JOB = """
+local raw = redis.call('GET', KEYS[1])
+local job = raw and cjson.decode(raw) or cjson.decode(ARGV[1])
+for name, value in pairs(cjson.decode(ARGV[2])) do
+  job[name] = value
+end
+job['updated_at'] = tonumber(ARGV[3])
+local encoded = cjson.encode(job)
+redis.call('SET', KEYS[1], encoded, 'PX', ARGV[4])
+return encoded
+"""
+
+_REDIS_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisStateBackend(SharedStateBackend):
+    """State in Redis, shared by every worker on every node."""
+
+    def __init__(self, url: str, prefix: str = "resume-analyzer:"):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("STATE_BACKEND_URL points at Redis but the 'redis' package is not installed.")
+        self.prefix = prefix
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self._token_bucket = self.client.register_script(_REDIS_TOKEN_BUCKET)
+        self._release = self.client.register_script(_REDIS_RELEASE_LOCK)
+        self._incr = self.client.register_script(_REDIS_INCR)
+        self._update_job = self.client.register_script(_REDIS_UPDATE_JOB)
+
+    async def take_tokens(self, bucket, capacity, refill_per_second, tokens=1.0):
+        wait = await self._token_bucket(keys=[f"{self.prefix}bucket:{bucket}"], args=[capacity, refill_per_second, tokens])
+        return float(wait)
+
+    async def get(self, key):
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key, value, ttl_seconds=None):
+        await self.client.set(self.prefix + key, value, px=int(ttl_seconds * 1000) if ttl_seconds else None)
+
+    async def incr(self, key, amount, ttl_seconds=None):
+        value = await self._incr(keys=[self.prefix + key], args=[amount, int(ttl_seconds * 1000) if ttl_seconds else 0])
+        return int(value)
+
+    async def acquire_lock(self, key, ttl_seconds):
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(self.prefix + key, token, nx=True, px=int(ttl_seconds * 1000))
+        return token if acquired else None
+
+    async def release_lock(self, key, token):
+        await self._release(keys=[self.prefix + key], args=[token])
+
+    async def update_job(self, job_id, ttl_seconds=86400, client_id=None, **fields):
+        now = time.time()
+        initial = {"job_id": job_id, "client_id": client_id, "created_at": now}
+        raw = await self._update_job(
+            keys=[self.prefix + _job_key(job_id, client_id)],
+            args=[json.dumps(initial), json.dumps(fields, default=str), now, int(ttl_seconds * 1000)],
+        )
+        return json.loads(raw)
+
+
+def create_state_backend(url: str) -> SharedStateBackend:
+    if url.startswith("memory://"):
+        return InMemoryStateBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateBackend(url)
+    raise ValueError(f"Unsupported STATE_BACKEND_URL: {url}")
+
+
+_state_backend: Optional[SharedStateBackend] = None
+
+
+def get_state_backend() -> SharedStateBackend:
+    """Process-wide backend, created from STATE_BACKEND_URL on first use."""
+    global _state_backend
+    if _state_backend is None:
+        _state_backend = create_state_backend(STATE_BACKEND_URL)
+        logger.info("Shared state backend: %s.", type(_state_backend).__name__)
+    return _state_backend
@@ -0,0 +1,119 @@
+"""
+Dashboard query latency: analytics rollups versus scanning resume JSON.
+
+Seeds a throwaway SQLite database with synthetic resumes spread over a year, builds
+the rollups, then answers "top skills this month", the rating histogram and the
+all-time top potential roles both from the rollups and the old way (load every
+row's `skills` / `llm_analysis` JSON and count in Python). Rollup latency should stay
+flat as the corpus grows. Run from the backend directory:
+    python -m benchmarks.bench_analytics --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+SKILLS = [f"Skill {i}" for i in range(300)]
+ROLES = [f"Role {i}" for i in range(60)]
+KEYWORDS = [f"Keyword {i}" for i in range(200)]
+
+
+def _resume(rng: random.Random, uploaded_at: datetime) -> dict:
+    return {
+        "filename": "resume.pdf",
+        "uploaded_at": uploaded_at,
+        "skills": {
+            "technical": [{"name": s} for s in rng.sample(SKILLS, 8)],
+            "soft": ["Communication", "Teamwork"],
+            "tools": [{"name": s} for s in rng.sample(SKILLS, 3)],
+        },
+        "llm_analysis": {
+            "resume_rating": rng.choice([5, 6, 6.5, 7, 7.5, 8, 9]),
+            "potential_roles": rng.sample(ROLES, 3),
+            "suggested_keywords_for_ats": rng.sample(KEYWORDS, 6),
+        },
+    }
+
+
+def _seed(db, engine, rows: int, end: date, chunk: int = 5000) -> None:
+    from sqlalchemy import insert
+    from app import analytics, models
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    rng = random.Random(rows)
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = [
+                _resume(rng, datetime.combine(end - timedelta(days=rng.randrange(365)), datetime.min.time(), timezone.utc))
+                for _ in range(min(chunk, rows - start))
+            ]
+            conn.execute(insert(models.Resume), batch)
+    analytics.rebuild_rollups(db, batch_size=5000)
+
+
+def _scan_queries(db, month_start: date):
+    from sqlalchemy import select
+    from app import models
+
+    skills, ratings, roles = Counter(), Counter(), Counter()
+    query = select(models.Resume.uploaded_at, models.Resume.skills, models.Resume.llm_analysis)
+    for uploaded_at, resume_skills, analysis in db.execute(query):
+        if uploaded_at.date() >= month_start:
+            skills.update({s["name"] for s in resume_skills["technical"] + resume_skills["tools"]})
+        ratings[int(analysis["resume_rating"])] += 1
+        roles.update(analysis["potential_roles"])
+    return skills.most_common(20), sorted(ratings.items()), roles.most_common(20)
+
+
+def _rollup_queries(db, month_start: date):
+    from app import analytics
+
+    return (
+        analytics.top_terms(db, "skill", date_from=month_start, limit=20),
+        analytics.rating_histogram(db),
+        analytics.top_terms(db, "potential_role", limit=20),
+    )
+
+
+def _median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_analytics.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    import logging
+    logging.disable(logging.INFO)
+    from app.database import SessionLocal, engine
+
+    today = datetime.now(timezone.utc).date()
+    month_start = today.replace(day=1)
+    print(f"{'resumes':>10}{'seed+rebuild s':>16}{'scan ms':>12}{'rollups ms':>12}{'speedup':>10}")
+    for size in args.sizes:
+        db = SessionLocal()
+        started = time.perf_counter()
+        _seed(db, engine, size, today)
+        seeded_s = time.perf_counter() - started
+        scan_ms = _median_ms(lambda: _scan_queries(db, month_start), args.repeat)
+        rollup_ms = _median_ms(lambda: _rollup_queries(db, month_start), args.repeat)
+        db.close()
+        print(f"{size:>10}{seeded_s:>16.1f}{scan_ms:>12.1f}{rollup_ms:>12.2f}{scan_ms / rollup_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Single-shot versus chunked (map-reduce) extraction latency for long CVs.
+
+By default the LLM is replaced by a simulated model whose latency follows a simple
+time-to-first-token + output-tokens-per-second profile and which "extracts" the
+synthetic CV's entries exactly, so the merged chunked result can be checked against
+the single-shot one. Pass --live to call the configured Gemini model instead.
+Run from the backend directory:
+    python -m benchmarks.bench_chunked_extraction --pages 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+ENTRY_RE = re.compile(r"^(?P<role>[^|\n]+) \| (?P<company>[^|\n]+) \| (?P<start>\d{4}-\d{2}) - (?P<end>\d{4}-\d{2}|Present)$", re.MULTILINE)
+PUB_RE = re.compile(r"^\[P\d+\] (?P<name>.+)$", re.MULTILINE)
+
+
+def build_cv(pages: int) -> str:
+    from app.resume_parser import PAGE_BREAK
+
+    page_texts = ["Dr. Jane Doe\njane.doe@example.edu | +1 555 0100\n\nSUMMARY\nResearch engineer working on distributed systems.\n"]
+    entry = 0
+    for page in range(pages):
+        lines = ["EXPERIENCE" if page % 2 == 0 else "PUBLICATIONS"]
+        for _ in range(12):
+            entry += 1
+            if page % 2 == 0:
+                lines.append(f"Senior Engineer {entry} | Company {entry} | 20{entry % 20:02d}-01 - 20{entry % 20:02d}-12")
+                lines.extend(f"- Delivered project {entry}.{k} improving throughput by {k * 7}%" for k in range(3))
+            else:
+                lines.append(f"[P{entry}] A study of consensus protocols, part {entry}. Journal of Systems, 20{entry % 20:02d}.")
+        page_texts.append("\n".join(lines) + "\n")
+    return f"\n{PAGE_BREAK}\n".join(page_texts)
+
+
+class SimulatedExtractionChain:
+    """Deterministic stand-in for the extraction chain with a token-rate latency model."""
+
+    def __init__(self, ttft_s: float, output_tokens_per_s: float):
+        self.ttft_s = ttft_s
+        self.output_tokens_per_s = output_tokens_per_s
+        self.calls = 0
+
+    async def ainvoke(self, inputs: dict) -> str:
+        self.calls += 1
+        text = inputs["resume_text"]
+        data = {
+            "work_experience": [
+                {"role": m["role"], "company": m["company"], "start_date": m["start"], "end_date": m["end"]}
+                for m in ENTRY_RE.finditer(text)
+            ],
+            "projects": [{"name": m["name"]} for m in PUB_RE.finditer(text)],
+        }
+        if "jane.doe@example.edu" in text:
+            data["contact_info"] = {"name": "Dr. Jane Doe", "email": "jane.doe@example.edu"}
+        output = json.dumps(data)
+        await asyncio.sleep(self.ttft_s + (len(output) / 4) / self.output_tokens_per_s)
+        return output
+
+
+async def _timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - started
+
+
+async def run(args) -> None:
+    from app import llm_services
+
+    cv = build_cv(args.pages)
+    if not args.live:
+        fake = SimulatedExtractionChain(args.ttft, args.tokens_per_s)
+        llm_services.extraction_chain = fake
+        llm_services.chunk_extraction_chain = fake
+    elif not llm_services.extraction_chain:
+        raise SystemExit("--live needs GEMINI_API_KEY to be configured.")
+
+    print(f"CV: {args.pages} pages, {len(cv)} chars; chunk target {llm_services.CHUNK_TARGET_CHARS} chars, concurrency {llm_services.CHUNK_MAX_CONCURRENCY}")
+    single, single_s = await _timed(llm_services.extract_structured_data_from_text(cv, chunked=False))
+    chunked, chunked_s = await _timed(llm_services.extract_structured_data_from_text(cv, chunked=True))
+
+    for label, result, elapsed in (("single-shot", single, single_s), ("chunked", chunked, chunked_s)):
+        if result is None:
+            print(f"{label:>12}: failed after {elapsed:.2f}s")
+            continue
+        print(
+            f"{label:>12}: {elapsed:6.2f}s  work_experience={len(result.work_experience)} "
+            f"projects={len(result.projects)} email={result.contact_info.email if result.contact_info else None}"
+        )
+    if single and chunked and not args.live:
+        same = single.model_dump() == chunked.model_dump()
+        print(f"merged chunked result identical to single-shot: {same}; speedup {single_s / chunked_s:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--ttft", type=float, default=0.6, help="Simulated time to first token (s).")
+    parser.add_argument("--tokens-per-s", type=float, default=250.0, help="Simulated output tokens per second.")
+    parser.add_argument("--live", action="store_true", help="Use the configured Gemini model instead of the simulation.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Export throughput and peak-memory benchmark.
+
+Seeds a throwaway SQLite database with synthetic resumes and streams it through
+each export format, reporting rows/second and peak RSS. Run from the backend directory:
+    python -m benchmarks.bench_export --rows 1000000
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+DEFAULT_ROWS = 1_000_000
+
+
+def _seed(engine, rows: int, chunk: int = 10_000) -> None:
+    from sqlalchemy import insert
+    from app import models
+
+    models.Base.metadata.create_all(engine)
+    template = {
+        "filename": "resume.pdf",
+        "raw_text": "Experienced engineer " * 40,
+        "contact_info": {"name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 0100"},
+        "summary": "Backend engineer with 6 years of experience.",
+        "work_experience": [{"company": "Acme", "role": "Engineer", "responsibilities": ["Built APIs", "Ran on-call"]}],
+        "education": [{"institution": "State University", "degree": "BSc"}],
+        "skills": {"technical": [{"name": "Python"}, {"name": "SQL"}], "soft": ["Communication"], "tools": [{"name": "Docker"}]},
+        "projects": [{"name": "Resume Parser", "technologies_used": ["FastAPI"]}],
+        "certifications": [],
+        "awards": [],
+        "llm_analysis": {"resume_rating": 7.5, "potential_roles": ["Backend Engineer"], "suggested_keywords_for_ats": ["Python", "REST"]},
+    }
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            conn.execute(insert(models.Resume), [template] * min(chunk, rows - start))
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--formats", nargs="+", default=["ndjson", "csv", "parquet"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_export.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from app import export
+    from app.database import engine
+
+    started = time.perf_counter()
+    _seed(engine, args.rows)
+    print(f"Seeded {args.rows} rows in {time.perf_counter() - started:.1f}s (peak RSS {_peak_rss_mb():.0f} MB)")
+
+    for export_format in args.formats:
+        try:
+            export.ensure_format_available(export_format)
+        except ValueError as e:
+            print(f"{export_format:>8}: skipped ({e})")
+            continue
+        started = time.perf_counter()
+        size = 0
+        for chunk in export.iter_export_chunks(export_format, batch_size=args.batch_size):
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{export_format:>8}: {args.rows / elapsed:,.0f} rows/s, {size / 1e6:,.1f} MB written, "
+            f"peak RSS so far {_peak_rss_mb():.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+JSON filter latency before and after the JSONB/GIN migration (5b7e2c9d4a1f).
+
+Needs a scratch Postgres database: the benchmark creates the `resumes` table at the
+initial revision, seeds synthetic rows, times each filter, applies the JSONB upgrade
+and times the same filters through crud.search_resumes. Run from the backend directory:
+    python -m benchmarks.bench_json_filters --database-url postgresql+psycopg2://localhost/resume_bench --rows 200000
+"""
+import argparse
+import importlib.util
+import os
+import random
+import statistics
+import time
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions")
+SKILLS = ["Python", "Go", "Rust", "Java", "SQL", "React", "Kubernetes", "Terraform", "Spark", "Django"]
+ROLES = ["Backend Engineer", "Data Engineer", "Frontend Engineer", "SRE", "Product Manager"]
+
+
+def _load_migration(filename: str):
+    spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(VERSIONS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run_migration(engine, filename: str) -> None:
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            _load_migration(filename).upgrade()
+
+
+def _seed(engine, rows: int, chunk: int = 5000) -> None:
+    import json
+    from sqlalchemy import text
+
+    rng = random.Random(42)
+    stmt = text(
+        "INSERT INTO resumes (filename, uploaded_at, contact_info, skills, llm_analysis) "
+        "VALUES (:filename, now(), CAST(:contact_info AS json), CAST(:skills AS json), CAST(:llm_analysis AS json))"
+    )
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(start + chunk, rows)):
+                batch.append({
+                    "filename": f"resume_{i}.pdf",
+                    "contact_info": json.dumps({"name": f"Candidate {i}", "email": f"candidate{i}@example.com"}),
+                    "skills": json.dumps({
+                        "technical": [{"name": s} for s in rng.sample(SKILLS, 3)],
+                        "tools": [{"name": "Docker"}],
+                    }),
+                    "llm_analysis": json.dumps({
+                        "resume_rating": round(rng.uniform(1, 10), 1),
+                        "potential_roles": rng.sample(ROLES, 2),
+                    }),
+                })
+            conn.execute(stmt, batch)
+        conn.execute(text("ANALYZE resumes"))
+
+
+def _time(fn, repeats: int) -> float:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch Postgres database; its resumes table is dropped.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=15)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from app import crud
+    from app.database import engine
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("This benchmark compares JSON and JSONB and needs a Postgres database.")
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS resumes"))
+    _run_migration(engine, "83d1c5f80f03_create_initial_resumes_table.py")
+    _seed(engine, args.rows)
+    print(f"Seeded {args.rows} rows.")
+
+    email = f"candidate{args.rows // 2}@example.com"
+    cases = [
+        ("email", "SELECT * FROM resumes WHERE contact_info ->> 'email' = :v ORDER BY uploaded_at DESC LIMIT 100", email, {"email": email}),
+        ("rating>=9.5", "SELECT * FROM resumes WHERE CAST(llm_analysis ->> 'resume_rating' AS FLOAT) >= :v ORDER BY uploaded_at DESC LIMIT 100", 9.5, {"min_rating": 9.5}),
+        ("skill", "SELECT * FROM resumes WHERE CAST(skills AS jsonb) @> CAST(:v AS jsonb) ORDER BY uploaded_at DESC LIMIT 100", '{"technical": [{"name": "Rust"}]}', {"skill": "Rust"}),
+        ("role", "SELECT * FROM resumes WHERE CAST(llm_analysis AS jsonb) @> CAST(:v AS jsonb) ORDER BY uploaded_at DESC LIMIT 100", '{"potential_roles": ["SRE"]}', {"potential_role": "SRE"}),
+    ]
+
+    before = {}
+    with engine.connect() as conn:
+        for name, sql, value, _ in cases:
+            before[name] = _time(lambda: conn.execute(text(sql), {"v": value}).all(), args.repeats)
+
+    _run_migration(engine, "5b7e2c9d4a1f_jsonb_columns_and_gin_indexes.py")
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE resumes"))
+
+    print(f"{'filter':<12} {'json (ms)':>10} {'jsonb+idx (ms)':>15} {'speedup':>8}")
+    with Session(engine) as db:
+        for name, _, _, kwargs in cases:
+            after = _time(lambda: crud.search_resumes(db, limit=100, **kwargs), args.repeats)
+            print(f"{name:<12} {before[name]:>10.2f} {after:>15.2f} {before[name] / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Salvage rate of the local JSON repair stage on a corpus of damaged LLM outputs.
+
+Valid extraction outputs are damaged in the ways Gemini responses break in practice
+(trailing commas, truncation, Python literals, one invalid field, ...). Each case is
+parsed the old strict way and through _parse_llm_json_output; every case the strict
+parser rejects but salvage recovers is an upload that no longer fails and is retried,
+i.e. one full LLM extraction call avoided. Outputs cut off before any content
+(EMPTY_OUTPUTS) must still be rejected rather than saved as an empty resume.
+Run from the backend directory:
+    python -m benchmarks.bench_json_salvage --min-salvage-rate 0.9
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+CLEAN_OUTPUTS = [
+    {
+        "contact_info": {"name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 0100", "github": "github.com/jane"},
+        "summary": "Backend engineer with 6 years of experience building data-heavy APIs.",
+        "work_experience": [
+            {"company": "Acme", "role": "Senior Engineer", "start_date": "2021-03", "end_date": "Present", "duration_months": 40,
+             "responsibilities": ["Led the ingestion platform", "Cut p99 latency by 45%"]},
+            {"company": "Globex", "role": "Engineer", "start_date": "2018-06", "end_date": "2021-02", "duration_months": 32,
+             "responsibilities": ["Built billing services"], "achievements": ["Employee of the year"]},
+        ],
+        "education": [{"institution": "State University", "degree": "BSc", "major": "Computer Science", "graduation_date": "2018"}],
+        "skills": {"technical": [{"name": "Python"}, {"name": "PostgreSQL"}, {"name": "Go"}], "soft": ["Mentoring"], "tools": [{"name": "Docker"}]},
+        "projects": [{"name": "Resume Parser", "description": "LLM-based parsing", "technologies_used": ["FastAPI", "LangChain"]}],
+        "certifications": [{"name": "AWS Solutions Architect", "issuing_organization": "Amazon"}],
+        "awards": [{"name": "Hackathon winner", "date": "2019"}],
+    },
+    {
+        "contact_info": {"name": "Arjun Mehta", "email": "arjun.m@example.in", "linkedin": "linkedin.com/in/arjun"},
+        "work_experience": [{"company": "Initech", "role": "Data Analyst", "start_date": "2022-01", "end_date": "2023-12",
+                             "responsibilities": ["Dashboards", "ETL pipelines", "Stakeholder reporting"]}],
+        "education": [{"institution": "IIT Delhi", "degree": "BTech", "gpa": "8.7", "relevant_coursework": ["DBMS", "Statistics"]}],
+        "skills": {"technical": [{"name": "SQL"}, {"name": "Pandas"}], "soft": ["Communication", "Teamwork"], "languages": [{"language": "Hindi"}]},
+        "projects": [{"name": "Churn model", "technologies_used": ["scikit-learn"]}, {"name": "Sales dashboard", "link": "example.com/sales"}],
+    },
+]
+
+
+def _truncate(fraction):
+    def damage(text):
+        return text[: int(len(text) * fraction)]
+    damage.__name__ = f"truncate@{int(fraction * 100)}%"
+    return damage
+
+
+def _trailing_commas(text):
+    return text.replace("]", ",]").replace("}", ",}")
+
+
+def _python_literals(text):
+    return text.replace('"summary": ', '"summary": None, "_summary": ', 1)
+
+
+def _invalid_email(text):
+    return text.replace("@example", " at example", 1)
+
+
+def _wrong_type_item(text):
+    return text.replace('"duration_months": 40', '"duration_months": "about three years"').replace('"gpa": "8.7"', '"gpa": ["8.7"]')
+
+
+def _fenced_and_truncated(text):
+    return "Here is the JSON:\n```json\n" + text[: int(len(text) * 0.8)]
+
+
+def _missing_required(text):
+    return text.replace('{"name": "Python"}', '{"proficiency": "expert"}')
+
+
+DAMAGES = [
+    _trailing_commas, _python_literals, _invalid_email, _wrong_type_item, _fenced_and_truncated,
+    _missing_required, *[_truncate(f) for f in (0.3, 0.45, 0.6, 0.75, 0.9, 0.97)],
+]
+
+# Responses truncated before any value was written: repairable JSON, but nothing to keep
+EMPTY_OUTPUTS = [
+    "{",
+    '{"summ',
+    '{"summary": "',
+    '{"contact_info": {"na',
+    '{"contact_info": {"name": null, "email": "not an email"}}',
+    '```json\n{"work_experience": [{"comp',
+    '{"skills": {"technical": [',
+]
+
+
+def _strict_parse(text, schema):
+    """The pre-salvage behaviour: one json.loads + model_validate, all or nothing."""
+    try:
+        start, end = text.find("{"), text.rfind("}")
+        return schema.model_validate(json.loads(text[start:end + 1]))
+    except Exception:
+        return None
+
+
+def _filled_sections(model):
+    return sum(1 for value in model.model_dump(exclude_none=True).values() if value not in ([], {}, ""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-salvage-rate", type=float, default=0.0, help="Exit non-zero if fewer damaged cases are salvaged.")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    from app import llm_services, schemas
+    from app.json_repair import SalvageReport
+
+    schema = schemas.ResumeExtractedData
+    total = strict_ok = salvaged_ok = 0
+    sections_kept, sections_total, elapsed = 0, 0, 0.0
+    for doc in CLEAN_OUTPUTS:
+        clean_text = json.dumps(doc)
+        expected_sections = _filled_sections(schema.model_validate(doc))
+        for damage in DAMAGES:
+            damaged = damage(clean_text)
+            total += 1
+            strict = _strict_parse(damaged, schema)
+            strict_ok += strict is not None
+
+            report = SalvageReport()
+            started = time.perf_counter()
+            result = llm_services._parse_llm_json_output(damaged, schema, report)
+            elapsed += time.perf_counter() - started
+            if result is not None:
+                salvaged_ok += 1
+                sections_kept += _filled_sections(result)
+            sections_total += expected_sections
+            if args.verbose:
+                print(f"{damage.__name__:<22} strict={'ok' if strict else 'FAIL':<4} salvage={'ok' if result else 'FAIL':<4} {report}")
+
+    empty_rejected = sum(llm_services._parse_llm_json_output(text, schema) is None for text in EMPTY_OUTPUTS)
+
+    salvage_rate = salvaged_ok / total
+    print(f"cases: {total}")
+    print(f"strict parse success:   {strict_ok}/{total} ({strict_ok / total:.0%})")
+    print(f"repair+salvage success: {salvaged_ok}/{total} ({salvage_rate:.0%})")
+    print(f"sections retained:      {sections_kept}/{sections_total} ({sections_kept / sections_total:.0%})")
+    print(f"empty outputs rejected: {empty_rejected}/{len(EMPTY_OUTPUTS)}")
+    print(f"LLM calls avoided:      {salvaged_ok - strict_ok} (uploads that would have failed and been retried)")
+    print(f"mean parse time:        {elapsed / total * 1000:.2f} ms")
+    if salvage_rate < args.min_salvage_rate:
+        raise SystemExit(f"Salvage rate {salvage_rate:.0%} is below the required {args.min_salvage_rate:.0%}.")
+    if empty_rejected < len(EMPTY_OUTPUTS):
+        raise SystemExit(f"{len(EMPTY_OUTPUTS) - empty_rejected} output(s) without content were accepted.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Request overhead of logging: off, synchronous, queued, and queued + sampled.
+
+Each mode runs in a fresh interpreter configured through the LOG_* environment
+variables and drives the app in-process (httpx ASGI transport, no network) with
+concurrent requests to /health and to a bench-only route that logs like the upload
+path (several INFO lines with arguments). Log output goes to a real file. Run from
+the backend directory:
+    python -m benchmarks.bench_logging --requests 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "off": {"LOG_LEVEL": "CRITICAL"},
+    "sync": {"LOG_ASYNC": "false", "LOG_SAMPLE_RATES": "", "LOG_ROUTE_RATE_LIMIT": "0"},
+    "queued": {"LOG_ASYNC": "true", "LOG_SAMPLE_RATES": "", "LOG_ROUTE_RATE_LIMIT": "0"},
+    "queued+sampled": {"LOG_ASYNC": "true"},  # the defaults
+}
+
+
+async def _drive(app, path: str, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(count: int):
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def run_child(requests: int, concurrency: int) -> None:
+    import logging
+    from app.main import app
+
+    bench_logger = logging.getLogger("app.bench")
+    # The benchmark's own HTTP client logs every request; keep it out of the measurement.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    @app.get("/bench/upload-like")
+    async def upload_like():
+        # Same shape as the upload path's logging: a handful of INFO lines with arguments.
+        bench_logger.info("Processing uploaded file: %s, content type: %s", "resume.pdf", "application/pdf")
+        bench_logger.info("Extracted raw text for %s: %s", "resume.pdf", "<redacted 4200 chars>")
+        bench_logger.info("Successfully extracted structured data for %s.", "resume.pdf")
+        bench_logger.info("Resume %s (ID: %s) processed and saved successfully.", "resume.pdf", 42)
+        return {"ok": True}
+
+    results = {}
+    for path in ("/health", "/bench/upload-like"):
+        asyncio.run(_drive(app, path, max(requests // 10, concurrency), concurrency))  # warm-up
+        results[path] = asyncio.run(_drive(app, path, requests, concurrency))
+    print(json.dumps(results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.requests, args.concurrency)
+        return
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for mode, overrides in MODES.items():
+        env = {**os.environ, "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite://"), **overrides}
+        with tempfile.TemporaryFile() as log_file:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_logging", "--child",
+                 "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+                cwd=backend_dir, env=env, stdout=subprocess.PIPE, stderr=log_file, check=True,
+            )
+            log_bytes = log_file.tell()
+        results[mode] = (json.loads(proc.stdout.decode().strip().splitlines()[-1]), log_bytes)
+
+    print(f"{args.requests} requests per route, concurrency {args.concurrency}")
+    print(f"{'mode':<16}{'route':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'log KB':>10}")
+    for mode, (routes, log_bytes) in results.items():
+        for route, stats in routes.items():
+            print(f"{mode:<16}{route:<22}{stats['rps']:>10.0f}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{log_bytes / 1024:>10.0f}")
+    baseline = results["off"][0]
+    for mode in ("sync", "queued", "queued+sampled"):
+        overhead = {route: (stats["p50_ms"] - baseline[route]["p50_ms"]) * 1000 for route, stats in results[mode][0].items()}
+        print(f"p50 overhead vs off, {mode}: " + ", ".join(f"{route} {us:+.0f} us" for route, us in overhead.items()))
+
+
+if __name__ == "__main__":
+    main()
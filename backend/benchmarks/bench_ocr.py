@@ -0,0 +1,99 @@
+"""
+Selective OCR throughput and the latency it adds to mixed PDFs.
+
+Builds documents from a sample resume in which every N-th page is replaced by a
+scanned (image-only) copy of itself, then times extract_text_from_pdf on the
+all-text original and on the mixed copy. The difference is the latency added by
+OCRing only the pages without a text layer; pages/second is reported for the OCR
+pages alone. Needs the tesseract binary. Run from the backend directory:
+    python -m benchmarks.bench_ocr --pdf ../sample/resume-sample.pdf --scan-every 3
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "..", "..", "sample", "resume-sample.pdf")
+
+
+def build_mixed_pdf(source: bytes, scan_every: int, dpi: int) -> "tuple[bytes, int, int]":
+    """Returns a copy of `source` with every `scan_every`-th page rasterized, the number of such pages and the page count."""
+    import io
+    import pypdfium2 as pdfium
+
+    src = pdfium.PdfDocument(source)
+    out = pdfium.PdfDocument.new()
+    scanned = 0
+    for i in range(len(src)):
+        if i % scan_every != 0:
+            out.import_pages(src, [i])
+            continue
+        page = src[i]
+        width, height = page.get_size()
+        bitmap = page.render(scale=dpi / 72)
+        image = pdfium.PdfImage.new(out)
+        image.set_bitmap(bitmap)
+        image.set_matrix(pdfium.PdfMatrix().scale(width, height))
+        new_page = out.new_page(width, height)
+        new_page.insert_obj(image)
+        new_page.gen_content()
+        bitmap.close()
+        page.close()
+        scanned += 1
+    total = len(src)
+    buffer = io.BytesIO()
+    out.save(buffer)
+    out.close()
+    src.close()
+    return buffer.getvalue(), scanned, total
+
+
+def _time(fn, repeat: int) -> "tuple[str, list[float]]":
+    timings = []
+    result = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", default=DEFAULT_PDF)
+    parser.add_argument("--scan-every", type=int, default=3, help="Rasterize every N-th page (1 = fully scanned).")
+    parser.add_argument("--scan-dpi", type=int, default=150, help="Resolution of the simulated scans.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from app import resume_parser
+
+    if not resume_parser.ocr_available():
+        raise SystemExit("Tesseract is not available (install the tesseract binary and pytesseract).")
+
+    with open(args.pdf, "rb") as f:
+        original = f.read()
+    mixed, scanned, pages = build_mixed_pdf(original, args.scan_every, args.scan_dpi)
+
+    # Warm the OCR worker pool so process start-up is not billed to the first document.
+    resume_parser.ocr_pdf_pages(mixed, [0])
+
+    text_only, text_timings = _time(lambda: resume_parser.extract_text_from_pdf(original), args.repeat)
+    with_ocr, ocr_timings = _time(lambda: resume_parser.extract_text_from_pdf(mixed), args.repeat)
+
+    text_s = statistics.median(text_timings)
+    mixed_s = statistics.median(ocr_timings)
+    added_s = max(mixed_s - text_s, 0.0)
+    print(f"document: {args.pdf} ({pages} pages), {scanned} pages image-only; OCR workers {resume_parser.OCR_MAX_WORKERS}, dpi {resume_parser.OCR_RENDER_DPI}")
+    print(f"text layer only:  {text_s * 1000:8.1f} ms  ({len(text_only)} chars)")
+    print(f"mixed with OCR:   {mixed_s * 1000:8.1f} ms  ({len(with_ocr)} chars)")
+    print(f"added latency:    {added_s * 1000:8.1f} ms  ({added_s / max(scanned, 1) * 1000:.1f} ms per OCR page)")
+    print(f"OCR throughput:   {scanned / added_s if added_s else float('inf'):8.2f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Timing, baseline storage and regression testing for the benchmark suite (suite.py).
+
+Each case is timed as a series of samples; a sample runs the operation `number`
+times (calibrated so one sample lasts at least `min_sample_time`) and records the
+mean time per operation. Samples taken in one process are correlated (heap layout,
+CPU frequency, neighbours on the machine), so the suite repeats every case in
+several fresh processes. Interference from the machine only ever adds time, so each
+process is summarized by its fastest sample: a case regresses when the per-process
+minimums are slower than the baseline's with a one-sided Mann-Whitney U test at
+`alpha` AND the best time overall is more than `min_slowdown` slower than the
+baseline's best. The test alone would flag whole runs that landed on a busy
+machine; the best-time ratio alone would flag single lucky baseline samples.
+"""
+import cProfile
+import gc
+import itertools
+import json
+import math
+import os
+import platform
+import pstats
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], Any]
+    # Runs once before calibration, e.g. to build inputs or warm caches
+    setup: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class CaseResult:
+    name: str
+    number: int
+    # Seconds per operation; one list of samples per process
+    runs: List[List[float]] = field(default_factory=list)
+
+    @property
+    def run_minimums(self) -> List[float]:
+        return [min(run) for run in self.runs if run]
+
+    @property
+    def best(self) -> float:
+        return min(self.run_minimums)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(sample for run in self.runs for sample in run)
+
+
+@dataclass
+class Comparison:
+    name: str
+    ratio: float
+    p_value: float
+    verdict: str  # "regression", "improvement", "unchanged" or "new"
+
+
+def _time_once(fn: Callable[[], Any], number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - started
+
+
+def calibrate(fn: Callable[[], Any], min_sample_time: float) -> int:
+    """Smallest power-of-two operation count whose run lasts at least `min_sample_time`."""
+    number = 1
+    while True:
+        if _time_once(fn, number) >= min_sample_time or number >= 1 << 20:
+            return number
+        number *= 2
+
+
+def measure(case: Case, samples: int, min_sample_time: float, warmup: int = 1) -> CaseResult:
+    if case.setup:
+        case.setup()
+    number = calibrate(case.fn, min_sample_time)
+    for _ in range(warmup):
+        _time_once(case.fn, number)
+    run = []
+    for _ in range(samples):
+        # Start each sample from a clean heap; GC stays enabled since its cost is part of the workload.
+        gc.collect()
+        run.append(_time_once(case.fn, number) / number)
+    return CaseResult(case.name, number, [run])
+
+
+# Above this many rank assignments the normal approximation is used instead of exact enumeration
+EXACT_TEST_MAX_COMBINATIONS = 50_000
+
+
+def mann_whitney_greater(current: List[float], baseline: List[float]) -> float:
+    """
+    One-sided p-value that `current` tends to be larger (slower) than `baseline`
+    (Mann-Whitney U). Exact for small samples such as per-process minimums, otherwise
+    the normal approximation with tie correction.
+    """
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 1.0
+    ranked = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    ranks = [0.0] * len(ranked)
+    tie_term = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    n = n1 + n2
+
+    if math.comb(n, n1) <= EXACT_TEST_MAX_COMBINATIONS:
+        # Share of all ways to assign n1 of the ranks to `current` with a rank sum at least as large.
+        sums = [sum(combo) for combo in itertools.combinations(ranks, n1)]
+        return sum(1 for total in sums if total >= rank_sum - 1e-9) / len(sums)
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)  # continuity correction
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(
+    results: List[CaseResult], baseline: Dict[str, Any], alpha: float, min_slowdown: float
+) -> List[Comparison]:
+    base_cases = baseline.get("cases", {})
+    comparisons = []
+    for result in results:
+        base = base_cases.get(result.name)
+        if not base:
+            comparisons.append(Comparison(result.name, float("nan"), float("nan"), "new"))
+            continue
+        base_result = CaseResult(result.name, base["number"], base["runs"])
+        ratio = result.best / base_result.best
+        slower_p = mann_whitney_greater(result.run_minimums, base_result.run_minimums)
+        faster_p = mann_whitney_greater(base_result.run_minimums, result.run_minimums)
+        if slower_p < alpha and ratio > 1 + min_slowdown:
+            verdict, p_value = "regression", slower_p
+        elif faster_p < alpha and ratio < 1 / (1 + min_slowdown):
+            verdict, p_value = "improvement", faster_p
+        else:
+            verdict, p_value = "unchanged", min(slower_p, faster_p)
+        comparisons.append(Comparison(result.name, ratio, p_value, verdict))
+    return comparisons
+
+
+def environment() -> Dict[str, Any]:
+    """What a baseline was measured on; timings are only comparable on the same setup."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: List[CaseResult], merge_into: Optional[Dict[str, Any]] = None) -> None:
+    """Writes the results as the new baseline, keeping baseline cases that were not re-run."""
+    cases = dict((merge_into or {}).get("cases", {}))
+    for result in results:
+        cases[result.name] = {"number": result.number, "best": result.best, "median": result.median, "runs": result.runs}
+    data = {"environment": environment(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "cases": cases}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def profile(case: Case, out_dir: str, number: int, top: int = 15) -> str:
+    """
+    Runs a case under cProfile and writes `<case>.prof` (open with snakeviz, or turn into
+    a flamegraph with flameprof / gprof2dot). Prints the top functions by cumulative time.
+    """
+    if case.setup:
+        case.setup()
+    case.fn()  # warm-up outside the profile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(number):
+        case.fn()
+    profiler.disable()
+
+    os.makedirs(out_dir, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in case.name)
+    path = os.path.join(out_dir, f"{safe_name}.prof")
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler, stream=sys.stdout)
+    print(f"\n--- {case.name} ({number} runs) -> {path}")
+    stats.sort_stats("cumulative").print_stats(top)
+    return path
+
+
+def format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value / 1e-9:.0f} ns"
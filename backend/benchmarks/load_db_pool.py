@@ -0,0 +1,77 @@
+"""
+Connection pool load test.
+
+Runs many concurrent short "requests" (checkout, one query, release) against the
+database and reports latency percentiles for several pool configurations, e.g. the
+old pre-ping-on-every-checkout setup versus the tuned pool with idle-only pings.
+Run from the backend directory against a real server database for meaningful numbers:
+    python -m benchmarks.load_db_pool --database-url postgresql+psycopg2://localhost/resume_bench --concurrency 64
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _run(engine, concurrency: int, requests: int, hold_ms: float):
+    from sqlalchemy import text
+
+    def one_request(_):
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).scalar()
+            if hold_ms:
+                time.sleep(hold_ms / 1000)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(concurrency)))  # warm the pool
+        started = time.perf_counter()
+        latencies = list(executor.map(one_request, range(requests)))
+        elapsed = time.perf_counter() - started
+    return latencies, requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--hold-ms", type=float, default=2.0, help="Time each request keeps its connection checked out.")
+    args = parser.parse_args()
+    if not args.database_url:
+        raise SystemExit("Pass --database-url or set DATABASE_URL.")
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app.database import build_engine, InstrumentedQueuePool
+
+    configs = {
+        "default pool + pre_ping": dict(pool_size=5, max_overflow=10, pre_ping=True),
+        "tuned pool, idle ping": dict(pool_size=20, max_overflow=20),
+        "tuned pool, no ping": dict(pool_size=20, max_overflow=20, ping_idle_seconds=-1),
+    }
+    print(f"{'config':<26} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'p99 pool wait':>16}")
+    for name, overrides in configs.items():
+        engine = build_engine(args.database_url, **overrides)
+        latencies, throughput = _run(engine, args.concurrency, args.requests, args.hold_ms)
+        wait_info = "-"
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            buckets = engine.pool.metrics()["wait_time_ms"]["buckets"]
+            total = buckets["+Inf"]
+            wait_info = next((f"<= {b} ms" for b, c in buckets.items() if c >= total * 0.99), "-")
+        print(
+            f"{name:<26} {throughput:>8.0f} {statistics.median(latencies):>8.2f} "
+            f"{_percentile(latencies, 99):>8.2f} {wait_info:>16}"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""
+Performance regression suite for every stage of the upload pipeline.
+
+Cases:
+  parser.*     resume_parser text extraction on sample/ PDFs and synthetic PDF/DOCX/TXT
+  llm_parse.*  _parse_llm_json_output on clean, fenced and damaged LLM responses
+  schema.*     Pydantic validation of extracted data and of the detail response
+  crud.*       crud insert, list and filtered search on SQLite (and Postgres with --postgres-url)
+  upload.*     the full POST /api/v1/resumes/upload endpoint with an instant fake LLM
+
+Each group of cases is measured in several fresh worker processes. Results are compared
+with a stored baseline (benchmarks/baseline.json); the run exits non-zero if any case is
+significantly slower (see harness.py). Run from the backend directory:
+    python -m benchmarks.suite                      # run everything and check for regressions
+    python -m benchmarks.suite --filter parser      # regex on case names
+    python -m benchmarks.suite --save-baseline      # record the current numbers as the baseline
+    python -m benchmarks.suite --filter upload --profile prof/   # cProfile output per case
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import harness
+from benchmarks.harness import Case
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DIR = os.path.join(BACKEND_DIR, "..", "sample")
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baseline.json")
+CRUD_SEED_ROWS = 5000
+
+ANALYSIS_OUTPUT = {
+    "resume_rating": 7.5,
+    "overall_feedback": "Solid backend profile with measurable impact.",
+    "strength_areas": ["Distributed systems", "Mentoring"],
+    "improvement_areas": ["Quantify project outcomes"],
+    "upskill_suggestions": [{"skill": "Kubernetes", "reason": "Common in target roles."}],
+    "suggested_keywords_for_ats": ["Python", "REST", "PostgreSQL"],
+    "potential_roles": ["Backend Engineer", "Platform Engineer"],
+}
+
+
+# --- Inputs ---
+
+def _sample_pdfs() -> List[str]:
+    if not os.path.isdir(SAMPLE_DIR):
+        return []
+    return sorted(os.path.join(SAMPLE_DIR, name) for name in os.listdir(SAMPLE_DIR) if name.lower().endswith(".pdf"))
+
+
+def _synthetic_pdf(pages: int) -> bytes:
+    """A long text-layer PDF made by repeating the sample resumes' pages."""
+    import pypdfium2 as pdfium
+
+    out = pdfium.PdfDocument.new()
+    sources = [pdfium.PdfDocument(path) for path in _sample_pdfs()]
+    while len(out) < pages:
+        for src in sources:
+            for i in range(len(src)):
+                if len(out) < pages:
+                    out.import_pages(src, [i])
+    buffer = io.BytesIO()
+    out.save(buffer)
+    for src in sources:
+        src.close()
+    out.close()
+    return buffer.getvalue()
+
+
+def _synthetic_docx(text: str) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _synthetic_cv_text(pages: int) -> str:
+    from benchmarks.bench_chunked_extraction import build_cv
+
+    return build_cv(pages)
+
+
+# --- Cases ---
+
+def parser_cases() -> List[Case]:
+    from app import resume_parser
+
+    cases = []
+    for path in _sample_pdfs():
+        with open(path, "rb") as f:
+            content = f.read()
+        stem = re.sub(r"\W+", "_", os.path.splitext(os.path.basename(path))[0]).strip("_").lower()
+        cases.append(Case(f"parser.pdf.{stem}", lambda content=content: resume_parser.extract_text_from_pdf(content)))
+
+    if cases:
+        pdf = _synthetic_pdf(40)
+        cases.append(Case("parser.pdf.synthetic_40_pages", lambda: resume_parser.extract_text_from_pdf(pdf)))
+    cv_text = _synthetic_cv_text(12)
+    docx_bytes = _synthetic_docx(cv_text)
+    txt_bytes = cv_text.encode("utf-8")
+    cases.append(Case("parser.docx.synthetic", lambda: resume_parser.extract_text_from_resume("cv.docx", docx_bytes)))
+    cases.append(Case("parser.txt.synthetic", lambda: resume_parser.extract_text_from_resume("cv.txt", txt_bytes)))
+    return cases
+
+
+def llm_parse_cases() -> List[Case]:
+    from app import llm_services, schemas
+    from benchmarks.bench_json_salvage import CLEAN_OUTPUTS, DAMAGES
+
+    clean = json.dumps(CLEAN_OUTPUTS[0])
+    fenced = f"Here is the extracted data:\n```json\n{json.dumps(CLEAN_OUTPUTS[0], indent=2)}\n```"
+    damaged = [damage(clean) for damage in DAMAGES]
+    analysis = json.dumps(ANALYSIS_OUTPUT)
+    parse = llm_services._parse_llm_json_output
+
+    def parse_damaged():
+        for text in damaged:
+            parse(text, schemas.ResumeExtractedData)
+
+    return [
+        Case("llm_parse.extraction_clean", lambda: parse(clean, schemas.ResumeExtractedData)),
+        Case("llm_parse.extraction_fenced", lambda: parse(fenced, schemas.ResumeExtractedData)),
+        Case("llm_parse.extraction_damaged_corpus", parse_damaged),
+        Case("llm_parse.analysis_clean", lambda: parse(analysis, schemas.LLMAnalysisSchema)),
+    ]
+
+
+def schema_cases() -> List[Case]:
+    from datetime import datetime, timezone
+    from app import crud, models, schemas
+    from benchmarks.bench_json_salvage import CLEAN_OUTPUTS
+
+    extracted = schemas.ResumeExtractedData.model_validate(CLEAN_OUTPUTS[0])
+    row = models.Resume(
+        id=1, filename="resume.pdf", uploaded_at=datetime.now(timezone.utc), raw_text="text",
+        **crud.resume_columns_from_extracted(extracted), llm_analysis=ANALYSIS_OUTPUT,
+    )
+    return [
+        Case("schema.validate_extracted", lambda: schemas.ResumeExtractedData.model_validate(CLEAN_OUTPUTS[0])),
+        Case("schema.validate_analysis", lambda: schemas.LLMAnalysisSchema.model_validate(ANALYSIS_OUTPUT)),
+        Case("schema.resume_read_from_orm", lambda: schemas.ResumeReadSchema.model_validate(row)),
+    ]
+
+
+def _seed_resumes(engine, rows: int) -> None:
+    from sqlalchemy import insert
+    from app import models
+    from benchmarks.bench_json_salvage import CLEAN_OUTPUTS
+
+    rng = random.Random(7)
+    skills = ["Python", "Go", "Rust", "Java", "SQL", "React", "Kubernetes", "Terraform"]
+    base = dict(CLEAN_OUTPUTS[0])
+    with engine.begin() as conn:
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "filename": f"resume_{i}.pdf",
+                "raw_text": "Experienced engineer " * 40,
+                "contact_info": {"name": f"Candidate {i}", "email": f"candidate{i}@example.com"},
+                "summary": base["summary"],
+                "work_experience": base["work_experience"],
+                "education": base["education"],
+                "skills": {"technical": [{"name": s} for s in rng.sample(skills, 3)], "tools": [{"name": "Docker"}]},
+                "projects": base["projects"],
+                "llm_analysis": {**ANALYSIS_OUTPUT, "resume_rating": rng.choice([5, 6, 7, 8, 9])},
+            })
+        conn.execute(insert(models.Resume), batch)
+
+
+def crud_cases(backend: str, url: str) -> List[Case]:
+    from sqlalchemy.orm import sessionmaker
+    from app import crud, models, schemas
+    from app.database import build_engine
+    from benchmarks.bench_json_salvage import CLEAN_OUTPUTS
+
+    engine = build_engine(url)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    extracted = schemas.ResumeExtractedData.model_validate(CLEAN_OUTPUTS[0])
+    analysis = schemas.LLMAnalysisSchema.model_validate(ANALYSIS_OUTPUT)
+
+    seeded = []
+
+    def setup():
+        # Fresh, identically seeded tables so list/search timings do not depend on earlier runs.
+        if seeded:
+            return
+        models.Base.metadata.drop_all(engine)
+        models.Base.metadata.create_all(engine)
+        _seed_resumes(engine, CRUD_SEED_ROWS)
+        seeded.append(True)
+
+    def insert():
+        if crud.create_resume_entry(db, "resume.pdf", "Experienced engineer " * 40, extracted, analysis) is None:
+            raise RuntimeError("create_resume_entry failed")
+
+    prefix = f"crud.{backend}"
+    # Inserts last: they grow the table the read cases run against.
+    return [
+        Case(f"{prefix}.list_page", lambda: crud.get_all_resumes(db, skip=0, limit=20), setup=setup),
+        Case(f"{prefix}.search_skill", lambda: crud.search_resumes(db, skill="Python", limit=20), setup=setup),
+        Case(f"{prefix}.search_rating", lambda: crud.search_resumes(db, min_rating=8, limit=20), setup=setup),
+        Case(f"{prefix}.get_by_id", lambda: crud.get_resume_by_id(db, CRUD_SEED_ROWS // 2), setup=setup),
+        Case(f"{prefix}.insert", insert, setup=setup),
+    ]
+
+
+class InstantChain:
+    """Stands in for an LLM chain: returns a canned message with token usage and no latency."""
+
+    def __init__(self, response: str):
+        self.response = response
+
+    async def ainvoke(self, inputs: dict):
+        from langchain_core.messages import AIMessage
+
+        input_tokens = sum(len(str(value)) for value in inputs.values()) // 4
+        output_tokens = len(self.response) // 4
+        return AIMessage(content=self.response, usage_metadata={
+            "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens,
+        })
+
+
+def upload_cases() -> List[Case]:
+    import httpx
+    from app import llm_services
+    from app.main import app
+    from app.database import engine
+    from app import models
+    from benchmarks.bench_json_salvage import CLEAN_OUTPUTS
+
+    models.Base.metadata.create_all(engine)
+    llm_services.llm = llm_services.llm or object()  # the endpoint refuses to run without an LLM
+    llm_services.extraction_chain = InstantChain(json.dumps(CLEAN_OUTPUTS[0]))
+    llm_services.chunk_extraction_chain = llm_services.extraction_chain
+    llm_services.analysis_chain = InstantChain(json.dumps(ANALYSIS_OUTPUT))
+    # Every iteration uploads the same file; measure the pipeline, not the result cache.
+    llm_services.LLM_CACHE_TTL_SECONDS = 0
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    def post(filename: str, content: bytes, media_type: str):
+        async def send():
+            response = await client.post("/api/v1/resumes/upload", files={"file": (filename, content, media_type)})
+            if response.status_code != 201:
+                raise RuntimeError(f"Upload returned {response.status_code}: {response.text[:200]}")
+        return lambda: loop.run_until_complete(send())
+
+    cases = [Case("upload.txt_fake_llm", post("cv.txt", _synthetic_cv_text(2).encode("utf-8"), "text/plain"))]
+    pdfs = _sample_pdfs()
+    if pdfs:
+        with open(pdfs[0], "rb") as f:
+            cases.append(Case("upload.pdf_fake_llm", post("resume.pdf", f.read(), "application/pdf")))
+    return cases
+
+
+def case_groups(postgres_url: Optional[str], workdir: str) -> Dict[str, Callable[[], List[Case]]]:
+    """Case builders by group; each group is measured in its own worker processes."""
+    groups = {
+        "parser": parser_cases,
+        "llm_parse": llm_parse_cases,
+        "schema": schema_cases,
+        "crud.sqlite": lambda: crud_cases("sqlite", f"sqlite:///{os.path.join(workdir, 'crud.db')}"),
+    }
+    if postgres_url:
+        groups["crud.postgres"] = lambda: crud_cases("postgres", postgres_url)
+    groups["upload"] = upload_cases
+    return groups
+
+
+def _prepare_process() -> str:
+    workdir = tempfile.mkdtemp(prefix="resume-bench-")
+    # The app reads its configuration at import time: point it at a throwaway database first.
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'app.db')}"
+    os.environ.setdefault("STATE_BACKEND_URL", "memory://")
+    logging.disable(logging.CRITICAL)
+    return workdir
+
+
+def _select(cases: List[Case], pattern: Optional[str]) -> List[Case]:
+    if not pattern:
+        return cases
+    regex = re.compile(pattern)
+    return [case for case in cases if regex.search(case.name)]
+
+
+def run_worker(args: argparse.Namespace) -> int:
+    """Measures one group in this process and prints the samples as JSON on stdout."""
+    workdir = _prepare_process()
+    cases = _select(case_groups(args.postgres_url, workdir)[args.worker](), args.filter)
+    results = [harness.measure(case, args.samples, args.min_sample_time) for case in cases]
+    json.dump([{"name": r.name, "number": r.number, "samples": r.runs[0]} for r in results], sys.stdout)
+    return 0
+
+
+def _spawn_worker(group: str, args: argparse.Namespace) -> List[dict]:
+    command = [
+        sys.executable, "-m", "benchmarks.suite", "--worker", group,
+        "--samples", str(args.samples), "--min-sample-time", str(args.min_sample_time),
+    ]
+    if args.filter:
+        command += ["--filter", args.filter]
+    if args.postgres_url:
+        command += ["--postgres-url", args.postgres_url]
+    completed = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark worker for '{group}' failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout)
+
+
+def run_processes(groups: List[str], args: argparse.Namespace) -> List[harness.CaseResult]:
+    """
+    Runs every group in `args.processes` fresh worker processes. Repetitions are
+    interleaved (all groups once, then all groups again, ...) so that slow drift of the
+    machine spreads over all cases instead of skewing whichever ran last.
+    """
+    results: Dict[str, harness.CaseResult] = {}
+    active = list(groups)
+    for repetition in range(args.processes):
+        for group in list(active):
+            measured = _spawn_worker(group, args)
+            if not measured:
+                active.remove(group)  # nothing in this group matches --filter
+                continue
+            for item in measured:
+                result = results.setdefault(item["name"], harness.CaseResult(item["name"], item["number"]))
+                result.runs.append(item["samples"])
+        print(f"process {repetition + 1}/{args.processes} done", file=sys.stderr, flush=True)
+    return list(results.values())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default=None, help="Only run cases whose name matches this regex.")
+    parser.add_argument("--list", action="store_true", help="List case names and exit.")
+    parser.add_argument("--processes", type=int, default=5, help="Fresh worker processes per case.")
+    parser.add_argument("--samples", type=int, default=5, help="Timed samples per case in each process.")
+    parser.add_argument("--min-sample-time", type=float, default=0.05, help="Minimum duration of one sample (s).")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline instead of comparing.")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level of the regression test.")
+    parser.add_argument("--min-slowdown", type=float, default=0.10, help="Ignore slowdowns smaller than this fraction.")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write this run's results to a JSON file.")
+    parser.add_argument("--profile", metavar="DIR", default=None, help="Write cProfile output per case to DIR instead of timing.")
+    parser.add_argument("--profile-runs", type=int, default=20, help="Operations per case under --profile.")
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"),
+                        help="Scratch Postgres database for the crud.postgres cases (its tables are dropped and recreated).")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    if args.list or args.profile:
+        workdir = _prepare_process()
+        cases = [case for build in case_groups(args.postgres_url, workdir).values() for case in build()]
+        cases = _select(cases, args.filter)
+        if args.list:
+            print("\n".join(case.name for case in cases))
+        for case in cases if args.profile else []:
+            harness.profile(case, args.profile, args.profile_runs)
+        return 0
+
+    groups = list(case_groups(args.postgres_url, "").keys())
+    results = run_processes(groups, args)
+    if not results:
+        print("No cases match.", file=sys.stderr)
+        return 2
+
+    width = max(len(result.name) for result in results)
+    print(f"{'case':<{width}}  {'best':>10}  {'median':>10}")
+    for result in results:
+        print(f"{result.name:<{width}}  {harness.format_seconds(result.best):>10}  {harness.format_seconds(result.median):>10}  (x{result.number})")
+
+    baseline = harness.load_baseline(args.baseline)
+    if args.json_path:
+        harness.save_baseline(args.json_path, results)
+    if args.save_baseline:
+        harness.save_baseline(args.baseline, results, merge_into=baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    if baseline.get("environment") != harness.environment():
+        print("\nWarning: the baseline was recorded on a different environment; timings may not be comparable.")
+    comparisons = harness.compare(results, baseline, args.alpha, args.min_slowdown)
+    print(f"\n{'case':<{width}}  {'vs baseline':>11}  {'p':>8}  verdict")
+    for c in comparisons:
+        ratio = "-" if c.verdict == "new" else f"{c.ratio:.2f}x"
+        p_value = "-" if c.verdict == "new" else f"{c.p_value:.4f}"
+        print(f"{c.name:<{width}}  {ratio:>11}  {p_value:>8}  {c.verdict}")
+    regressions = [c for c in comparisons if c.verdict == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} significant regression(s): {', '.join(c.name for c in regressions)}")
+        return 1
+    print("\nNo significant regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
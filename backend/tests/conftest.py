@@ -0,0 +1,6 @@
+import os
+import sys
+
+# app.database refuses to import without a database URL; tests never touch a real one.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+"""
+Rollup keys and rebuilds of app.analytics, on an in-memory SQLite database.
+"""
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import analytics, models
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _add_resume(db, resume_id, skill):
+    db.add(models.Resume(id=resume_id, filename=f"{resume_id}.pdf", skills={"technical": [{"name": skill}]}))
+    db.commit()
+
+
+def _total(db):
+    return db.execute(
+        select(models.AnalyticsRollup.count).where(
+            models.AnalyticsRollup.dimension == "resumes", models.AnalyticsRollup.granularity == "month"
+        )
+    ).scalar()
+
+
+def test_clean_truncates_after_casefolding():
+    key, label = analytics._clean("ß" * analytics.MAX_KEY_LENGTH)
+
+    assert key == "s" * analytics.MAX_KEY_LENGTH
+    assert label == "ß" * analytics.MAX_KEY_LENGTH
+
+
+def test_clean_normalizes_whitespace_and_case():
+    assert analytics._clean("  Machine\n  Learning ") == ("machine learning", "Machine Learning")
+    assert analytics._clean("   ") is None
+    assert analytics._clean(42) is None
+
+
+def test_rebuild_counts_rows_committed_behind_the_scan(db, monkeypatch):
+    for resume_id in (1, 2, 4, 5):
+        _add_resume(db, resume_id, "Python")
+
+    scan = analytics._scan
+    late_uploads = [3]
+
+    def scan_then_commit_late_upload(session, after_id, batch_size):
+        rows = scan(session, after_id, batch_size)
+        if not rows and late_uploads:
+            # ID 3 was allocated before 4 and 5 but its transaction commits only after the first scan.
+            _add_resume(session, late_uploads.pop(), "Go")
+        return rows
+
+    monkeypatch.setattr(analytics, "_scan", scan_then_commit_late_upload)
+
+    assert analytics.rebuild_rollups(db, batch_size=2) == 5
+    assert _total(db) == 5
+    assert [term["term"] for term in analytics.top_terms(db, "skill")] == ["Python", "Go"]
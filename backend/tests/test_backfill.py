@@ -0,0 +1,78 @@
+"""
+Checkpointing of failed rows in app.backfill, on a SQLite database with a stubbed LLM stage.
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import backfill, llm_services, models
+
+
+@pytest.fixture
+def resumes(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    models.Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        db.add_all(models.Resume(id=i, filename=f"{i}.pdf", raw_text="Experienced engineer " * 5) for i in range(1, 11))
+        db.commit()
+    monkeypatch.setattr(backfill, "SessionLocal", session_factory)
+    monkeypatch.setattr(llm_services, "llm", object())
+    failing = set()
+
+    async def reprocess(db_resume, stage, limiter, stats, salvage_reports):
+        return None if db_resume.id in failing else {"id": db_resume.id, "llm_analysis": {"summary": "ok"}}
+
+    monkeypatch.setattr(backfill, "_reprocess_stages", reprocess)
+    yield failing
+    engine.dispose()
+
+
+def _run(checkpoint, **kwargs):
+    return asyncio.run(backfill.run_backfill(stage="analyze", batch_size=3, checkpoint_path=str(checkpoint), **kwargs))
+
+
+def _checkpoint(checkpoint):
+    return json.loads(checkpoint.read_text())
+
+
+def test_retry_keeps_ids_it_did_not_rewrite(resumes, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    resumes.update({3, 7, 8})
+    _run(checkpoint)
+    assert _checkpoint(checkpoint)["failed_ids"] == [3, 7, 8]
+
+    resumes.clear()
+    resumes.add(8)
+    _run(checkpoint, retry_failed=True)
+
+    data = _checkpoint(checkpoint)
+    assert data["failed_ids"] == [8]
+    assert data["last_id"] == 10
+
+
+def test_unselected_failed_ids_stay_recorded(resumes, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    resumes.update({2, 9})
+    _run(checkpoint)
+
+    resumes.clear()
+    stats = _run(checkpoint, retry_failed=True, sample_rate=0.0)
+
+    assert stats.selected == 0
+    assert _checkpoint(checkpoint)["failed_ids"] == [2, 9]
+
+
+def test_limit_does_not_checkpoint_past_cut_rows(resumes, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+
+    stats = _run(checkpoint, limit=4)
+    assert stats.last_id == 4
+    assert _checkpoint(checkpoint)["last_id"] == 4
+
+    stats = _run(checkpoint)
+    assert stats.scanned == 6
+    assert stats.updated == 6
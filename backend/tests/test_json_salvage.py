@@ -0,0 +1,134 @@
+"""
+Salvage of damaged LLM extraction outputs: what survives, what is dropped, and what is rejected.
+"""
+import json
+
+import pytest
+
+from app import llm_services, schemas
+from app.json_repair import SalvageReport, salvage_record
+
+DOCUMENT = {
+    "contact_info": {"name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 0100", "github": "github.com/jane"},
+    "summary": "Backend engineer with 6 years of experience building data-heavy APIs.",
+    "work_experience": [
+        {"company": "Acme", "role": "Senior Engineer", "start_date": "2021-03", "end_date": "Present", "duration_months": 40,
+         "responsibilities": ["Led the ingestion platform", "Cut p99 latency by 45%"]},
+        {"company": "Globex", "role": "Engineer", "start_date": "2018-06", "end_date": "2021-02", "duration_months": 32,
+         "responsibilities": ["Built billing services"]},
+    ],
+    "education": [{"institution": "State University", "degree": "BSc", "major": "Computer Science", "graduation_date": "2018"}],
+    "skills": {"technical": [{"name": "Python"}, {"name": "PostgreSQL"}, {"name": "Go"}], "soft": ["Mentoring"], "tools": [{"name": "Docker"}]},
+    "projects": [{"name": "Resume Parser", "description": "LLM-based parsing", "technologies_used": ["FastAPI", "LangChain"]}],
+}
+TEXT = json.dumps(DOCUMENT)
+CLEAN = schemas.ResumeExtractedData.model_validate(DOCUMENT)
+
+
+def _dump(model, *path):
+    value = model.model_dump(exclude_none=True)
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _cut_after(marker):
+    return TEXT[: TEXT.index(marker) + len(marker)]
+
+
+def _salvage(text):
+    report = SalvageReport()
+    result = llm_services._parse_llm_json_output(text, schemas.ResumeExtractedData, report)
+    assert isinstance(result, schemas.ResumeExtractedData)
+    return result, report
+
+
+@pytest.mark.parametrize("text", [
+    TEXT.replace("]", ",]").replace("}", ",}"),
+    f"Here is the extracted data:\n```json\n{json.dumps(DOCUMENT, indent=2)}\n```\nLet me know if you need more.",
+], ids=["trailing-commas", "fenced-in-prose"])
+def test_syntax_damage_is_repaired_without_losing_anything(text):
+    result, report = _salvage(text)
+
+    assert result == CLEAN
+    assert report.dropped == []
+
+
+def test_python_literals_are_read_as_json():
+    result, report = _salvage(TEXT.replace('"end_date": "Present"', '"end_date": None'))
+
+    assert result.work_experience[0].end_date is None
+    assert result.work_experience[0].company == "Acme"
+    assert report.repairs and report.dropped == []
+
+
+@pytest.mark.parametrize("damaged,dropped,survivor", [
+    (TEXT.replace("jane@example.com", "jane at example.com"), "contact_info.email", ("contact_info", "phone")),
+    (TEXT.replace('"duration_months": 40', '"duration_months": "about three years"'), "work_experience[0].duration_months", ("work_experience", 0, "responsibilities")),
+    (TEXT.replace('{"name": "Python"}', '{"proficiency": "expert"}'), "skills.technical[0]", ("skills", "tools")),
+], ids=["invalid-email", "wrong-type-field", "list-item-missing-name"])
+def test_invalid_values_are_dropped_and_the_rest_kept(damaged, dropped, survivor):
+    result, report = _salvage(damaged)
+
+    assert report.dropped == [dropped]
+    assert _dump(result, *survivor) == _dump(CLEAN, *survivor)
+    assert result.contact_info.name == "Jane Doe"
+    assert [job.company for job in result.work_experience] == ["Acme", "Globex"]
+
+
+def test_list_item_without_name_leaves_the_other_items():
+    result, _ = _salvage(TEXT.replace('{"name": "Python"}', '{"proficiency": "expert"}'))
+
+    assert [skill.name for skill in result.skills.technical] == ["PostgreSQL", "Go"]
+
+
+@pytest.mark.parametrize("marker,complete_jobs", [
+    ('"Cut p99 latency', 0),
+    ('"company": "Globex", "role": "Eng', 1),
+    ('"Built billing services"]}]', 2),
+    ('"technical": [{"name": "Python"}, {"name": "Post', 2),
+], ids=["inside-first-job", "inside-second-job", "after-experience", "inside-skills"])
+def test_truncated_output_keeps_everything_before_the_cut(marker, complete_jobs):
+    result, report = _salvage(_cut_after(marker))
+
+    assert report.salvaged
+    assert result.contact_info == CLEAN.contact_info
+    assert result.summary == CLEAN.summary
+    assert result.work_experience[:complete_jobs] == CLEAN.work_experience[:complete_jobs]
+    assert all(job.company in ("Acme", "Globex") for job in result.work_experience)
+
+
+# Responses truncated before any value was written: repairable JSON, but nothing to keep
+@pytest.mark.parametrize("text", [
+    "{",
+    '{"summ',
+    '{"summary": "',
+    '{"contact_info": {"na',
+    '{"contact_info": {"name": null, "email": "not an email"}}',
+    '```json\n{"work_experience": [{"comp',
+    '{"skills": {"technical": [',
+])
+def test_output_without_content_is_rejected(text):
+    failed_before = llm_services.SALVAGE_STATS["failed"]
+
+    assert llm_services._parse_llm_json_output(text, schemas.ResumeExtractedData, SalvageReport()) is None
+    assert llm_services.SALVAGE_STATS["failed"] == failed_before + 1
+
+
+def test_clean_output_reports_nothing():
+    result, report = _salvage(TEXT)
+
+    assert result == CLEAN
+    assert not report.salvaged
+
+
+def test_salvage_record_keeps_only_salvaged_stages():
+    salvaged = SalvageReport(repairs=["removed trailing commas"])
+    previous = {"analyze": {"repairs": [], "dropped": ["upskill_suggestions[0]"]}}
+
+    assert salvage_record({"extract": SalvageReport(), "analyze": SalvageReport()}) is None
+    assert salvage_record({"extract": salvaged}, previous) == {
+        "extract": {"repairs": ["removed trailing commas"], "dropped": []},
+        "analyze": {"repairs": [], "dropped": ["upskill_suggestions[0]"]},
+    }
+    assert salvage_record({"analyze": SalvageReport()}, previous) is None
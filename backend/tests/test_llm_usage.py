@@ -0,0 +1,93 @@
+"""
+Token reservations, API-key clients and usage read access of app.llm_usage, on the in-process state backend.
+"""
+import asyncio
+
+import pytest
+
+from app import llm_usage
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    monkeypatch.setattr(llm_usage, "LLM_CLIENT_TOKEN_BUDGETS", {"reserve-test": 1000, "settle-test": 1000})
+    monkeypatch.setattr(llm_usage, "LLM_USAGE_ADMIN_CLIENTS", {"ops"})
+
+
+def _used(client_id):
+    return asyncio.run(llm_usage._read_counter(llm_usage._counter_key(llm_usage._today(), client_id, "total_tokens")))
+
+
+def test_concurrent_reservations_cannot_overshoot_the_budget(budgets):
+    async def reserve_all():
+        return await asyncio.gather(
+            *(llm_usage.reserve_tokens(300, "reserve-test") for _ in range(5)), return_exceptions=True
+        )
+
+    results = asyncio.run(reserve_all())
+
+    assert results.count(300) == 3
+    assert sum(isinstance(r, llm_usage.TokenBudgetExceeded) for r in results) == 2
+    assert _used("reserve-test") == 900
+
+
+def test_record_call_settles_and_release_returns_the_reservation(budgets):
+    async def run():
+        with llm_usage.usage_scope("settle-test"):
+            reserved = await llm_usage.reserve_tokens(400)
+            await llm_usage.record_call("extract", {"input_tokens": 250, "output_tokens": 50}, reserved)
+            await llm_usage.release_tokens(await llm_usage.reserve_tokens(400))
+
+    asyncio.run(run())
+
+    assert _used("settle-test") == 300
+
+
+def test_only_admins_read_other_clients_usage(budgets):
+    assert llm_usage.can_read_client("acme", "acme")
+    assert not llm_usage.can_read_client("acme", "globex")
+    assert llm_usage.can_read_client("ops", "globex")
+
+
+@pytest.fixture
+def usage_api(budgets, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.v1.endpoints import usage
+
+    monkeypatch.setattr(llm_usage, "LLM_API_KEYS", {"acme-key": "acme", "ops-key": "ops"})
+    monkeypatch.setattr(llm_usage, "LLM_DAILY_TOKEN_BUDGET", 1000)
+    api = FastAPI()
+    api.include_router(usage.router, prefix="/usage")
+    return TestClient(api)
+
+
+def test_client_id_header_cannot_pick_a_fresh_budget(usage_api):
+    asyncio.run(llm_usage.reserve_tokens(600, "acme"))
+
+    spoofed = usage_api.get("/usage/", headers={"X-Client-Id": "fresh-client"})
+    keyed = usage_api.get("/usage/", headers={"X-API-Key": "acme-key", "X-Client-Id": "fresh-client"})
+
+    assert spoofed.status_code == 401
+    assert keyed.json()["client_id"] == "acme"
+    assert keyed.json()["remaining_tokens"] == 400
+    assert usage_api.get("/usage/", headers={"X-API-Key": "unknown-key"}).status_code == 401
+
+
+def test_client_id_header_cannot_claim_admin_access(usage_api):
+    spoofed = usage_api.get("/usage/?client=acme", headers={"X-API-Key": "acme-key", "X-Client-Id": "ops"})
+    other = usage_api.get("/usage/?client=ops", headers={"X-API-Key": "acme-key"})
+    admin = usage_api.get("/usage/?client=acme", headers={"X-API-Key": "ops-key"})
+
+    assert spoofed.status_code == 200 and spoofed.json()["client_id"] == "acme"
+    assert other.status_code == 403
+    assert admin.status_code == 200 and admin.json()["client_id"] == "acme"
+
+
+def test_requests_without_a_key_are_anonymous_when_nothing_is_configured(monkeypatch):
+    for name, value in (("LLM_API_KEYS", {}), ("LLM_CLIENT_TOKEN_BUDGETS", {}), ("LLM_USAGE_ADMIN_CLIENTS", set()), ("LLM_DAILY_TOKEN_BUDGET", 0)):
+        monkeypatch.setattr(llm_usage, name, value)
+
+    assert llm_usage.get_client_id(None) == llm_usage.DEFAULT_CLIENT_ID
+    assert llm_usage.get_client_id("any-key") == llm_usage.DEFAULT_CLIENT_ID
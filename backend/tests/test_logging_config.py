@@ -0,0 +1,120 @@
+"""
+Sampling, rate limiting, queueing and PII masking of app.logging_config.
+"""
+import logging
+import queue
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import logging_config
+
+
+def _record(level=logging.INFO, msg="line %s", args=("x",)):
+    return logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def request_scope():
+    """Handles records as if they were emitted while serving GET /health."""
+    tokens = []
+
+    def enter(path="/health"):
+        scope = {"type": "http", "path": path, "route": SimpleNamespace(path=path)}
+        tokens.append(logging_config._request_scope.set(scope))
+        return scope
+
+    yield enter
+    for token in reversed(tokens):
+        logging_config._request_scope.reset(token)
+
+
+def test_warnings_are_never_dropped(request_scope):
+    sampling = logging_config.RouteSamplingFilter({"/health": 0.0}, 0.0, rate_limit=1)
+    request_scope()
+
+    assert all(sampling.filter(_record(level)) for level in (logging.WARNING, logging.ERROR) for _ in range(50))
+    assert not sampling.filter(_record(logging.INFO))
+
+
+def test_sampling_is_decided_once_per_request(request_scope, monkeypatch):
+    draws = iter([0.0, 0.99])
+    monkeypatch.setattr(logging_config.random, "random", lambda: next(draws))
+    sampling = logging_config.RouteSamplingFilter({"/health": 0.5}, 1.0, rate_limit=0)
+
+    request_scope()
+    kept = [sampling.filter(_record()) for _ in range(5)]
+    request_scope()
+    dropped = [sampling.filter(_record()) for _ in range(5)]
+
+    assert kept == [True] * 5
+    assert dropped == [False] * 5
+
+
+def test_rate_limit_caps_lines_per_route(request_scope, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: now[0])
+    sampling = logging_config.RouteSamplingFilter({}, 1.0, rate_limit=5)
+    request_scope()
+
+    assert sum(sampling.filter(_record()) for _ in range(20)) == 5
+    now[0] += 1.0
+    assert sum(sampling.filter(_record()) for _ in range(20)) == 5
+    request_scope("/metrics")
+    assert sum(sampling.filter(_record()) for _ in range(20)) == 5
+
+
+def test_records_outside_requests_pass():
+    sampling = logging_config.RouteSamplingFilter({}, 0.0, rate_limit=1)
+
+    assert all(sampling.filter(_record()) for _ in range(10))
+
+
+def test_redact_pii_masks_emails_and_phone_numbers():
+    message = "Contact jane.doe+cv@example.co.uk or +1 (415) 555-0134, employed 2019-2023."
+
+    redacted = logging_config.redact_pii(message)
+
+    assert redacted == "Contact <email> or <phone>, employed 2019-2023."
+
+
+def test_queue_handler_merges_arguments_and_drops_when_full(monkeypatch):
+    monkeypatch.setitem(logging_config.LOG_STATS, "dropped_queue_full", 0)
+    handler = logging_config.NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    args = ["before"]
+    record = _record(args=(args,))
+
+    handler.emit(record)
+    args[0] = "after"
+    handler.emit(_record())
+
+    queued = handler.queue.get_nowait()
+    assert queued.getMessage() == "line ['before']"
+    assert record.args == (args,)
+    assert logging_config.LOG_STATS["dropped_queue_full"] == 1
+
+
+def test_middleware_logs_route_template_and_status():
+    api = FastAPI()
+
+    @api.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    api.add_middleware(logging_config.RequestLoggingMiddleware)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    handler.addFilter(logging_config.RouteSamplingFilter({}, 1.0, rate_limit=0))
+    request_logger = logging.getLogger("app.requests")
+    request_logger.addHandler(handler)
+    request_logger.setLevel(logging.INFO)
+    try:
+        TestClient(api).get("/items/7")
+    finally:
+        request_logger.removeHandler(handler)
+        request_logger.setLevel(logging.NOTSET)
+
+    assert [(r.getMessage(), r.status, r.route) for r in records] == [("GET /items/7 200", 200, "/items/{item_id}")]
@@ -0,0 +1,123 @@
+"""
+Splitting long resumes into chunks and merging the per-chunk extractions (app.resume_chunking).
+"""
+import re
+
+from app import schemas
+from app.resume_chunking import merge_extracted_data, split_resume_text
+from app.resume_parser import PAGE_BREAK
+
+
+def _section(heading, lines):
+    return heading + "\n" + "".join(f"{line}\n" for line in lines)
+
+
+def _content(text):
+    return re.sub(r"\s+", "", text)
+
+
+EXPERIENCE = _section("EXPERIENCE", [f"Engineer at Company {i}, built service number {i}." for i in range(8)])
+EDUCATION = _section("Education", [f"BSc Computer Science, University {i}" for i in range(6)])
+PUBLICATIONS = _section("Publications:", [f"Paper {i}: On distributed systems, Conf {i}." for i in range(6)])
+
+
+def test_split_cuts_at_section_headings_without_losing_text():
+    text = "Jane Doe\njane@example.com\n" + EXPERIENCE + EDUCATION + PUBLICATIONS
+
+    chunks = split_resume_text(text, target_chars=len(EXPERIENCE) + 40)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= len(EXPERIENCE) + 40 for chunk in chunks)
+    assert any(chunk.startswith("Education") for chunk in chunks)
+    assert any(chunk.startswith("Publications:") for chunk in chunks)
+    assert _content("".join(chunks)) == _content(text)
+
+
+def test_split_cuts_at_page_breaks_without_losing_text():
+    text = PAGE_BREAK.join(
+        "".join(f"Page {n} line {i} with some words about the candidate.\n" for i in range(5)) for n in range(3)
+    )
+    page_length = max(len(page) for page in text.split(PAGE_BREAK))
+
+    chunks = split_resume_text(text, target_chars=page_length + 10)
+
+    assert [chunk.split()[1] for chunk in chunks] == ["0", "1", "2"]
+    assert _content("".join(chunks)) == _content(text.replace(PAGE_BREAK, ""))
+
+
+def test_split_breaks_oversized_sections_at_lines():
+    text = _section("EXPERIENCE", [f"Responsibility {i}: kept the lights on for team {i}." for i in range(40)])
+
+    chunks = split_resume_text(text, target_chars=300)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert all(chunk.startswith(("EXPERIENCE", "Responsibility")) for chunk in chunks)
+    assert _content("".join(chunks)) == _content(text)
+
+
+def test_short_text_is_one_chunk():
+    assert split_resume_text(EDUCATION, target_chars=10_000) == [EDUCATION.strip()]
+
+
+def _part(**data):
+    return schemas.ResumeExtractedData.model_validate(data)
+
+
+def test_merge_joins_a_job_split_across_chunks():
+    first = _part(
+        contact_info={"name": "Jane Doe"},
+        work_experience=[{"company": "Acme", "role": "Engineer", "start_date": "2019-01", "responsibilities": ["Built APIs"]}],
+    )
+    second = _part(
+        contact_info={"email": "jane@example.com"},
+        work_experience=[
+            {"company": "ACME", "role": "engineer", "end_date": "2022-06", "responsibilities": ["Built APIs", "Led migrations"]},
+            {"company": "Globex", "role": "Intern", "start_date": "2018-06"},
+        ],
+    )
+
+    merged = merge_extracted_data([first, second])
+
+    assert merged.contact_info.name == "Jane Doe"
+    assert merged.contact_info.email == "jane@example.com"
+    assert [(job.company, job.start_date, job.end_date) for job in merged.work_experience] == [
+        ("Acme", "2019-01", "2022-06"), ("Globex", "2018-06", None)
+    ]
+    assert merged.work_experience[0].responsibilities == ["Built APIs", "Led migrations"]
+
+
+def test_merge_keeps_separate_stints_at_the_same_company():
+    first = _part(work_experience=[{"company": "Acme", "role": "Engineer", "start_date": "2015-01"}])
+    second = _part(work_experience=[
+        {"company": "Acme", "role": "Engineer", "start_date": "2020-03"},
+        {"company": "Acme", "role": "Engineer", "achievements": ["Shipped v2"]},
+    ])
+
+    merged = merge_extracted_data([first, second])
+
+    assert [job.start_date for job in merged.work_experience] == ["2015-01", "2020-03"]
+    assert merged.work_experience[0].achievements == ["Shipped v2"]
+
+
+def test_merge_dedupes_sections_and_skills_across_chunks():
+    first = _part(
+        summary="Backend engineer.",
+        education=[{"institution": "MIT", "degree": "BSc"}],
+        projects=[{"name": "Parser"}],
+        skills={"technical": [{"name": "Python"}], "soft": ["Teamwork"]},
+    )
+    second = _part(
+        summary="Ignored later summary.",
+        education=[{"institution": "mit", "degree": "BSc", "graduation_date": "2015"}],
+        projects=[{"name": "parser"}, {"name": "Scheduler"}],
+        skills={"technical": [{"name": "python"}, {"name": "Go"}], "soft": ["teamwork", "Mentoring"]},
+    )
+
+    merged = merge_extracted_data([first, second])
+
+    assert merged.summary == "Backend engineer."
+    assert len(merged.education) == 1 and merged.education[0].graduation_date == "2015"
+    assert [p.name for p in merged.projects] == ["Parser", "Scheduler"]
+    assert [s.name for s in merged.skills.technical] == ["Python", "Go"]
+    assert merged.skills.soft == ["Teamwork", "Mentoring"]
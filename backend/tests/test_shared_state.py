@@ -0,0 +1,118 @@
+"""
+Single-flight, token buckets and per-client jobs of app.shared_state, on the in-memory and SQLite backends.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import shared_state
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_state, "SINGLE_FLIGHT_POLL_SECONDS", 0.01)
+    if request.param == "memory":
+        return shared_state.create_state_backend("memory://")
+    return shared_state.create_state_backend(f"sqlite:///{tmp_path / 'state.db'}")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freezes both clocks the backends read; advance with clock.now += seconds."""
+    fake = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(shared_state, "time", SimpleNamespace(monotonic=lambda: fake.now, time=lambda: fake.now))
+    return fake
+
+
+def test_concurrent_single_flight_runs_one_computation(backend):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(backend.single_flight("same-input", compute, ttl_seconds=60) for _ in range(20)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert {value for value, _ in results} == {"result"}
+    assert sum(from_cache for _, from_cache in results) == 19
+
+
+def test_token_bucket_grants_capacity_plus_refill(backend, clock):
+    async def grants(attempts):
+        waits = [await backend.take_tokens("gemini", capacity=3, refill_per_second=2) for _ in range(attempts)]
+        return sum(wait == 0 for wait in waits)
+
+    assert asyncio.run(grants(10)) == 3
+    clock.now += 1.0
+    assert asyncio.run(grants(10)) == 2
+    clock.now += 10.0
+    assert asyncio.run(grants(10)) == 3
+
+
+def test_jobs_round_trip_through_sqlite(tmp_path):
+    path = f"sqlite:///{tmp_path / 'state.db'}"
+
+    async def write():
+        backend = shared_state.create_state_backend(path)
+        await backend.update_job("upload-1", client_id="acme", status="running", stage="text_extraction")
+        await backend.update_job("upload-1", client_id="acme", stage="saved", resume_id=7)
+
+    async def read(client_id):
+        return await shared_state.create_state_backend(path).get_job("upload-1", client_id=client_id)
+
+    asyncio.run(write())
+    job = asyncio.run(read("acme"))
+
+    assert job["status"] == "running"
+    assert job["stage"] == "saved"
+    assert job["resume_id"] == 7
+    assert job["client_id"] == "acme"
+    assert job["created_at"] <= job["updated_at"]
+    assert asyncio.run(read("globex")) is None
+
+
+def test_concurrent_job_updates_keep_every_field(backend):
+    async def run():
+        await asyncio.gather(*(backend.update_job("batch", client_id="acme", **{f"part_{i}": i}) for i in range(20)))
+        return await backend.get_job("batch", client_id="acme")
+
+    job = asyncio.run(run())
+
+    assert all(job[f"part_{i}"] == i for i in range(20))
+
+
+@pytest.fixture
+def jobs_api(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app import llm_usage
+    from app.api.v1.endpoints import resume
+
+    backend = shared_state.create_state_backend("memory://")
+    monkeypatch.setattr(resume, "get_state_backend", lambda: backend)
+    monkeypatch.setattr(llm_usage, "LLM_API_KEYS", {"acme-key": "acme", "globex-key": "globex", "ops-key": "ops"})
+    monkeypatch.setattr(llm_usage, "LLM_USAGE_ADMIN_CLIENTS", {"ops"})
+    asyncio.run(backend.update_job("upload-1", client_id="acme", status="completed"))
+    asyncio.run(backend.update_job("backfill-all", client_id=llm_usage.BACKFILL_CLIENT_ID, status="running"))
+    api = FastAPI()
+    api.include_router(resume.router, prefix="/resumes")
+    return TestClient(api)
+
+
+def test_jobs_are_only_readable_by_their_client_or_admins(jobs_api):
+    def status_of(path, key):
+        return jobs_api.get(path, headers={"X-API-Key": key}).status_code
+
+    assert status_of("/resumes/jobs/upload-1", "acme-key") == 200
+    assert status_of("/resumes/jobs/upload-1", "globex-key") == 404
+    assert status_of("/resumes/jobs/upload-1?client=acme", "globex-key") == 403
+    assert status_of("/resumes/jobs/backfill-all?client=backfill", "acme-key") == 403
+    assert status_of("/resumes/jobs/backfill-all?client=backfill", "ops-key") == 200
+    assert status_of("/resumes/jobs/upload-1?client=acme", "ops-key") == 200